@@ -0,0 +1,127 @@
+import hashlib
+import hmac
+import os
+import secrets
+import time
+from types import SimpleNamespace
+
+from fastapi import HTTPException, Request
+
+from backend.crypto import blind_index_key
+
+ADMIN_USER = os.getenv("ADMIN_USER", "admin")
+ADMIN_PASS = os.getenv("ADMIN_PASS", "cybersathi123")
+# Scripts and other services authenticate with X-Admin-Token instead of a browser session
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")
+ADMIN_SESSION_HOURS = float(os.getenv("ADMIN_SESSION_HOURS", "12"))
+ADMIN_COOKIE_SECURE = os.getenv("ADMIN_COOKIE_SECURE", "0") == "1"
+SESSION_COOKIE = "cybersathi_admin"
+CSRF_FIELD = "csrf_token"
+CSRF_HEADER = "x-csrf-token"
+
+
+# -------------------------------------------------------
+# 🍪 Signed session cookie: "<expires>.<csrf>.<hmac>"
+# -------------------------------------------------------
+def _secret():
+    """ADMIN_SESSION_SECRET, else derived from the blind-index key so every worker agrees."""
+    env_secret = os.getenv("ADMIN_SESSION_SECRET")
+    if env_secret:
+        return env_secret.encode()
+    return hmac.new(blind_index_key.get(), b"admin-session", hashlib.sha256).digest()
+
+
+def _sign(expires, csrf):
+    payload = f"{ADMIN_USER}|{expires}|{csrf}".encode()
+    return hmac.new(_secret(), payload, hashlib.sha256).hexdigest()
+
+
+def check_credentials(username, password):
+    # Compare both so a wrong username takes as long as a wrong password
+    user_ok = hmac.compare_digest(username.encode(), ADMIN_USER.encode())
+    pass_ok = hmac.compare_digest(password.encode(), ADMIN_PASS.encode())
+    return user_ok and pass_ok
+
+
+def new_session(now=None):
+    """Cookie value for a fresh login; the CSRF token rides inside it."""
+    expires = int((now or time.time()) + ADMIN_SESSION_HOURS * 3600)
+    csrf = secrets.token_urlsafe(24)
+    return f"{expires}.{csrf}.{_sign(expires, csrf)}"
+
+
+def read_session(value, now=None):
+    """The session's CSRF token, or None for a missing, forged or expired cookie."""
+    try:
+        expires, csrf, signature = (value or "").split(".")
+        expires = int(expires)
+    except ValueError:
+        return None
+    if expires < (now or time.time()) or not hmac.compare_digest(signature.encode(), _sign(expires, csrf).encode()):
+        return None
+    return csrf
+
+
+def set_session_cookie(response):
+    response.set_cookie(SESSION_COOKIE, new_session(), max_age=int(ADMIN_SESSION_HOURS * 3600),
+                        httponly=True, samesite="strict", secure=ADMIN_COOKIE_SECURE)
+    return response
+
+
+def clear_session_cookie(response):
+    response.delete_cookie(SESSION_COOKIE)
+    return response
+
+
+# -------------------------------------------------------
+# 🛡️ Route dependencies
+# -------------------------------------------------------
+def current_admin(request):
+    """Who is calling: via="token" (X-Admin-Token), via="session" (with its csrf), or None."""
+    token = request.headers.get("x-admin-token")
+    if ADMIN_TOKEN and token and hmac.compare_digest(token.encode(), ADMIN_TOKEN.encode()):
+        return SimpleNamespace(via="token", csrf="")
+    csrf = read_session(request.cookies.get(SESSION_COOKIE))
+    return SimpleNamespace(via="session", csrf=csrf) if csrf else None
+
+
+def require_admin(request: Request):
+    """JSON/API routes: 401 without a session cookie or admin token."""
+    admin = current_admin(request)
+    if admin is None:
+        raise HTTPException(status_code=401, detail="Admin login required")
+    return admin
+
+
+def require_admin_page(request: Request):
+    """HTML routes: send the browser back to the login page."""
+    admin = current_admin(request)
+    if admin is None:
+        raise HTTPException(status_code=303, headers={"Location": "/admin"})
+    return admin
+
+
+async def _check_csrf(request, admin):
+    if admin.via == "token":
+        return admin
+    sent = request.headers.get(CSRF_HEADER)
+    if sent is None and request.headers.get("content-type", "").startswith(
+            ("application/x-www-form-urlencoded", "multipart/form-data")):
+        sent = (await request.form()).get(CSRF_FIELD)
+    if not sent or not hmac.compare_digest(str(sent).encode(), admin.csrf.encode()):
+        raise HTTPException(status_code=403, detail="Missing or invalid CSRF token")
+    return admin
+
+
+async def require_csrf(request: Request):
+    """
+    State-changing routes: a browser session must echo its CSRF token as the
+    csrf_token form field or an X-CSRF-Token header. Token callers are exempt,
+    since a cross-site page cannot set that header.
+    """
+    return await _check_csrf(request, require_admin(request))
+
+
+async def require_admin_form(request: Request):
+    """Dashboard form posts: login redirect without a session, 403 without its CSRF token."""
+    return await _check_csrf(request, require_admin_page(request))
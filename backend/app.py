@@ -1,21 +1,114 @@
-from fastapi import FastAPI
-from backend.init_db import init_db
-from backend.routes import admin_dashboard
-from backend.whatsapp.whatsapp_router import router as whatsapp_router
-from fastapi.staticfiles import StaticFiles
+from backend.startup import startup_report, timed
+from backend.logs import get_logger
 
-app = FastAPI(title="CyberSathi Backend")
+with timed("import", "fastapi"):
+    from contextlib import asynccontextmanager
+    from fastapi import FastAPI
+    from fastapi.staticfiles import StaticFiles
+    import asyncio, os
+with timed("import", "database"):
+    from backend.init_db import init_db
+with timed("import", "admin_dashboard"):
+    from backend.routes import admin_dashboard, linking, search
+    from backend.notifications import NOTIFY_WORKER, notification_worker
+with timed("import", "messages"):
+    from backend.routes import messages
+    from backend.message_log import message_log
+with timed("import", "observability"):
+    from backend.routes import observability
+    from backend.profiler import install_signal_toggle, profiler
+with timed("import", "emotion"):
+    from backend.routes import emotion
+    from backend.emotion_trainer import EMOTION_TRAINER, emotion_trainer
+with timed("import", "whatsapp"):
+    from backend.whatsapp.whatsapp_router import router as whatsapp_router, dispatcher, sessions
+    from backend.whatsapp.graph_client import graph_client
+    from backend.utils.media_store import MEDIA_ROOT
+    from backend.utils.tickets import release_worker_id
 
-init_db()
+log = get_logger("app")
 
-# Static file access
-app.mount("/image", StaticFiles(directory="image"), name="image")
-app.mount("/document", StaticFiles(directory="document"), name="document")
+# Load heavy resources during startup instead of on the first message
+WARMUP = os.getenv("WARMUP", "0") == "1"
+
+
+def warm_up():
+    """Build heavy resources now; a failure is logged and left to retry on first use."""
+    from backend.emotion_model import emotion_model, predict_emotions
+    from backend.utils.translator import translator
+    for resource in (emotion_model, translator):
+        try:
+            resource.get()
+        except Exception as e:
+            log.warning("⚠️ Warm-up failed", resource=resource.name, error=str(e))
+    if emotion_model.loaded:
+        with timed("warmup", "emotion_predict"):
+            predict_emotions(["warm up"])
+
+
+@asynccontextmanager
+async def lifespan(app):
+    with timed("init", "database"):
+        await asyncio.to_thread(init_db)
+    if WARMUP:
+        await asyncio.to_thread(warm_up)
+    message_log.start()
+    dispatcher.start()
+    if EMOTION_TRAINER:
+        emotion_trainer.start()
+    if NOTIFY_WORKER:
+        notification_worker.start()
+    install_signal_toggle()
+    startup_report.log_summary()
+    yield
+    # Let queued webhook messages finish before the worker exits
+    await dispatcher.stop(drain=True)
+    await asyncio.to_thread(emotion_trainer.stop)
+    await asyncio.to_thread(notification_worker.stop)
+    profiler.stop()
+    await graph_client.aclose()
+    sessions.close()
+    # Write out any buffered message log rows
+    message_log.stop()
+    await asyncio.to_thread(release_worker_id)
+
+
+class EvidenceFiles(StaticFiles):
+    """
+    Uploaded evidence shares an origin with /admin, so it is always a
+    download: never rendered inline, never MIME-sniffed, and sandboxed if
+    a browser opens it anyway.
+    """
+
+    def file_response(self, *args, **kwargs):
+        response = super().file_response(*args, **kwargs)
+        response.headers["Content-Disposition"] = "attachment"
+        response.headers["X-Content-Type-Options"] = "nosniff"
+        response.headers["Content-Security-Policy"] = "default-src 'none'; sandbox"
+        return response
+
+
+app = FastAPI(title="CyberSathi Backend", lifespan=lifespan)
+
+# Static file access (image/ and document/ hold evidence saved before the media store)
+os.makedirs(MEDIA_ROOT, exist_ok=True)
+app.mount("/media", EvidenceFiles(directory=MEDIA_ROOT), name="media")
+app.mount("/image", EvidenceFiles(directory="image", check_dir=False), name="image")
+app.mount("/document", EvidenceFiles(directory="document", check_dir=False), name="document")
 
 # Routers
 app.include_router(whatsapp_router)
 app.include_router(admin_dashboard.router)
+app.include_router(search.router)
+app.include_router(linking.router)
+app.include_router(messages.router)
+app.include_router(emotion.router)
+app.include_router(observability.router)
 
 @app.get("/")
 def home():
     return {"message": "🚀 CyberSathi Backend is running!"}
+
+@app.get("/health/startup")
+def startup_health():
+    return startup_report.as_dict()
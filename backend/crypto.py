@@ -0,0 +1,248 @@
+import argparse
+import contextvars
+import hashlib
+import hmac
+import os
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from cryptography.fernet import Fernet, InvalidToken, MultiFernet
+from sqlalchemy.types import Text, TypeDecorator
+
+from backend.logs import get_logger
+from backend.startup import LazyResource
+
+KEY_FILE = os.environ.get("CYBERSATHI_FERNET_KEY_FILE", "./fernet_pro.key")
+BLIND_INDEX_KEY_FILE = os.environ.get("CYBERSATHI_BLIND_INDEX_KEY_FILE", "./blind_index.key")
+CRYPTO_CACHE_SIZE = int(os.getenv("CRYPTO_CACHE_SIZE", "20000"))
+TOKEN_PREFIX = "gAAAAA"  # every Fernet token starts with version byte 0x80 + timestamp
+
+log = get_logger("crypto")
+
+
+# -------------------------------------------------------
+# 🔑 Key ring: newest key encrypts, every key decrypts
+# -------------------------------------------------------
+def load_or_create_key():
+    if os.path.exists(KEY_FILE):
+        with open(KEY_FILE, "rb") as f:
+            return f.read()
+    key = Fernet.generate_key()
+    with open(KEY_FILE, "wb") as f:
+        f.write(key)
+    return key
+
+
+def load_keys():
+    """
+    CYBERSATHI_FERNET_KEYS (comma-separated, newest first), else the key
+    file, one key per line, newest first. Rotate by prepending a new key.
+    """
+    env_keys = os.getenv("CYBERSATHI_FERNET_KEYS")
+    raw = env_keys.split(",") if env_keys else load_or_create_key().decode().splitlines()
+    return [k.strip().encode() for k in raw if k.strip()]
+
+
+def _load_blind_index_key():
+    env_key = os.getenv("CYBERSATHI_BLIND_INDEX_KEY")
+    if env_key:
+        return env_key.encode()
+    if os.path.exists(BLIND_INDEX_KEY_FILE):
+        with open(BLIND_INDEX_KEY_FILE, "rb") as f:
+            return f.read().strip()
+    key = os.urandom(32).hex().encode()
+    with open(BLIND_INDEX_KEY_FILE, "wb") as f:
+        f.write(key)
+    return key
+
+
+key_ring = LazyResource("fernet_keys", lambda: MultiFernet([Fernet(k) for k in load_keys()]))
+blind_index_key = LazyResource("blind_index_key", _load_blind_index_key)
+
+
+# -------------------------------------------------------
+# 🔒 Encrypt / decrypt with a bounded plaintext cache
+# -------------------------------------------------------
+_cache = OrderedDict()  # token -> plaintext
+_cache_lock = threading.Lock()
+_legacy_plaintext = contextvars.ContextVar("legacy_plaintext", default=False)
+
+
+class DecryptionError(ValueError):
+    """An encrypted column held something the key ring cannot decrypt."""
+
+
+@contextmanager
+def legacy_plaintext():
+    """Migration only: let decrypt() return values stored before encryption unchanged."""
+    reset = _legacy_plaintext.set(True)
+    try:
+        yield
+    finally:
+        _legacy_plaintext.reset(reset)
+
+
+def _undecryptable(value, reason):
+    # Never log the value itself: it may be plaintext PII
+    log.error("🔒 Encrypted column value could not be decrypted", reason=reason)
+    return DecryptionError(f"encrypted column value could not be decrypted ({reason})")
+
+
+def encrypt(plain):
+    return key_ring.get().encrypt(plain.encode()).decode()
+
+
+def is_token(value):
+    return value.startswith(TOKEN_PREFIX)
+
+
+def decrypt(token):
+    """
+    Plaintext for a token. Anything else raises DecryptionError (and is
+    logged), except inside legacy_plaintext() where rows stored before
+    encryption pass through.
+    """
+    if not token:
+        return token
+    if not is_token(token):
+        if _legacy_plaintext.get():
+            return token
+        raise _undecryptable(token, "not a Fernet token")
+    with _cache_lock:
+        if token in _cache:
+            _cache.move_to_end(token)
+            return _cache[token]
+    try:
+        plain = key_ring.get().decrypt(token.encode()).decode()
+    except InvalidToken:
+        raise _undecryptable(token, "no key in the ring matches") from None
+    with _cache_lock:
+        _cache[token] = plain
+        while len(_cache) > CRYPTO_CACHE_SIZE:
+            _cache.popitem(last=False)
+    return plain
+
+
+def decrypt_many(tokens, remember=True):
+    """
+    {token: plaintext} for a page of values: each distinct token is decrypted
+    once. Bulk readers (exports) pass remember=False so they don't evict the
+    cache entries interactive pages rely on.
+    """
+    ring = key_ring.get()
+    out, missing = {}, []
+    with _cache_lock:
+        for token in set(tokens):
+            if not token:
+                out[token] = token
+            elif not is_token(token):
+                raise _undecryptable(token, "not a Fernet token")
+            elif token in _cache:
+                _cache.move_to_end(token)
+                out[token] = _cache[token]
+            else:
+                missing.append(token)
+    decrypted = {}
+    for token in missing:
+        try:
+            decrypted[token] = ring.decrypt(token.encode()).decode()
+        except InvalidToken:
+            raise _undecryptable(token, "no key in the ring matches") from None
+    if not remember:
+        out.update(decrypted)
+        return out
+    with _cache_lock:
+        _cache.update(decrypted)
+        while len(_cache) > CRYPTO_CACHE_SIZE:
+            _cache.popitem(last=False)
+    out.update(decrypted)
+    return out
+
+
+def blind_index(value):
+    """Deterministic keyed hash for equality lookups on encrypted values (None stays None)."""
+    if value is None:
+        return None
+    return hmac.new(blind_index_key.get(), value.encode(), hashlib.sha256).hexdigest()[:32]
+
+
+def reload_keys():
+    """Pick up a rotated key ring without restarting."""
+    key_ring.reset()
+    with _cache_lock:
+        _cache.clear()
+
+
+class EncryptedString(TypeDecorator):
+    """Text column stored as a Fernet token and read back as plaintext."""
+
+    impl = Text
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        # Always encrypt, even text that looks like a token; migrations bind tokens as plain Text
+        if value is None:
+            return value
+        return encrypt(value)
+
+    def process_result_value(self, value, dialect):
+        return decrypt(value)
+
+
+# -------------------------------------------------------
+# 🛠️ Maintenance: encrypt legacy rows, rotate keys
+# -------------------------------------------------------
+def reencrypt_complaints(rotate=False, batch_size=500):
+    """
+    Encrypt plaintext PII left from before encryption and recompute
+    phone_key as a blind index. With rotate, every token is re-encrypted
+    under the newest key so older keys can be retired. Returns rows updated.
+    """
+    from sqlalchemy import select, type_coerce, update
+    from backend.init_db import engine
+    from backend.models import Complaint, ENCRYPTED_FIELDS, phone_blind_index
+
+    table = Complaint.__table__
+    raw = [type_coerce(table.c[f], Text).label(f) for f in ENCRYPTED_FIELDS]
+    ring = key_ring.get()
+    updated, last_id = 0, 0
+    while True:
+        with engine.begin() as conn:
+            rows = conn.execute(
+                select(table.c.id, table.c.phone_key, *raw)
+                .where(table.c.id > last_id).order_by(table.c.id).limit(batch_size)
+            ).all()
+            if not rows:
+                break
+            for row in rows:
+                values = {}
+                for field in ENCRYPTED_FIELDS:
+                    stored = getattr(row, field)
+                    if stored is None:
+                        continue
+                    if not is_token(stored):
+                        values[field] = encrypt(stored)
+                    elif rotate:
+                        values[field] = ring.rotate(stored.encode()).decode()
+                with legacy_plaintext():
+                    phone_key = phone_blind_index(decrypt(row.phone))
+                if phone_key != row.phone_key:
+                    values["phone_key"] = phone_key
+                if values:
+                    # Already tokens: bind as plain Text so EncryptedString doesn't encrypt them again
+                    conn.execute(update(table).where(table.c.id == row.id).values(
+                        **{k: type_coerce(v, Text) if k in ENCRYPTED_FIELDS else v for k, v in values.items()}))
+                    updated += 1
+            last_id = rows[-1].id
+    return updated
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Complaint PII encryption maintenance")
+    parser.add_argument("--rotate", action="store_true", help="re-encrypt every value under the newest key")
+    args = parser.parse_args()
+    started = time.perf_counter()
+    n = reencrypt_complaints(rotate=args.rotate)
+    print(f"✅ Updated {n} complaints in {time.perf_counter() - started:.1f}s")
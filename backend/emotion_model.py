@@ -1,13 +1,309 @@
-import joblib
+import asyncio
+import json
+import os
+import queue
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
 
-emotion_pipeline = joblib.load("models/emotion_pipeline.joblib")
-emotion_label_encoder = joblib.load("models/emotion_label_encoder.joblib")
+from backend.logs import get_logger
+from backend.metrics import EMOTION_SECONDS
+from backend.startup import LazyResource
 
-def predict_emotion(text):
+MODEL_DIR = os.getenv("EMOTION_MODEL_DIR", "models")
+EMOTION_CACHE_SIZE = int(os.getenv("EMOTION_CACHE_SIZE", "4096"))
+EMOTION_BATCH_WINDOW_MS = float(os.getenv("EMOTION_BATCH_WINDOW_MS", "5"))
+EMOTION_MAX_BATCH = int(os.getenv("EMOTION_MAX_BATCH", "64"))
+EMOTION_RELOAD_SECONDS = float(os.getenv("EMOTION_RELOAD_SECONDS", "5"))
+META_FILE = "emotion_meta.json"  # shipped with the TF-IDF pipeline; never rewritten
+ONLINE_META_FILE = "emotion_online.json"  # written by the trainer, points at the current online version
+
+log = get_logger("emotion")
+
+
+def _read_json(path):
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def read_meta(model_dir=MODEL_DIR):
+    """The shipped meta, overridden by the trainer's once an online version exists."""
+    return {**_read_json(os.path.join(model_dir, META_FILE)),
+            **_read_json(os.path.join(model_dir, ONLINE_META_FILE))}
+
+
+class EmotionModel:
+    """
+    A loaded model version. Either the original frozen TF-IDF pipeline
+    (+ label encoder) or an online artifact (hashing vectorizer + SGD
+    classifier) written by backend.emotion_trainer.
+    """
+
+    def __init__(self, meta, vectorizer=None, classifier=None, pipeline=None, encoder=None):
+        self.meta = meta
+        self.vectorizer = vectorizer
+        self.classifier = classifier
+        self.pipeline = pipeline
+        self.encoder = encoder
+        self.loaded_at = time.time()
+
+    @property
+    def version(self):
+        return self.meta.get("version", 0)
+
+    def predict(self, texts):
+        if self.classifier is not None:
+            return [str(e) for e in self.classifier.predict(self.vectorizer.transform(texts))]
+        return [str(e) for e in self.encoder.inverse_transform(self.pipeline.predict(texts))]
+
+
+def _load_artifacts(model_dir=None):
+    import joblib  # pulls in numpy/scipy; only paid by workers that actually predict
+    model_dir = model_dir or MODEL_DIR
+    meta = read_meta(model_dir)
+    if meta.get("artifact"):
+        artifact = joblib.load(os.path.join(model_dir, meta["artifact"]))
+        return EmotionModel(meta, vectorizer=artifact["vectorizer"], classifier=artifact["classifier"])
+    pipeline = joblib.load(os.path.join(model_dir, "emotion_pipeline.joblib"))
+    encoder = joblib.load(os.path.join(model_dir, "emotion_label_encoder.joblib"))
+    return EmotionModel(meta, pipeline=pipeline, encoder=encoder)
+
+
+emotion_model = LazyResource("emotion_model", _load_artifacts)
+
+
+def load_model():
+    """The current EmotionModel, deserialized on first use."""
+    return emotion_model.get()
+
+
+def predict_emotions(texts):
+    """One vectorized predict() for a whole batch of texts."""
     try:
-        pred = emotion_pipeline.predict([text])[0]
-        emotion = emotion_label_encoder.inverse_transform([pred])[0]
-        return emotion
+        return load_model().predict(list(texts))
     except Exception as e:
-        print("Emotion prediction error:", e)
-        return "neutral"
+        log.error("Emotion prediction error", error=str(e))
+        return ["neutral"] * len(texts)
+
+
+def cache_key(text):
+    # Both vectorizers lowercase and split on whitespace, so these variants predict identically
+    return " ".join((text or "").lower().split())
+
+
+# -------------------------------------------------------
+# 🔄 Hot swap: follow emotion_online.json written by the trainer
+# -------------------------------------------------------
+class ModelReloader:
+    """
+    Polls the meta file's mtime (at most every `interval` seconds) and,
+    when a new version appears, loads it on a side thread and swaps it in.
+    Predictions keep using the old model until the new one is ready.
+    """
+
+    def __init__(self, resource=emotion_model, interval=EMOTION_RELOAD_SECONDS, on_swap=None):
+        self.resource = resource
+        self.interval = interval
+        self.on_swap = on_swap
+        self._checked = 0.0
+        self._first_poll = True
+        self._mtime = None  # also None while the online meta file does not exist
+        self._loading = False
+        self._lock = threading.Lock()
+        self.swaps = 0
+
+    def _meta_mtime(self):
+        try:
+            return os.stat(os.path.join(MODEL_DIR, ONLINE_META_FILE)).st_mtime_ns
+        except OSError:
+            return None
+
+    def _stale(self):
+        if not self.resource.loaded:
+            return False  # the lazy load will read the current meta
+        return self.resource.get().version != read_meta(MODEL_DIR).get("version", 0)
+
+    def poll(self):
+        now = time.monotonic()
+        if now - self._checked < self.interval:
+            return
+        with self._lock:
+            if self._loading or now - self._checked < self.interval:
+                return
+            self._checked = now
+            mtime = self._meta_mtime()
+            if self._first_poll:
+                # Baseline; reload only if the model was loaded before the current meta was written
+                self._first_poll = False
+                self._mtime = mtime
+                if not self._stale():
+                    return
+            elif mtime == self._mtime:
+                return
+            self._mtime = mtime
+            self._loading = True
+        threading.Thread(target=self._reload, name="emotion-reload", daemon=True).start()
+
+    def _reload(self):
+        try:
+            model = _load_artifacts()
+            current = self.resource.get() if self.resource.loaded else None
+            if current is None or model.version != current.version:
+                self.resource.set(model)
+                self.swaps += 1
+                log.info("🔄 Emotion model loaded", version=model.version)
+                if self.on_swap:
+                    self.on_swap()
+        except Exception as e:
+            log.error("⚠️ Emotion model reload failed", error=str(e))
+        finally:
+            self._loading = False
+
+    def swap(self, model):
+        """Install a model this process just trained (no reload from disk needed)."""
+        with self._lock:
+            self._first_poll = False
+            self._mtime = self._meta_mtime()
+        self.resource.set(model)
+        self.swaps += 1
+        if self.on_swap:
+            self.on_swap()
+
+
+# -------------------------------------------------------
+# 🧠 Micro-batching inference service
+# -------------------------------------------------------
+class EmotionService:
+    """
+    Callers (webhook worker threads or coroutines) submit texts; a single
+    batcher thread collects everything that arrives within `window_ms`
+    (up to `max_batch`) and runs one vectorized predict for the lot.
+    Repeated texts ("hi", "a", "b", ...) are answered from a bounded LRU.
+    """
+
+    def __init__(self, cache_size=EMOTION_CACHE_SIZE, window_ms=EMOTION_BATCH_WINDOW_MS,
+                 max_batch=EMOTION_MAX_BATCH, predict_fn=predict_emotions):
+        self.cache_size = cache_size
+        self.window = window_ms / 1000
+        self.max_batch = max_batch
+        self.predict_fn = predict_fn
+        self._cache = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self._queue = queue.Queue()
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self.counters = {
+            "requests": 0,
+            "cache_hits": 0,
+            "batches": 0,
+            "batched_texts": 0,
+            "model_seconds": 0.0,
+            "latency_seconds": 0.0,
+        }
+
+    # --- cache ---
+    def _cached(self, key):
+        with self._cache_lock:
+            self.counters["requests"] += 1
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                self.counters["cache_hits"] += 1
+                return self._cache[key]
+        return None
+
+    def _remember(self, key, emotion):
+        with self._cache_lock:
+            self._cache[key] = emotion
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def clear_cache(self):
+        with self._cache_lock:
+            self._cache.clear()
+
+    # --- batching ---
+    def _ensure_thread(self):
+        if self._thread is None:
+            with self._start_lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="emotion-batcher", daemon=True)
+                    self._thread.start()
+
+    def submit(self, text):
+        """Future resolving to the emotion label for `text`."""
+        key = cache_key(text)
+        fut = Future()
+        hit = self._cached(key)
+        if hit is not None:
+            fut.set_result(hit)
+            return fut
+        self._ensure_thread()
+        self._queue.put((key, fut, time.perf_counter()))
+        return fut
+
+    def predict(self, text, timeout=5.0):
+        """Blocking call for worker threads."""
+        try:
+            return self.submit(text).result(timeout)
+        except Exception as e:
+            log.error("Emotion prediction error", error=str(e))
+            return "neutral"
+
+    async def predict_async(self, text):
+        return await asyncio.wrap_future(self.submit(text))
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.perf_counter() + self.window
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self._process(batch)
+
+    def _process(self, batch):
+        model_reloader.poll()
+        unique = list(dict.fromkeys(key for key, _, _ in batch))
+        started = time.perf_counter()
+        try:
+            labels = dict(zip(unique, self.predict_fn(unique)))
+        except Exception as e:
+            log.error("Emotion prediction error", error=str(e))
+            labels = dict.fromkeys(unique, "neutral")
+        finished = time.perf_counter()
+        EMOTION_SECONDS.observe(finished - started)
+        self.counters["batches"] += 1
+        self.counters["batched_texts"] += len(batch)
+        self.counters["model_seconds"] += finished - started
+        for key, label in labels.items():
+            self._remember(key, label)
+        for key, fut, submitted in batch:
+            self.counters["latency_seconds"] += finished - submitted
+            fut.set_result(labels[key])
+
+    def stats(self):
+        c = dict(self.counters)
+        misses = c["batched_texts"]
+        c["avg_batch_size"] = round(misses / c["batches"], 2) if c["batches"] else 0.0
+        c["avg_model_ms_per_text"] = round(c["model_seconds"] / misses * 1000, 3) if misses else 0.0
+        c["avg_latency_ms"] = round(c["latency_seconds"] / misses * 1000, 3) if misses else 0.0
+        c["cache_entries"] = len(self._cache)
+        return c
+
+
+emotion_service = EmotionService()
+model_reloader = ModelReloader(on_swap=emotion_service.clear_cache)
+
+
+def predict_emotion(text):
+    return emotion_service.predict(text)
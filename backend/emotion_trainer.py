@@ -0,0 +1,288 @@
+import argparse
+import copy
+import glob
+import json
+import os
+import re
+import threading
+import time
+from datetime import datetime
+
+from sqlalchemy import func, select, update
+
+from backend.emotion_model import (ONLINE_META_FILE, MODEL_DIR, EmotionModel, _load_artifacts, model_reloader,
+                                   read_meta)
+from backend.init_db import engine
+from backend.logs import get_logger
+from backend.models import MessageLog
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process lock, run a single trainer
+    fcntl = None
+
+EMOTION_TRAINER = os.getenv("EMOTION_TRAINER", "0") == "1"
+EMOTION_TRAIN_INTERVAL = float(os.getenv("EMOTION_TRAIN_INTERVAL", "300"))
+EMOTION_TRAIN_BATCH = int(os.getenv("EMOTION_TRAIN_BATCH", "256"))
+EMOTION_KEEP_VERSIONS = int(os.getenv("EMOTION_KEEP_VERSIONS", "5"))
+# Labels needed before a fresh online model may replace the shipped TF-IDF pipeline
+EMOTION_MIN_LABELS = int(os.getenv("EMOTION_MIN_LABELS", "200"))
+# Every Nth labeled message (by id) is never trained on; it scores the candidate against the served model
+EMOTION_HOLDOUT_EVERY = int(os.getenv("EMOTION_HOLDOUT_EVERY", "5"))
+DEFAULT_CLASSES = ["anger", "distress", "fear", "neutral", "sadness"]
+ARTIFACT_RE = re.compile(r"emotion_online_v(\d+)\.joblib$")
+
+log = get_logger("emotion_trainer")
+
+# A few examples per class so a freshly bootstrapped model predicts every label
+SEED_SAMPLES = {
+    "anger": ["this is a scam and nobody is helping me", "i am very angry, they cheated me",
+              "why is the police doing nothing", "useless service, give my money back"],
+    "distress": ["please help me urgently", "i don't know what to do now",
+                 "my account was emptied, help", "someone is using my number, please help"],
+    "fear": ["they are threatening to leak my photos", "i am scared they will call again",
+             "he said he will arrest me", "afraid my family will find out"],
+    "neutral": ["hi", "a", "my name is ravi kumar", "01-01-1990", "what is my complaint status",
+                "ok thank you"],
+    "sadness": ["i lost all my savings", "i feel hopeless, the money was for my daughter",
+                "i trusted them and lost everything", "so sad, nobody can get it back"],
+}
+
+
+def model_classes(meta=None):
+    return list((meta or read_meta(MODEL_DIR)).get("classes") or DEFAULT_CLASSES)
+
+
+def new_model(classes):
+    """Hashing vectorizer (stateless, nothing to refit) + SGD logistic regression."""
+    from sklearn.feature_extraction.text import HashingVectorizer
+    from sklearn.linear_model import SGDClassifier
+
+    vectorizer = HashingVectorizer(n_features=2 ** 18, alternate_sign=False, ngram_range=(1, 2))
+    classifier = SGDClassifier(loss="log_loss", alpha=1e-5, random_state=0)
+    seed_texts = [t for label in classes for t in SEED_SAMPLES.get(label, ())]
+    seed_labels = [label for label in classes for _ in SEED_SAMPLES.get(label, ())]
+    classifier.partial_fit(vectorizer.transform(seed_texts), seed_labels, classes=classes)
+    return vectorizer, classifier
+
+
+def _write_atomic(path, write):
+    tmp = f"{path}.tmp{os.getpid()}"
+    write(tmp)
+    os.replace(tmp, path)  # readers see the old file or the new one, never half of it
+
+
+def artifact_versions(model_dir=MODEL_DIR):
+    versions = []
+    for path in glob.glob(os.path.join(model_dir, "emotion_online_v*.joblib")):
+        match = ARTIFACT_RE.search(path)
+        if match:
+            versions.append((int(match.group(1)), path))
+    return sorted(versions)
+
+
+# -------------------------------------------------------
+# 🎓 Incremental training on labeled messages
+# -------------------------------------------------------
+def _held_out():
+    return MessageLog.id % EMOTION_HOLDOUT_EVERY == 0
+
+
+def labeled_count():
+    with engine.connect() as conn:
+        return conn.execute(select(func.count()).select_from(MessageLog).where(MessageLog.label.is_not(None))).scalar()
+
+
+def pending_labels():
+    with engine.connect() as conn:
+        return conn.execute(
+            select(func.count()).select_from(MessageLog)
+            .where(MessageLog.label.is_not(None), MessageLog.trained_at.is_(None), ~_held_out())
+        ).scalar()
+
+
+def holdout_rows(classes):
+    with engine.connect() as conn:
+        rows = conn.execute(
+            select(MessageLog.message, MessageLog.label).where(MessageLog.label.is_not(None), _held_out())
+        ).all()
+    return [r for r in rows if r.label in classes and r.message]
+
+
+def holdout_accuracy(model, rows):
+    predicted = model.predict([r.message for r in rows])
+    return sum(p == r.label for p, r in zip(predicted, rows)) / len(rows)
+
+
+def train_once(full=False, batch_size=EMOTION_TRAIN_BATCH):
+    """
+    partial_fit the online model on labeled messages not yet trained on
+    (every labeled message with full, starting from a fresh model), write
+    it as the next version and point emotion_online.json at it. Returns the
+    new meta, or None when nothing changed: a fresh model needs
+    EMOTION_MIN_LABELS labels, and a candidate that scores worse than the
+    served model on the held-out labels is discarded.
+    """
+    import joblib
+
+    meta = read_meta(MODEL_DIR)
+    classes = model_classes(meta)
+    fresh = full or not meta.get("artifact")
+    if fresh and labeled_count() < EMOTION_MIN_LABELS:
+        return None
+    current = _load_artifacts(MODEL_DIR)
+    if fresh:
+        vectorizer, classifier = new_model(classes)
+        samples_seen = 0
+    else:
+        vectorizer, classifier = current.vectorizer, copy.deepcopy(current.classifier)
+        samples_seen = meta.get("samples_seen", 0)
+
+    labeled = MessageLog.label.is_not(None) & ~_held_out()
+    if not full:
+        labeled = labeled & MessageLog.trained_at.is_(None)
+    trained_ids, last_id = [], 0
+    while True:
+        with engine.connect() as conn:
+            rows = conn.execute(
+                select(MessageLog.id, MessageLog.message, MessageLog.label)
+                .where(labeled, MessageLog.id > last_id).order_by(MessageLog.id).limit(batch_size)
+            ).all()
+        if not rows:
+            break
+        last_id = rows[-1].id
+        rows = [r for r in rows if r.label in classes and r.message]
+        if rows:
+            classifier.partial_fit(vectorizer.transform([r.message for r in rows]), [r.label for r in rows])
+            trained_ids += [r.id for r in rows]
+    if not trained_ids and not full:
+        return None
+
+    holdout = holdout_rows(classes)
+    candidate = EmotionModel(meta, vectorizer=vectorizer, classifier=classifier)
+    new_score = holdout_accuracy(candidate, holdout) if holdout else 0.0
+    current_score = holdout_accuracy(current, holdout) if holdout else 0.0
+    if not holdout or new_score < current_score:
+        log.info("🎓 Online emotion model not better than the served one; keeping it",
+                 holdout=len(holdout), accuracy=round(new_score, 4), served_accuracy=round(current_score, 4))
+        return None
+
+    version = max([meta.get("version", 0)] + [v for v, _ in artifact_versions()]) + 1
+    artifact_name = f"emotion_online_v{version}.joblib"
+    _write_atomic(os.path.join(MODEL_DIR, artifact_name), lambda tmp: joblib.dump(
+        {"vectorizer": vectorizer, "classifier": classifier, "classes": classes, "version": version}, tmp))
+    new_meta = {
+        **meta,
+        "version": version,
+        "artifact": artifact_name,
+        "classes": classes,
+        "last_trained": time.time(),
+        "samples_seen": samples_seen + len(trained_ids),
+        "holdout_accuracy": round(new_score, 4),
+    }
+
+    def write_meta(tmp):
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(new_meta, f)
+    _write_atomic(os.path.join(MODEL_DIR, ONLINE_META_FILE), write_meta)
+
+    now = datetime.utcnow()
+    with engine.begin() as conn:
+        for i in range(0, len(trained_ids), 500):
+            conn.execute(update(MessageLog).where(MessageLog.id.in_(trained_ids[i:i + 500])).values(trained_at=now))
+    for old_version, path in artifact_versions()[:-EMOTION_KEEP_VERSIONS]:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+    # This process swaps right away; other workers follow the meta file
+    model_reloader.swap(EmotionModel(new_meta, vectorizer=vectorizer, classifier=classifier))
+    log.info("🎓 Emotion model trained", version=version, new_labels=len(trained_ids))
+    return new_meta
+
+
+class EmotionTrainer:
+    """
+    Background thread that runs train_once() every `interval` seconds (or
+    sooner after trigger()). An exclusive lock file keeps it to one trainer
+    across worker processes; the others only follow new versions.
+    """
+
+    def __init__(self, interval=EMOTION_TRAIN_INTERVAL):
+        self.interval = interval
+        self._wake = threading.Event()
+        self._stopping = False
+        self._thread = None
+        self._lock_file = None
+        self._train_lock = threading.Lock()
+        self.runs = 0
+        self.last_error = None
+
+    def _acquire_process_lock(self):
+        if fcntl is None:
+            return True
+        os.makedirs(MODEL_DIR, exist_ok=True)
+        self._lock_file = open(os.path.join(MODEL_DIR, ".trainer.lock"), "w")
+        try:
+            fcntl.flock(self._lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return True
+        except OSError:
+            self._lock_file.close()
+            self._lock_file = None
+            return False
+
+    def start(self):
+        if self._thread is not None or not self._acquire_process_lock():
+            return False
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, name="emotion-trainer", daemon=True)
+        self._thread.start()
+        log.info("🎓 Emotion trainer started", interval_seconds=self.interval)
+        return True
+
+    def stop(self):
+        self._stopping = True
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=30)
+            self._thread = None
+        if self._lock_file is not None:
+            self._lock_file.close()
+            self._lock_file = None
+
+    def trigger(self):
+        self._wake.set()
+
+    def run_once(self, full=False):
+        with self._train_lock:
+            try:
+                result = train_once(full=full)
+                self.last_error = None
+                return result
+            except Exception as e:
+                self.last_error = str(e)
+                log.error("⚠️ Emotion training failed", exc_info=True)
+                return None
+            finally:
+                self.runs += 1
+
+    def _run(self):
+        while not self._stopping:
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            if not self._stopping:
+                self.run_once()
+
+    def stats(self):
+        return {"running": self._thread is not None, "runs": self.runs, "last_error": self.last_error}
+
+
+emotion_trainer = EmotionTrainer()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Train the online emotion model on labeled messages")
+    parser.add_argument("--full", action="store_true", help="retrain from scratch on every labeled message")
+    args = parser.parse_args()
+    result = train_once(full=args.full)
+    print(f"✅ Model version {result['version']}" if result else "✅ No new labels")
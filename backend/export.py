@@ -0,0 +1,99 @@
+import csv
+import io
+import json
+import os
+import zlib
+from datetime import date, datetime
+
+from fastapi.responses import StreamingResponse
+
+from backend.init_db import engine
+
+try:
+    import orjson
+except ImportError:  # optional speed-up
+    orjson = None
+
+EXPORT_CHUNK_ROWS = int(os.getenv("EXPORT_CHUNK_ROWS", "1000"))
+EXPORT_GZIP_LEVEL = int(os.getenv("EXPORT_GZIP_LEVEL", "6"))
+MEDIA_TYPES = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+
+
+# -------------------------------------------------------
+# 📤 Streaming exports: server-side cursor -> CSV/NDJSON -> optional gzip
+# -------------------------------------------------------
+def iter_chunks(stmt, chunk_rows=EXPORT_CHUNK_ROWS):
+    """
+    Row tuples of a Core select, `chunk_rows` at a time, from a server-side
+    cursor (stream_results + yield_per), so only one chunk is ever in memory.
+    The connection is released when the generator finishes or is closed
+    (client disconnect).
+    """
+    with engine.connect() as conn:
+        result = conn.execution_options(stream_results=True, yield_per=chunk_rows).execute(stmt)
+        for chunk in result.partitions():
+            yield chunk
+
+
+def parse_day(value):
+    try:
+        return datetime.strptime(value, "%Y-%m-%d") if value else None
+    except ValueError:
+        return None
+
+
+# Spreadsheets evaluate cells starting with these as formulas (=HYPERLINK(...), +cmd|...)
+FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+
+def _plain(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value  # citizen-supplied text: show it as text in Excel, never run it
+    return value
+
+
+def encode_csv(columns, chunks):
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(columns)
+    for chunk in chunks:
+        writer.writerows([[_plain(v) for v in row] for row in chunk])
+        yield buf.getvalue().encode()
+        buf.seek(0)
+        buf.truncate()
+    if buf.tell():
+        yield buf.getvalue().encode()
+
+
+def encode_ndjson(columns, chunks):
+    if orjson:
+        dumps = lambda obj: orjson.dumps(obj)  # serializes datetimes as ISO 8601 itself
+    else:
+        dumps = lambda obj: json.dumps(obj, ensure_ascii=False, default=_plain).encode()
+    for chunk in chunks:
+        yield b"".join(dumps(dict(zip(columns, row))) + b"\n" for row in chunk)
+
+
+def gzip_stream(parts, level=EXPORT_GZIP_LEVEL):
+    """Compress a byte stream incrementally (gzip container, one member)."""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    for part in parts:
+        data = compressor.compress(part)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def export_response(name, fmt, columns, chunks, gzip=False):
+    """StreamingResponse (chunked transfer) for `name`.csv / `name`.ndjson, optionally .gz."""
+    body = encode_csv(columns, chunks) if fmt == "csv" else encode_ndjson(columns, chunks)
+    filename = f"{name}.{fmt}"
+    media_type = MEDIA_TYPES[fmt]
+    if gzip:
+        body = gzip_stream(body)
+        filename += ".gz"
+        media_type = "application/gzip"
+    return StreamingResponse(body, media_type=media_type,
+                             headers={"Content-Disposition": f"attachment; filename={filename}"})
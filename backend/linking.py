@@ -0,0 +1,379 @@
+import argparse
+import os
+import time
+from datetime import datetime
+from multiprocessing import Pool
+
+from sqlalchemy import Text, delete, func, insert, select, type_coerce, update
+
+from backend.crypto import blind_index, decrypt_many
+from backend.init_db import dialect_insert, engine
+from backend.logs import get_logger
+from backend.models import Complaint, ComplaintCluster, ComplaintEntity, FraudIndicator, UnfreezeRequest
+from backend.search import extract_entities, find_entities
+
+LINK_BACKFILL_WORKERS = int(os.getenv("LINK_BACKFILL_WORKERS", "1"))
+LINK_BACKFILL_CHUNK = 5000
+MAX_CLUSTER_MEMBERS = 1000
+
+log = get_logger("linking")
+
+
+def indicator_key(kind, value):
+    """Blind index of a normalized indicator, so unfreeze accounts match without storing them in clear."""
+    return blind_index(f"{kind}:{value}")
+
+
+def unfreeze_indicator(text):
+    """(kind, value) for the account number / UPI ID typed in an unfreeze request."""
+    found = find_entities(text or "")
+    if found:
+        return found[0][:2]
+    digits = "".join(ch for ch in text or "" if ch.isdigit())
+    return ("account", digits) if len(digits) >= 6 else ("account", (text or "").strip().lower())
+
+
+# -------------------------------------------------------
+# 🧬 Union-find over complaints, persisted in complaint_clusters
+# -------------------------------------------------------
+def _parent(conn, node):
+    return conn.execute(
+        select(ComplaintCluster.parent_id).where(ComplaintCluster.complaint_id == node)
+    ).scalar()
+
+
+def find(conn, node, compress=True):
+    """Root of node's cluster, pointing the path straight at it (path compression)."""
+    path = []
+    parent = _parent(conn, node)
+    while parent is not None and parent != node:
+        path.append(node)
+        node, parent = parent, _parent(conn, parent)
+    if compress and len(path) > 1:
+        conn.execute(update(ComplaintCluster).where(ComplaintCluster.complaint_id.in_(path[:-1]))
+                     .values(parent_id=node))
+    return node
+
+
+def union(conn, a, b):
+    """Merge the clusters of complaints a and b (smaller under larger); returns the root."""
+    ra, rb = find(conn, a), find(conn, b)
+    if ra == rb:
+        return ra
+    sizes = dict(conn.execute(
+        select(ComplaintCluster.complaint_id, ComplaintCluster.size)
+        .where(ComplaintCluster.complaint_id.in_((ra, rb)))
+    ).all())
+    big, small = (ra, rb) if (sizes.get(ra, 1), -ra) >= (sizes.get(rb, 1), -rb) else (rb, ra)
+    conn.execute(update(ComplaintCluster).where(ComplaintCluster.complaint_id == small)
+                 .values(parent_id=big, size=0))
+    conn.execute(update(ComplaintCluster).where(ComplaintCluster.complaint_id == big)
+                 .values(size=sizes.get(big, 1) + sizes.get(small, 1)))
+    return big
+
+
+def _upsert_indicator(conn, kind, value, complaint_id=None, unfreeze=0, keep_value=True):
+    """Count one sighting; returns the complaint whose cluster the indicator belongs to."""
+    table = FraudIndicator.__table__
+    now = datetime.utcnow()
+    key = indicator_key(kind, value)
+    stmt = dialect_insert(table).values(
+        key=key, kind=kind, value=value if keep_value else None, first_complaint_id=complaint_id,
+        complaints=0 if complaint_id is None else 1, unfreeze_requests=unfreeze, first_seen=now, last_seen=now,
+    )
+    conn.execute(stmt.on_conflict_do_update(index_elements=["key"], set_={
+        "value": func.coalesce(table.c.value, stmt.excluded.value),
+        "first_complaint_id": func.coalesce(table.c.first_complaint_id, stmt.excluded.first_complaint_id),
+        "complaints": table.c.complaints + stmt.excluded.complaints,
+        "unfreeze_requests": table.c.unfreeze_requests + stmt.excluded.unfreeze_requests,
+        "last_seen": stmt.excluded.last_seen,
+    }))
+    return conn.execute(select(table.c.first_complaint_id).where(table.c.key == key)).scalar()
+
+
+# -------------------------------------------------------
+# 🔗 Incremental linking (in the caller's transaction)
+# -------------------------------------------------------
+def link_complaint(conn, complaint_id, entities):
+    """
+    Add a new complaint to the forest and union it with the first complaint
+    that named each of its indicators: one indicator upsert plus a couple of
+    parent lookups per indicator, however large the clusters get.
+    """
+    conn.execute(insert(ComplaintCluster.__table__).values(complaint_id=complaint_id, parent_id=complaint_id, size=1))
+    for kind, value in sorted(entities):
+        owner = _upsert_indicator(conn, kind, value, complaint_id)
+        if owner is not None and owner != complaint_id:
+            union(conn, complaint_id, owner)
+
+
+def link_unfreeze(conn, request_id, account, complaint_id=None):
+    """
+    Record an unfreeze request's account as an indicator. The referenced
+    complaint joins the cluster of whoever named the account first; if no
+    complaint has, the referenced one becomes its owner for later complaints.
+    """
+    kind, value = unfreeze_indicator(account)
+    key = indicator_key(kind, value)
+    conn.execute(update(UnfreezeRequest).where(UnfreezeRequest.id == request_id).values(account_key=key))
+    owner = _upsert_indicator(conn, kind, value, unfreeze=1, keep_value=False)
+    if complaint_id is None:
+        return owner
+    if owner is None:
+        conn.execute(update(FraudIndicator).where(FraudIndicator.key == key).values(first_complaint_id=complaint_id))
+        return complaint_id
+    return union(conn, complaint_id, owner)
+
+
+def save_unfreeze_request(db, sender, account, bank, reference_ticket=None):
+    """Persist and link one unfreeze request; the caller commits."""
+    complaint_id = None
+    if reference_ticket:
+        complaint_id = db.execute(
+            select(Complaint.id).where(Complaint.ticket_number == reference_ticket)
+        ).scalar()
+    request = UnfreezeRequest(wa_id=sender, account=account, bank=bank,
+                              reference_ticket=reference_ticket or None, complaint_id=complaint_id)
+    db.add(request)
+    db.flush()
+    link_unfreeze(db, request.id, account, complaint_id)
+    return request
+
+
+# -------------------------------------------------------
+# 📊 Dashboard queries
+# -------------------------------------------------------
+def cluster_members(conn, root, limit=MAX_CLUSTER_MEMBERS):
+    """Complaint ids in root's cluster, walking the parent_id index down from the root."""
+    members, frontier = [root], [root]
+    while frontier and len(members) < limit:
+        frontier = conn.execute(
+            select(ComplaintCluster.complaint_id)
+            .where(ComplaintCluster.parent_id.in_(frontier), ComplaintCluster.complaint_id != ComplaintCluster.parent_id)
+            .limit(limit - len(members))
+        ).scalars().all()
+        members += frontier
+    return members
+
+
+def _cluster_summary(conn, root, members, indicators=5):
+    entity = ComplaintEntity.__table__
+    n = func.count().label("complaints")
+    top = conn.execute(
+        select(entity.c.kind, entity.c.value, n).where(entity.c.complaint_id.in_(members))
+        .group_by(entity.c.kind, entity.c.value).order_by(n.desc()).limit(indicators)
+    ).all()
+    size = conn.execute(select(ComplaintCluster.size).where(ComplaintCluster.complaint_id == root)).scalar()
+    unfreeze = conn.execute(
+        select(func.count()).select_from(UnfreezeRequest).where(UnfreezeRequest.complaint_id.in_(members))
+    ).scalar()
+    first = conn.execute(select(Complaint.ticket_number).where(Complaint.id == root)).scalar()
+    return {
+        "root_ticket": first,
+        "size": size or 1,
+        "unfreeze_requests": unfreeze,
+        "top_indicators": [{"kind": k, "value": v, "complaints": c} for k, v, c in top],
+    }
+
+
+def cluster_for_ticket(ticket, limit=200):
+    with engine.connect() as conn:
+        complaint_id = conn.execute(select(Complaint.id).where(Complaint.ticket_number == ticket)).scalar()
+        if complaint_id is None:
+            return None
+        root = find(conn, complaint_id, compress=False)
+        members = cluster_members(conn, root)
+        summary = _cluster_summary(conn, root, members)
+        tickets = conn.execute(
+            select(Complaint.ticket_number).where(Complaint.id.in_(members))
+            .order_by(Complaint.id.desc()).limit(limit)
+        ).scalars().all()
+    return {"ticket": ticket, **summary, "tickets": tickets}
+
+
+def top_clusters(limit=20, min_size=2):
+    """Largest clusters with their most shared indicators."""
+    with engine.connect() as conn:
+        roots = conn.execute(
+            select(ComplaintCluster.complaint_id).where(ComplaintCluster.size >= min_size)
+            .order_by(ComplaintCluster.size.desc()).limit(limit)
+        ).scalars().all()
+        return [_cluster_summary(conn, root, cluster_members(conn, root, 500), 3) for root in roots]
+
+
+def top_indicators(kind=None, limit=20):
+    """Indicators reported most often, with the size of the cluster they belong to."""
+    table = FraudIndicator.__table__
+    q = select(table.c.kind, table.c.value, table.c.complaints, table.c.unfreeze_requests,
+               table.c.first_complaint_id, table.c.last_seen)
+    if kind:
+        q = q.where(table.c.kind == kind)
+    items = []
+    with engine.connect() as conn:
+        for row in conn.execute(q.order_by((table.c.complaints + table.c.unfreeze_requests).desc()).limit(limit)):
+            size = None
+            if row.first_complaint_id is not None:
+                root = find(conn, row.first_complaint_id, compress=False)
+                size = conn.execute(select(ComplaintCluster.size).where(ComplaintCluster.complaint_id == root)).scalar()
+            items.append({
+                "kind": row.kind,
+                "value": row.value or "(unfreeze request only)",
+                "complaints": row.complaints,
+                "unfreeze_requests": row.unfreeze_requests,
+                "cluster_size": size,
+                "last_seen": row.last_seen.isoformat() if row.last_seen else None,
+            })
+    return items
+
+
+def cluster_size_histogram():
+    """{size: number of clusters} for linked clusters (size >= 2)."""
+    with engine.connect() as conn:
+        rows = conn.execute(
+            select(ComplaintCluster.size, func.count()).where(ComplaintCluster.size >= 2)
+            .group_by(ComplaintCluster.size).order_by(ComplaintCluster.size)
+        ).all()
+    return {size: n for size, n in rows}
+
+
+def list_unfreeze_requests(before_id=None, limit=50):
+    table = UnfreezeRequest.__table__
+    q = select(table.c.id, type_coerce(table.c.account, Text).label("account"), table.c.bank,
+               table.c.reference_ticket, table.c.complaint_id, table.c.status, table.c.date_created)
+    if before_id:
+        q = q.where(table.c.id < before_id)
+    with engine.connect() as conn:
+        rows = conn.execute(q.order_by(table.c.id.desc()).limit(limit)).all()
+    plain = decrypt_many((row.account for row in rows), remember=False)
+    return {
+        "items": [{**row._asdict(), "account": plain[row.account],
+                   "date_created": row.date_created.isoformat() if row.date_created else None} for row in rows],
+        "next_before_id": rows[-1].id if len(rows) == limit else None,
+    }
+
+
+# -------------------------------------------------------
+# 🛠️ Backfill: parallel extraction, vectorized connected components
+# -------------------------------------------------------
+def _extract_chunk(rows):
+    """[(complaint_id, kind, value, key)] for one chunk of (id, description); runs in a worker process."""
+    return [(cid, kind, value, indicator_key(kind, value))
+            for cid, description in rows for kind, value in sorted(extract_entities(description))]
+
+
+def _description_chunks():
+    with engine.connect() as conn:
+        result = conn.execution_options(stream_results=True, yield_per=LINK_BACKFILL_CHUNK).execute(
+            select(Complaint.id, Complaint.description).order_by(Complaint.id))
+        for chunk in result.partitions():
+            yield [tuple(row) for row in chunk]
+
+
+def components(n, left, right):
+    """Component label (smallest member index) for n nodes joined by edges left[i]-right[i]."""
+    import numpy as np
+    try:
+        from scipy.sparse import coo_matrix
+        from scipy.sparse.csgraph import connected_components
+    except ImportError:
+        connected_components = None
+    if connected_components is not None and len(left):
+        graph = coo_matrix((np.ones(len(left), dtype=np.int8), (left, right)), shape=(n, n))
+        _, labels = connected_components(graph, directed=False)
+        # Relabel each component by its smallest node index
+        first = np.full(labels.max() + 1, n, dtype=np.int64)
+        np.minimum.at(first, labels, np.arange(n))
+        return first[labels]
+    labels = np.arange(n)
+    while len(left):
+        low = np.minimum(labels[left], labels[right])
+        updated = labels.copy()
+        np.minimum.at(updated, left, low)
+        np.minimum.at(updated, right, low)
+        updated = updated[updated]  # pointer jumping
+        if np.array_equal(updated, labels):
+            break
+        labels = updated
+    return labels
+
+
+def rebuild(workers=LINK_BACKFILL_WORKERS):
+    """
+    Recompute complaint_clusters and fraud_indicators from every complaint
+    description and unfreeze request. Indicator extraction runs on `workers`
+    processes; clustering is one connected-components pass over numpy arrays.
+    Returns (complaints, indicators, linked clusters).
+    """
+    import numpy as np
+
+    sightings, ids = [], []
+
+    def chunks():
+        for chunk in _description_chunks():
+            ids.extend(cid for cid, _ in chunk)
+            yield chunk
+
+    if workers > 1:
+        # imap keeps chunk order and streams: only a few chunks are in flight at once
+        with Pool(workers) as pool:
+            for found in pool.imap(_extract_chunk, chunks()):
+                sightings += found
+    else:
+        for chunk in chunks():
+            sightings += _extract_chunk(chunk)
+
+    complaint_ids = np.asarray(ids, dtype=np.int64)  # ascending: read in id order
+    n = len(complaint_ids)
+    if sightings:
+        cids, kinds, values, keys = zip(*sightings)
+        node = np.searchsorted(complaint_ids, np.asarray(cids, dtype=np.int64))
+        unique_keys, key_index, code = np.unique(np.asarray(keys), return_index=True, return_inverse=True)
+        # Each indicator's first complaint (smallest id) anchors the edges
+        first = np.full(len(unique_keys), n, dtype=np.int64)
+        np.minimum.at(first, code, node)
+        labels = components(n, node, first[code])
+        counts = np.bincount(code, minlength=len(unique_keys))
+    else:
+        kinds = values = ()
+        unique_keys = key_index = first = counts = np.zeros(0, dtype=np.int64)
+        labels = np.arange(n)
+    sizes = np.bincount(labels, minlength=n)
+
+    now = datetime.utcnow()
+    with engine.begin() as conn:
+        conn.execute(delete(ComplaintCluster.__table__))
+        conn.execute(delete(FraudIndicator.__table__))
+        roots = complaint_ids[labels]
+        for start in range(0, n, LINK_BACKFILL_CHUNK):
+            conn.execute(insert(ComplaintCluster.__table__), [
+                {"complaint_id": int(complaint_ids[i]), "parent_id": int(roots[i]),
+                 "size": int(sizes[i]) if labels[i] == i else 0}
+                for i in range(start, min(n, start + LINK_BACKFILL_CHUNK))
+            ])
+        rows = [{"key": str(key), "kind": kinds[at], "value": values[at], "first_complaint_id": int(complaint_ids[f]),
+                 "complaints": int(c), "unfreeze_requests": 0, "first_seen": now, "last_seen": now}
+                for key, at, f, c in zip(unique_keys, key_index, first, counts)]
+        for start in range(0, len(rows), LINK_BACKFILL_CHUNK):
+            conn.execute(insert(FraudIndicator.__table__), rows[start:start + LINK_BACKFILL_CHUNK])
+
+    # Unfreeze requests are few: relink them one by one on top of the new forest
+    table = UnfreezeRequest.__table__
+    with engine.begin() as conn:
+        requests = conn.execute(
+            select(table.c.id, type_coerce(table.c.account, Text).label("account"), table.c.complaint_id)
+            .order_by(table.c.id)
+        ).all()
+        plain = decrypt_many((r.account for r in requests), remember=False)
+        for r in requests:
+            link_unfreeze(conn, r.id, plain[r.account], r.complaint_id)
+    return n, len(unique_keys), int((sizes >= 2).sum())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rebuild complaint clusters from shared fraud indicators")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="extraction processes")
+    args = parser.parse_args()
+    started = time.perf_counter()
+    complaints, indicators, clusters = rebuild(args.workers)
+    print(f"✅ {complaints} complaints, {indicators} indicators, {clusters} linked clusters "
+          f"in {time.perf_counter() - started:.1f}s")
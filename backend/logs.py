@@ -0,0 +1,131 @@
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import re
+import sys
+import time
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = os.getenv("LOG_FORMAT", "text")  # "text" (console) or "json" (one object per line)
+LOG_REDACT = os.getenv("LOG_REDACT", "1") == "1"
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+
+ROOT = "cybersathi"
+
+
+# -------------------------------------------------------
+# 🙈 PII redaction (applied on the listener thread, never on the request path)
+# -------------------------------------------------------
+_PHONE = re.compile(r"(?<![\w.])\+?\d[\d ]{8,14}(\d{2})\b")
+_EMAIL = re.compile(r"\b([A-Za-z0-9])[A-Za-z0-9._%+-]*@([A-Za-z0-9.-]+\.[A-Za-z]{2,})\b")
+_UPI = re.compile(r"\b([A-Za-z0-9])[A-Za-z0-9._-]*@([A-Za-z]{2,})\b")
+_BEARER = re.compile(r"(Bearer\s+)\S+", re.IGNORECASE)
+
+
+def redact(value):
+    """Mask phone numbers (keep the last two digits), emails, UPI IDs and bearer tokens."""
+    if not isinstance(value, str):
+        return value
+    value = _BEARER.sub(r"\1***", value)
+    value = _EMAIL.sub(r"\1***@\2", value)
+    value = _UPI.sub(r"\1***@\2", value)
+    return _PHONE.sub(r"***\1", value)
+
+
+# -------------------------------------------------------
+# 🧾 Formatting
+# -------------------------------------------------------
+class _Formatter(logging.Formatter):
+    def __init__(self, json_lines):
+        super().__init__()
+        self.json_lines = json_lines
+
+    def format(self, record):
+        fields = getattr(record, "fields", {})
+        message = record.getMessage()
+        exc = record.exc_text or (self.formatException(record.exc_info) if record.exc_info else None)
+        if LOG_REDACT:
+            message = redact(message)
+            fields = {k: redact(v) for k, v in fields.items()}
+            exc = redact(exc)
+        if self.json_lines:
+            entry = {
+                "ts": time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(record.created)) + f".{int(record.msecs):03d}Z",
+                "level": record.levelname.lower(),
+                "logger": record.name,
+                "event": message,
+                **fields,
+            }
+            if exc:
+                entry["exc"] = exc
+            return json.dumps(entry, ensure_ascii=False, default=str)
+        text = " ".join([message] + [f"{k}={v}" for k, v in fields.items()])
+        return f"{text}\n{exc}" if exc else text
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    """Hands the record to the listener as is: formatting and redaction happen there."""
+
+    def prepare(self, record):
+        if record.exc_info and not record.exc_text:
+            # Render the traceback while its frames are still current
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            pass  # never block the webhook on logging; drop instead
+
+
+_listener = None
+
+
+def setup_logging():
+    """Route every `cybersathi.*` logger through a bounded queue to one writer thread."""
+    global _listener
+    if _listener is not None:
+        return
+    stream = logging.StreamHandler(sys.stderr)
+    stream.setFormatter(_Formatter(LOG_FORMAT == "json"))
+    log_queue = queue.Queue(LOG_QUEUE_SIZE)
+    root = logging.getLogger(ROOT)
+    root.setLevel(LOG_LEVEL)
+    root.addHandler(_QueueHandler(log_queue))
+    root.propagate = False
+    _listener = logging.handlers.QueueListener(log_queue, stream)
+    _listener.start()
+    atexit.register(_listener.stop)
+
+
+class StructuredLogger:
+    """`log.info("event", key=value, ...)`: the event is a short message, fields are structured."""
+
+    def __init__(self, name):
+        self._logger = logging.getLogger(f"{ROOT}.{name}")
+
+    def _log(self, level, event, exc_info, fields):
+        if self._logger.isEnabledFor(level):
+            self._logger.log(level, event, exc_info=exc_info, extra={"fields": fields}, stacklevel=3)
+
+    def debug(self, event, **fields):
+        self._log(logging.DEBUG, event, None, fields)
+
+    def info(self, event, **fields):
+        self._log(logging.INFO, event, None, fields)
+
+    def warning(self, event, **fields):
+        self._log(logging.WARNING, event, None, fields)
+
+    def error(self, event, exc_info=None, **fields):
+        self._log(logging.ERROR, event, exc_info, fields)
+
+
+def get_logger(name):
+    setup_logging()
+    return StructuredLogger(name)
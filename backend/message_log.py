@@ -0,0 +1,163 @@
+import argparse
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete, func, insert, select
+
+from backend.init_db import dialect_insert, engine
+from backend.logs import get_logger
+from backend.models import MessageDailyCount, MessageLog
+from backend.rollups import bump_emotions, count_emotions
+
+MESSAGE_LOG_BATCH = int(os.getenv("MESSAGE_LOG_BATCH", "200"))
+MESSAGE_LOG_FLUSH_SECONDS = float(os.getenv("MESSAGE_LOG_FLUSH_SECONDS", "1.0"))
+MESSAGE_LOG_MAX_BUFFER = int(os.getenv("MESSAGE_LOG_MAX_BUFFER", "50000"))
+MESSAGE_RETENTION_DAYS = int(os.getenv("MESSAGE_RETENTION_DAYS", "180"))
+
+log = get_logger("message_log")
+
+
+# -------------------------------------------------------
+# 📝 Buffered, append-only message writer
+# -------------------------------------------------------
+class MessageLogWriter:
+    """
+    log() only appends to an in-memory buffer; a background thread writes
+    the buffer as multi-row INSERTs once it holds `batch_size` rows or every
+    `flush_interval` seconds, so logging never adds a commit to the webhook path.
+    If the database stalls, the buffer is capped and the oldest rows are dropped.
+    """
+
+    def __init__(self, batch_size=MESSAGE_LOG_BATCH, flush_interval=MESSAGE_LOG_FLUSH_SECONDS,
+                 max_buffer=MESSAGE_LOG_MAX_BUFFER):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._buffer = deque(maxlen=max_buffer)
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopping = False
+        self._thread = None
+        self.written = 0
+        self.dropped = 0
+        self.flushes = 0
+
+    def start(self):
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stopping = False
+            self._thread = threading.Thread(target=self._run, name="message-log-writer", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stopping = True
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=10)
+            self._thread = None
+        self.flush()
+
+    def log(self, sender, message, direction="in", emotion=None):
+        if self._thread is None:
+            self.start()
+        row = {
+            "sender": sender,
+            "message": message,
+            "emotion": emotion,
+            "direction": direction,
+            "timestamp": datetime.utcnow(),
+        }
+        with self._lock:
+            if len(self._buffer) == self._buffer.maxlen:
+                self.dropped += 1
+            self._buffer.append(row)
+            pending = len(self._buffer)
+        if pending >= self.batch_size:
+            self._wake.set()
+
+    def _drain(self):
+        with self._lock:
+            rows = list(self._buffer)
+            self._buffer.clear()
+        return rows
+
+    def flush(self):
+        rows = self._drain()
+        for start in range(0, len(rows), self.batch_size):
+            chunk = rows[start:start + self.batch_size]
+            try:
+                with engine.begin() as conn:
+                    conn.execute(insert(MessageLog.__table__).values(chunk))
+                    bump_emotions(conn, count_emotions(chunk))
+                self.written += len(chunk)
+            except Exception as e:
+                self.dropped += len(chunk)
+                log.error("❌ Message log flush failed", rows=len(chunk), error=str(e))
+        if rows:
+            self.flushes += 1
+        return len(rows)
+
+    def _run(self):
+        while not self._stopping:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self.flush()
+
+    def stats(self):
+        return {
+            "buffered": len(self._buffer),
+            "written": self.written,
+            "dropped": self.dropped,
+            "flushes": self.flushes,
+        }
+
+
+message_log = MessageLogWriter()
+
+
+# -------------------------------------------------------
+# 🧹 Retention: roll old rows into daily counts, then delete them
+# -------------------------------------------------------
+def rollup_and_prune(keep_days=MESSAGE_RETENTION_DAYS, batch_size=5000):
+    """Fold messages older than `keep_days` into message_daily_counts and delete them."""
+    cutoff = datetime.utcnow() - timedelta(days=keep_days)
+    table = MessageLog.__table__
+    day = func.date(table.c.timestamp)
+    pruned = 0
+    while True:
+        with engine.begin() as conn:
+            ids = conn.execute(
+                select(table.c.id).where(table.c.timestamp < cutoff).order_by(table.c.id).limit(batch_size)
+            ).scalars().all()
+            if not ids:
+                break
+            counts = conn.execute(
+                select(day.label("day"), table.c.direction, func.count().label("n"))
+                .where(table.c.id.in_(ids))
+                .group_by(day, table.c.direction)
+            ).all()
+            for row in counts:
+                stmt = dialect_insert(MessageDailyCount.__table__).values(
+                    day=datetime.strptime(str(row.day), "%Y-%m-%d").date(),
+                    direction=row.direction or "in",
+                    count=row.n,
+                )
+                conn.execute(stmt.on_conflict_do_update(
+                    index_elements=["day", "direction"],
+                    set_={"count": MessageDailyCount.__table__.c.count + stmt.excluded.count},
+                ))
+            conn.execute(delete(table).where(table.c.id.in_(ids)))
+        pruned += len(ids)
+    return pruned
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Message log retention job")
+    parser.add_argument("--keep-days", type=int, default=MESSAGE_RETENTION_DAYS)
+    args = parser.parse_args()
+    started = time.perf_counter()
+    n = rollup_and_prune(args.keep_days)
+    print(f"✅ Rolled up and pruned {n} messages older than {args.keep_days} days in {time.perf_counter() - started:.1f}s")
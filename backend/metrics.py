@@ -0,0 +1,223 @@
+import threading
+import time
+from contextlib import contextmanager
+
+
+# Latency buckets in seconds (upper bounds), tuned for Graph API round trips
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# In-process work (DB statements, model batches, flow steps) is much faster
+FAST_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+BYTE_BUCKETS = (16 * 1024, 64 * 1024, 256 * 1024, 1024 ** 2, 4 * 1024 ** 2, 16 * 1024 ** 2, 64 * 1024 ** 2)
+
+
+class Histogram:
+    """
+    Fixed-bucket histogram keyed by a label (e.g. HTTP status code).
+    Cheap enough to call on every request; snapshot() is what endpoints expose.
+    """
+
+    kind = "histogram"
+
+    def __init__(self, name, buckets=DEFAULT_BUCKETS, help="", label=None):
+        self.name = name
+        self.help = help
+        self.label = label  # Prometheus label name for the series key
+        self.buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        self._series = {}
+
+    def observe(self, value, label=""):
+        with self._lock:
+            series = self._series.get(label)
+            if series is None:
+                series = self._series[label] = {
+                    "counts": [0] * (len(self.buckets) + 1),
+                    "count": 0,
+                    "sum": 0.0,
+                }
+            idx = len(self.buckets)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    idx = i
+                    break
+            series["counts"][idx] += 1
+            series["count"] += 1
+            series["sum"] += value
+
+    @contextmanager
+    def time(self, label=""):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, label)
+
+    def quantile(self, q, label=""):
+        """Bucket upper bound below which a fraction q of observations fall."""
+        with self._lock:
+            series = self._series.get(label)
+            if not series or not series["count"]:
+                return None
+            target = q * series["count"]
+            seen = 0
+            for bound, count in zip(self.buckets + (float("inf"),), series["counts"]):
+                seen += count
+                if seen >= target:
+                    return bound
+        return None
+
+    def snapshot(self):
+        with self._lock:
+            out = {}
+            for label, series in self._series.items():
+                cumulative = []
+                running = 0
+                for count in series["counts"]:
+                    running += count
+                    cumulative.append(running)
+                out[label or "all"] = {
+                    "count": series["count"],
+                    "sum": round(series["sum"], 6),
+                    "buckets": dict(zip([str(b) for b in self.buckets] + ["+Inf"], cumulative)),
+                }
+            return out
+
+    def exposition(self):
+        lines = []
+        with self._lock:
+            items = [(label, list(s["counts"]), s["count"], s["sum"]) for label, s in self._series.items()]
+        for label, counts, count, total in sorted(items):
+            running = 0
+            for bound, n in zip([_number(b) for b in self.buckets] + ["+Inf"], counts):
+                running += n
+                lines.append(f"{self.name}_bucket{_labels(self.label, label, le=bound)} {running}")
+            lines.append(f"{self.name}_sum{_labels(self.label, label)} {total}")
+            lines.append(f"{self.name}_count{_labels(self.label, label)} {count}")
+        return lines
+
+
+class Counter:
+    """Monotonic count per label."""
+
+    kind = "counter"
+
+    def __init__(self, name, help="", label=None):
+        self.name = name
+        self.help = help
+        self.label = label
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def inc(self, amount=1, label=""):
+        with self._lock:
+            self._values[label] = self._values.get(label, 0) + amount
+
+    def value(self, label=""):
+        return self._values.get(label, 0)
+
+    def exposition(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_labels(self.label, label)} {value}" for label, value in items]
+
+
+class Gauge:
+    """Current value, either set directly or read from a callback at scrape time."""
+
+    kind = "gauge"
+
+    def __init__(self, name, help="", fn=None):
+        self.name = name
+        self.help = help
+        self.fn = fn
+        self._value = 0
+
+    def set(self, value):
+        self._value = value
+
+    def value(self):
+        if self.fn is None:
+            return self._value
+        try:
+            return self.fn()
+        except Exception:
+            return None
+
+    def exposition(self):
+        value = self.value()
+        return [] if value is None else [f"{self.name} {value}"]
+
+
+def _number(bound):
+    return repr(float(bound)) if isinstance(bound, float) else str(bound)
+
+
+def _labels(name, value, **extra):
+    pairs = ([(name, value)] if name and value != "" else []) + list(extra.items())
+    if not pairs:
+        return ""
+    escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in pairs)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+
+# -------------------------------------------------------
+# 📈 Process-wide registry, rendered for Prometheus on /metrics
+# -------------------------------------------------------
+class Registry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics = {}
+
+    def _get_or_create(self, cls, name, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, **kwargs)
+            return metric
+
+    def histogram(self, name, help="", label=None, buckets=DEFAULT_BUCKETS):
+        return self._get_or_create(Histogram, name, help=help, label=label, buckets=buckets)
+
+    def counter(self, name, help="", label=None):
+        return self._get_or_create(Counter, name, help=help, label=label)
+
+    def gauge(self, name, help="", fn=None):
+        gauge = self._get_or_create(Gauge, name, help=help)
+        if fn is not None:
+            gauge.fn = fn
+        return gauge
+
+    def render(self):
+        """Prometheus text exposition format (version 0.0.4)."""
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda m: m.name)
+        lines = []
+        for metric in metrics:
+            if metric.help:
+                lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.exposition())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+# Hot-path series (per worker process; Prometheus sums across scrape targets)
+WEBHOOK_SECONDS = registry.histogram(
+    "cybersathi_webhook_seconds", "Time to answer POST /webhook, by outcome", label="outcome", buckets=FAST_BUCKETS)
+STAGE_SECONDS = registry.histogram(
+    "cybersathi_flow_stage_seconds", "Conversation step processing time, by stage", label="stage",
+    buckets=FAST_BUCKETS)
+DB_QUERY_SECONDS = registry.histogram(
+    "cybersathi_db_query_seconds", "Database statement time, by statement type", label="statement",
+    buckets=FAST_BUCKETS)
+DB_COMMIT_SECONDS = registry.histogram(
+    "cybersathi_db_commit_seconds", "ORM session flush + commit time", buckets=FAST_BUCKETS)
+EMOTION_SECONDS = registry.histogram(
+    "cybersathi_emotion_batch_seconds", "Emotion model predict() time per micro-batch", buckets=FAST_BUCKETS)
+MEDIA_SECONDS = registry.histogram(
+    "cybersathi_media_download_seconds", "Evidence download time, by outcome", label="outcome")
+MEDIA_BYTES = registry.histogram(
+    "cybersathi_media_download_bytes", "Evidence file size", buckets=BYTE_BUCKETS)
+GRAPH_SEND_SECONDS = registry.histogram(
+    "cybersathi_graph_send_seconds", "Outbound Graph API send latency, by HTTP status", label="status")
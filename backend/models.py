@@ -1,17 +1,31 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime
+from sqlalchemy import Column, Integer, Float, String, Text, DateTime, Date, Index
+from sqlalchemy.orm import validates
 from datetime import datetime
 from backend.init_db import Base
+from backend.crypto import EncryptedString, blind_index
+from backend.utils_main import normalize_phone
+
+ENCRYPTED_FIELDS = ("name", "father_name", "dob", "phone", "email", "wa_id")
+
+
+def phone_blind_index(phone):
+    """Keyed hash of the last 10 digits: equal numbers match, the number itself is not stored."""
+    return blind_index(normalize_phone(phone))
+
 
 class Complaint(Base):
     __tablename__ = "complaints"
 
     id = Column(Integer, primary_key=True, index=True)
     ticket_number = Column(String(50), unique=True, nullable=False)
-    name = Column(String(100), nullable=False)
-    father_name = Column(String(100))
-    dob = Column(String(20))
-    phone = Column(String(20))
-    email = Column(String(100))
+    # ✅ Personal details are stored encrypted (see backend/crypto.py)
+    name = Column(EncryptedString, nullable=False)
+    father_name = Column(EncryptedString)
+    dob = Column(EncryptedString)
+    phone = Column(EncryptedString)
+    phone_key = Column(String(64))  # blind index of the normalized phone, for status lookups
+    email = Column(EncryptedString)
+    wa_id = Column(EncryptedString)  # WhatsApp number the complaint was filed from, for status notifications
     village = Column(String(100))
     post_office = Column(String(100))
     police_station = Column(String(100))
@@ -30,3 +44,203 @@ class Complaint(Base):
 
     # ✅ Auto timestamp
     date_created = Column(DateTime, default=datetime.utcnow)
+    status_changed_at = Column(DateTime, default=datetime.utcnow)  # when it entered its current status
+
+    # ✅ Dashboard listing is keyset-paginated on (date_created, id), optionally filtered
+    __table_args__ = (
+        Index("ix_complaints_created_id", "date_created", "id"),
+        Index("ix_complaints_status_created", "status", "date_created", "id"),
+        Index("ix_complaints_district_created", "district", "date_created", "id"),
+        Index("ix_complaints_fraud_created", "fraud_type", "date_created", "id"),
+        Index("ix_complaints_phone_key_created", "phone_key", "date_created"),
+        Index("ix_complaints_status_changed", "status", "status_changed_at"),
+    )
+
+    @validates("phone")
+    def _set_phone_key(self, key, value):
+        self.phone_key = phone_blind_index(value)
+        return value
+
+
+class MessageLog(Base):
+    """Append-only log of every inbound and outbound WhatsApp message."""
+    __tablename__ = "messages"
+
+    id = Column(Integer, primary_key=True)
+    sender = Column(Text)  # the citizen's WhatsApp number, for both directions
+    message = Column(Text)
+    emotion = Column(Text)
+    timestamp = Column(DateTime, default=datetime.utcnow)
+    direction = Column(String(3), default="in")  # "in" or "out"
+    label = Column(String(32))  # human-assigned emotion, training data for the online model
+    labeled_at = Column(DateTime)
+    trained_at = Column(DateTime)  # when the trainer consumed the label
+
+    __table_args__ = (
+        Index("ix_messages_sender_timestamp", "sender", "timestamp"),
+        Index("ix_messages_timestamp", "timestamp"),
+        Index("ix_messages_label_trained", "label", "trained_at"),
+    )
+
+
+class MessageDailyCount(Base):
+    """Per-day message volume kept after old rows are pruned by the retention job."""
+    __tablename__ = "message_daily_counts"
+
+    day = Column(Date, primary_key=True)
+    direction = Column(String(3), primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+
+
+class ComplaintDailyCount(Base):
+    """Complaints filed per day/district/fraud type, by current status (see backend/rollups.py)."""
+    __tablename__ = "complaint_daily_counts"
+
+    day = Column(Date, primary_key=True)
+    district = Column(String(100), primary_key=True)
+    fraud_type = Column(String(100), primary_key=True)
+    status = Column(String(50), primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+
+
+class EmotionDailyCount(Base):
+    """Inbound messages per day by detected emotion; survives message retention."""
+    __tablename__ = "emotion_daily_counts"
+
+    day = Column(Date, primary_key=True)
+    emotion = Column(String(32), primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+
+
+class StatusTransitionStat(Base):
+    """Per-day status transitions and how long tickets sat in the old status."""
+    __tablename__ = "status_transition_stats"
+
+    day = Column(Date, primary_key=True)
+    from_status = Column(String(50), primary_key=True)
+    to_status = Column(String(50), primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+    total_seconds = Column(Float, nullable=False, default=0.0)
+    max_seconds = Column(Float, nullable=False, default=0.0)
+
+
+class NotificationJob(Base):
+    """One WhatsApp status notification waiting for (or done by) the fan-out worker (backend/notifications.py)."""
+    __tablename__ = "notification_jobs"
+
+    id = Column(Integer, primary_key=True)
+    batch_id = Column(String(32), nullable=False)
+    ticket_number = Column(String(50), nullable=False)
+    status = Column(String(50), nullable=False)  # the status the citizen is told about
+    state = Column(String(10), nullable=False, default="pending")  # pending, sending, sent, failed
+    attempts = Column(Integer, nullable=False, default=0)
+    next_attempt_at = Column(DateTime, default=datetime.utcnow)
+    last_error = Column(String(255))
+    created_at = Column(DateTime, default=datetime.utcnow)
+    sent_at = Column(DateTime)
+
+    __table_args__ = (
+        Index("ix_notification_jobs_state_due", "state", "next_attempt_at"),
+        Index("ix_notification_jobs_batch_state", "batch_id", "state"),
+    )
+
+
+class ComplaintEntity(Base):
+    """UPI IDs, phones, URLs, emails and account numbers named in a complaint description (backend/search.py)."""
+    __tablename__ = "complaint_entities"
+
+    id = Column(Integer, primary_key=True)
+    complaint_id = Column(Integer, nullable=False, index=True)
+    kind = Column(String(10), nullable=False)
+    value = Column(String(255), nullable=False)
+
+    __table_args__ = (
+        Index("ix_complaint_entities_kind_value", "kind", "value", "complaint_id"),
+    )
+
+
+class UnfreezeRequest(Base):
+    """Account unfreeze request submitted over WhatsApp (menu option C)."""
+    __tablename__ = "unfreeze_requests"
+
+    id = Column(Integer, primary_key=True)
+    wa_id = Column(EncryptedString)
+    account = Column(EncryptedString, nullable=False)  # account number or UPI ID as typed
+    account_key = Column(String(64), index=True)  # blind index of the normalized indicator
+    bank = Column(String(100))
+    reference_ticket = Column(String(50))
+    complaint_id = Column(Integer, index=True)  # the referenced complaint, when it exists
+    status = Column(String(50), default="Received")
+    date_created = Column(DateTime, default=datetime.utcnow)
+
+
+class FraudIndicator(Base):
+    """
+    A UPI ID, phone, URL, email or account number seen in complaints or
+    unfreeze requests, keyed by blind index (see backend/linking.py). `value`
+    is kept only when a complaint description already names it in plain text.
+    """
+    __tablename__ = "fraud_indicators"
+
+    id = Column(Integer, primary_key=True)
+    key = Column(String(64), unique=True, nullable=False)
+    kind = Column(String(10), nullable=False)
+    value = Column(String(255))
+    first_complaint_id = Column(Integer)  # every later complaint naming it joins this one's cluster
+    complaints = Column(Integer, nullable=False, default=0)
+    unfreeze_requests = Column(Integer, nullable=False, default=0)
+    first_seen = Column(DateTime, default=datetime.utcnow)
+    last_seen = Column(DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        Index("ix_fraud_indicators_kind_complaints", "kind", "complaints"),
+    )
+
+
+class ComplaintCluster(Base):
+    """Union-find forest over complaints linked by shared indicators; size is set on roots, 0 elsewhere."""
+    __tablename__ = "complaint_clusters"
+
+    complaint_id = Column(Integer, primary_key=True)
+    parent_id = Column(Integer, nullable=False, index=True)
+    size = Column(Integer, nullable=False, default=1)
+
+    __table_args__ = (
+        Index("ix_complaint_clusters_size", "size"),
+    )
+
+
+class ComplaintEvidence(Base):
+    """Files added to an existing complaint after registration (evidence append flow)."""
+    __tablename__ = "complaint_evidence"
+
+    id = Column(Integer, primary_key=True)
+    ticket_number = Column(String(50), nullable=False, index=True)
+    path = Column(String(255), nullable=False)
+    date_added = Column(DateTime, default=datetime.utcnow)
+
+
+class ProcessedMessage(Base):
+    """WhatsApp message IDs already handled; the primary key makes redeliveries a no-op."""
+    __tablename__ = "processed_messages"
+
+    message_id = Column(String(128), primary_key=True)
+    sender = Column(String(32))
+    received_at = Column(DateTime, default=datetime.utcnow, index=True)
+
+
+class TicketWorker(Base):
+    """Ticket worker IDs leased by running processes (see backend/utils/tickets.py), so no two share one."""
+    __tablename__ = "ticket_workers"
+
+    worker_id = Column(Integer, primary_key=True, autoincrement=False)
+    holder = Column(String(100), nullable=False)  # host:pid:nonce of the leasing process
+    expires_at = Column(DateTime, nullable=False)
+
+
+class SchemaMigration(Base):
+    """One-off data migrations already applied, so startup doesn't re-scan tables to find out."""
+    __tablename__ = "schema_migrations"
+
+    name = Column(String(64), primary_key=True)
+    applied_at = Column(DateTime, default=datetime.utcnow)
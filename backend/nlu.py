@@ -1,28 +1,10 @@
-# Simple rule-based NLU for intent and fraud type detection
+# Rule-based NLU for intent and fraud type detection.
+# Keywords live in backend/data/keywords.json and are matched in one pass by the shared engine.
+from backend.utils.keywords import get_engine
+
+
 def detect_intent(text: str) -> str:
-    t = (text or "").lower()
-    if any(k in t for k in ["status", "ack", "acknowledgement", "reference", "track"]):
-        return "status_check"
-    if any(k in t for k in ["unfreeze", "frozen", "freeze", "unlock"]):
-        return "account_unfreeze"
-    if any(k in t for k in ["fraud", "scam", "hacked", "transaction", "upi", "loan", "card", "apk", "fake"]):
-        return "new_complaint"
-    return "other"
+    return get_engine().classify(text, "intent")
 
 def detect_fraud_category(text: str) -> str:
-    t = (text or "").lower()
-    if any(k in t for k in ["upi", "imps", "neft", "rtgs", "inb"]):
-        return "upi_fraud"
-    if any(k in t for k in ["loan app", "loanapp", "instant loan"]):
-        return "loan_app"
-    if any(k in t for k in ["apk", "downloaded app", "install from link"]):
-        return "apk_fraud"
-    if any(k in t for k in ["debit card", "credit card", "card"]):
-        return "card_fraud"
-    if any(k in t for k in ["amazon", "flipkart", "ecommerce", "e-commerce"]):
-        return "ecommerce_fraud"
-    if any(k in t for k in ["investment", "trading", "ipo", "crypto"]):
-        return "investment_fraud"
-    if any(k in t for k in ["phish", "fake website", "website"]):
-        return "phishing"
-    return "other"
+    return get_engine().classify(text, "fraud_category")
@@ -0,0 +1,255 @@
+import os
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from sqlalchemy import Text, bindparam, func, insert, select, type_coerce, update
+
+from backend.crypto import decrypt_many
+from backend.init_db import engine
+from backend.logs import get_logger
+from backend.message_log import message_log
+from backend.models import Complaint, NotificationJob
+from backend.utils_main import normalize_phone
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process lock, run a single worker
+    fcntl = None
+
+NOTIFY_WORKER = os.getenv("NOTIFY_WORKER", "1") == "1"
+NOTIFY_RATE = float(os.getenv("NOTIFY_RATE", "10"))  # messages/second, leaving Graph headroom for live chats
+NOTIFY_BATCH = int(os.getenv("NOTIFY_BATCH", "50"))
+NOTIFY_MAX_ATTEMPTS = int(os.getenv("NOTIFY_MAX_ATTEMPTS", "5"))
+NOTIFY_POLL_SECONDS = float(os.getenv("NOTIFY_POLL_SECONDS", "5"))
+NOTIFY_LOCK_FILE = os.getenv("NOTIFY_LOCK_FILE", "notifications.lock")
+COUNTRY_CODE = "91"
+
+log = get_logger("notifications")
+
+
+def status_message(ticket, status):
+    return (
+        f"ℹ️ *Complaint update*\n\n"
+        f"🆔 Ticket No: *{ticket}*\n"
+        f"📌 Status: *{status}*\n\n"
+        "Reply B anytime to check your complaint status."
+    )
+
+
+def whatsapp_number(phone):
+    """WhatsApp ID (country code + number) for a phone typed during registration."""
+    digits = normalize_phone(phone)
+    return COUNTRY_CODE + digits if digits else None
+
+
+# -------------------------------------------------------
+# 📮 Jobs: written in the same transaction as the status change
+# -------------------------------------------------------
+def new_batch_id():
+    return uuid.uuid4().hex
+
+
+def enqueue(conn, tickets, status, batch_id=None):
+    """Queue one notification per ticket (executemany); returns the batch id."""
+    batch_id = batch_id or new_batch_id()
+    now = datetime.utcnow()
+    if tickets:
+        conn.execute(insert(NotificationJob.__table__), [
+            {"batch_id": batch_id, "ticket_number": t, "status": status, "state": "pending",
+             "attempts": 0, "next_attempt_at": now, "created_at": now}
+            for t in tickets
+        ])
+    return batch_id
+
+
+def batch_progress(batch_id):
+    table = NotificationJob.__table__
+    with engine.connect() as conn:
+        counts = dict(conn.execute(
+            select(table.c.state, func.count()).where(table.c.batch_id == batch_id).group_by(table.c.state)
+        ).all())
+    progress = {state: counts.get(state, 0) for state in ("pending", "sending", "sent", "failed")}
+    total = sum(counts.values())
+    return {"batch_id": batch_id, "total": total, **progress,
+            "done": total > 0 and progress["sent"] + progress["failed"] == total}
+
+
+def recipients(conn, tickets):
+    """{ticket: WhatsApp ID}: the number the complaint came from, else the phone it gave."""
+    table = Complaint.__table__
+    rows = conn.execute(
+        select(table.c.ticket_number, type_coerce(table.c.wa_id, Text), type_coerce(table.c.phone, Text))
+        .where(table.c.ticket_number.in_(tickets))
+    ).all()
+    plain = decrypt_many((token for row in rows for token in row[1:]), remember=False)
+    return {ticket: plain[wa_id] or whatsapp_number(plain[phone]) for ticket, wa_id, phone in rows}
+
+
+def retry_at(attempts, now):
+    return now + timedelta(seconds=min(3600, 30 * 2 ** attempts))
+
+
+# -------------------------------------------------------
+# 📣 Rate-limited fan-out worker
+# -------------------------------------------------------
+class NotificationWorker:
+    """
+    Background thread that sends pending notification jobs at no more than
+    `rate` messages per second, oldest first. Jobs live in the database, so
+    a restart picks up where the last process stopped; a lock file keeps it
+    to one sender across worker processes. Failures are retried with
+    backoff up to NOTIFY_MAX_ATTEMPTS; a 4xx other than 429 fails at once.
+    """
+
+    def __init__(self, rate=NOTIFY_RATE, batch_size=NOTIFY_BATCH, poll_interval=NOTIFY_POLL_SECONDS,
+                 send=None):
+        self.rate = rate
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.send = send
+        self._wake = threading.Event()
+        self._stopping = False
+        self._thread = None
+        self._lock_file = None
+        self._next_slot = 0.0
+        self.sent = 0
+        self.failed = 0
+        self.retried = 0
+
+    def _acquire_process_lock(self):
+        if fcntl is None:
+            return True
+        self._lock_file = open(NOTIFY_LOCK_FILE, "w")
+        try:
+            fcntl.flock(self._lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return True
+        except OSError:
+            self._lock_file.close()
+            self._lock_file = None
+            return False
+
+    def start(self):
+        if self._thread is not None or not self._acquire_process_lock():
+            return False
+        # Jobs claimed by a process that died mid-batch go back in the queue
+        table = NotificationJob.__table__
+        with engine.begin() as conn:
+            conn.execute(update(table).where(table.c.state == "sending").values(state="pending"))
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, name="notification-worker", daemon=True)
+        self._thread.start()
+        log.info("📣 Notification worker started", rate_per_sec=self.rate)
+        return True
+
+    def stop(self):
+        self._stopping = True
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=30)
+            self._thread = None
+        if self._lock_file is not None:
+            self._lock_file.close()
+            self._lock_file = None
+
+    def trigger(self):
+        self._wake.set()
+
+    def _run(self):
+        while not self._stopping:
+            try:
+                sent = self.run_once()
+            except Exception:
+                log.error("⚠️ Notification fan-out failed", exc_info=True)
+                sent = 0
+            if not sent:
+                self._wake.wait(self.poll_interval)
+                self._wake.clear()
+
+    def _claim(self):
+        table = NotificationJob.__table__
+        with engine.begin() as conn:
+            jobs = conn.execute(
+                select(table.c.id, table.c.ticket_number, table.c.status, table.c.attempts)
+                .where(table.c.state == "pending", table.c.next_attempt_at <= datetime.utcnow())
+                .order_by(table.c.id).limit(self.batch_size)
+            ).all()
+            if jobs:
+                conn.execute(update(table).where(table.c.id.in_([j.id for j in jobs]))
+                             .values(state="sending", attempts=table.c.attempts + 1))
+                to = recipients(conn, list({j.ticket_number for j in jobs}))
+            else:
+                to = {}
+        return jobs, to
+
+    def _pace(self):
+        now = time.monotonic()
+        if self._next_slot > now:
+            time.sleep(self._next_slot - now)
+        self._next_slot = max(now, self._next_slot) + 1 / self.rate
+
+    def run_once(self):
+        """Send one batch of due jobs; returns how many were attempted."""
+        from backend.whatsapp.meta_handler import send_whatsapp_message
+        send = self.send or send_whatsapp_message
+
+        jobs, to = self._claim()
+        results = []
+        for job in jobs:
+            now = datetime.utcnow()
+            result = {"job_id": job.id, "new_state": "sent", "error": None, "sent": None, "retry": None}
+            number = to.get(job.ticket_number)
+            if self._stopping:
+                result.update(new_state="pending", retry=now)
+            elif not number:
+                result.update(new_state="failed", error="no WhatsApp number on the complaint")
+            else:
+                self._pace()
+                text = status_message(job.ticket_number, job.status)
+                response = send(number, text)
+                code = getattr(response, "status_code", None)
+                if code == 200:
+                    result["sent"] = now
+                    message_log.log(number, text, "out")
+                elif code is not None and 400 <= code < 500 and code != 429:
+                    result.update(new_state="failed", error=f"HTTP {code}")
+                elif job.attempts + 1 >= NOTIFY_MAX_ATTEMPTS:
+                    result.update(new_state="failed", error=f"HTTP {code}" if code else "unreachable")
+                else:
+                    result.update(new_state="pending", retry=retry_at(job.attempts, now),
+                                  error=f"HTTP {code}" if code else "unreachable")
+            if result["retry"] is None:
+                result["retry"] = now
+            results.append(result)
+
+        if results:
+            table = NotificationJob.__table__
+            with engine.begin() as conn:
+                conn.execute(
+                    update(table).where(table.c.id == bindparam("job_id")).values(
+                        state=bindparam("new_state"), last_error=bindparam("error"),
+                        sent_at=bindparam("sent"), next_attempt_at=bindparam("retry"),
+                    ),
+                    results,
+                )
+            for r in results:
+                if r["new_state"] == "sent":
+                    self.sent += 1
+                elif r["new_state"] == "failed":
+                    self.failed += 1
+                elif r["error"]:
+                    self.retried += 1
+        return len(results)
+
+    def stats(self):
+        table = NotificationJob.__table__
+        with engine.connect() as conn:
+            queued = conn.execute(
+                select(func.count()).select_from(table).where(table.c.state.in_(("pending", "sending")))
+            ).scalar()
+        return {"running": self._thread is not None, "rate_per_sec": self.rate, "queued": queued,
+                "sent": self.sent, "failed": self.failed, "retried": self.retried}
+
+
+notification_worker = NotificationWorker()
@@ -0,0 +1,123 @@
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+PROFILER_INTERVAL_MS = float(os.getenv("PROFILER_INTERVAL_MS", "10"))
+PROFILER_MAX_SECONDS = float(os.getenv("PROFILER_MAX_SECONDS", "300"))
+PROFILER_MAX_DEPTH = 64
+
+
+# -------------------------------------------------------
+# 🔬 Sampling profiler, switched on and off at runtime
+# -------------------------------------------------------
+class SamplingProfiler:
+    """
+    A daemon thread that wakes every `interval` and records the stack of
+    every other thread (sys._current_frames), so it sees the webhook
+    workers, the emotion batcher and the event loop without instrumenting
+    them. Nothing runs while it is stopped. Output is collapsed stacks
+    ("outer;inner;leaf count"), the input flamegraph.pl and speedscope take.
+    It stops itself after `max_seconds` so a forgotten session can't linger.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stop = threading.Event()
+        self.stacks = Counter()
+        self.samples = 0
+        self.started_at = None
+        self.stopped_at = None
+        self.interval = PROFILER_INTERVAL_MS / 1000
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, interval_ms=PROFILER_INTERVAL_MS, max_seconds=PROFILER_MAX_SECONDS):
+        with self._lock:
+            if self.running:
+                return False
+            self.stacks = Counter()
+            self.samples = 0
+            self.interval = max(interval_ms, 1.0) / 1000
+            self.started_at = time.time()
+            self.stopped_at = None
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, args=(min(max_seconds, PROFILER_MAX_SECONDS),),
+                                            name="sampling-profiler", daemon=True)
+            self._thread.start()
+            return True
+
+    def stop(self):
+        self._stop.set()
+        thread = self._thread
+        if thread is not None:
+            thread.join(timeout=5)
+        return self.report()
+
+    def toggle(self):
+        if self.running:
+            self.stop()
+        else:
+            self.start()
+
+    def _run(self, max_seconds):
+        me = threading.get_ident()
+        deadline = time.monotonic() + max_seconds
+        names = {}
+        while not self._stop.wait(self.interval) and time.monotonic() < deadline:
+            if len(names) != threading.active_count():
+                names = {t.ident: t.name for t in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == me:
+                    continue
+                self.stacks[_collapse(names.get(ident, str(ident)), frame)] += 1
+            self.samples += 1
+        self.stopped_at = time.time()
+
+    def collapsed(self):
+        return "\n".join(f"{stack} {count}" for stack, count in self.stacks.most_common()) + "\n"
+
+    def report(self, top=25):
+        """Sample counts, plus the functions most often on top of a stack (self time) and anywhere (total)."""
+        leaf, total = Counter(), Counter()
+        for stack, count in self.stacks.items():
+            frames = stack.split(";")
+            leaf[frames[-1]] += count
+            for frame in set(frames[1:]):
+                total[frame] += count
+        return {
+            "running": self.running,
+            "interval_ms": self.interval * 1000,
+            "samples": self.samples,
+            "started_at": self.started_at,
+            "stopped_at": self.stopped_at,
+            "top_self": leaf.most_common(top),
+            "top_total": total.most_common(top),
+        }
+
+
+def _collapse(thread_name, frame):
+    frames = []
+    while frame is not None and len(frames) < PROFILER_MAX_DEPTH:
+        code = frame.f_code
+        frames.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+        frame = frame.f_back
+    frames.append(thread_name)
+    return ";".join(reversed(frames))
+
+
+profiler = SamplingProfiler()
+
+
+def install_signal_toggle(signum=None):
+    """`kill -USR2 <pid>` starts/stops the profiler in that worker (POSIX only)."""
+    import signal
+    signum = signum or getattr(signal, "SIGUSR2", None)
+    if signum is None or threading.current_thread() is not threading.main_thread():
+        return False
+    signal.signal(signum, lambda *_: profiler.toggle())
+    return True
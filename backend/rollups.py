@@ -0,0 +1,277 @@
+import argparse
+import time
+from collections import Counter
+from datetime import date, datetime
+
+from sqlalchemy import case, delete, func, select, update
+
+from backend.init_db import dialect_insert, engine
+from backend.models import (
+    Complaint, ComplaintDailyCount, EmotionDailyCount, MessageLog, StatusTransitionStat,
+)
+
+UNKNOWN = "Unknown"  # rollup key for complaints without a district / fraud type
+
+
+# -------------------------------------------------------
+# 📊 Incremental counters (written in the caller's transaction)
+# -------------------------------------------------------
+def _day(value):
+    return (value or datetime.utcnow()).date()
+
+
+def _key(complaint, status):
+    return {
+        "day": _day(complaint.date_created),
+        "district": complaint.district or UNKNOWN,
+        "fraud_type": complaint.fraud_type or UNKNOWN,
+        "status": status or UNKNOWN,
+    }
+
+
+def bump_complaints(conn, key, delta):
+    table = ComplaintDailyCount.__table__
+    stmt = dialect_insert(table).values(**key, count=delta)
+    conn.execute(stmt.on_conflict_do_update(
+        index_elements=["day", "district", "fraud_type", "status"],
+        set_={"count": table.c.count + stmt.excluded.count},
+    ))
+
+
+def bump_emotions(conn, counts):
+    """counts: {(day, emotion): n}."""
+    table = EmotionDailyCount.__table__
+    for (day, emotion), n in counts.items():
+        stmt = dialect_insert(table).values(day=day, emotion=emotion, count=n)
+        conn.execute(stmt.on_conflict_do_update(
+            index_elements=["day", "emotion"], set_={"count": table.c.count + stmt.excluded.count},
+        ))
+
+
+def record_transition(conn, from_status, to_status, seconds, when=None, count=1, max_seconds=None):
+    """`count` transitions that spent `seconds` in total (longest: max_seconds) in from_status."""
+    table = StatusTransitionStat.__table__
+    stmt = dialect_insert(table).values(
+        day=_day(when), from_status=from_status or UNKNOWN, to_status=to_status,
+        count=count, total_seconds=seconds, max_seconds=seconds if max_seconds is None else max_seconds,
+    )
+    conn.execute(stmt.on_conflict_do_update(
+        index_elements=["day", "from_status", "to_status"],
+        set_={
+            "count": table.c.count + stmt.excluded.count,
+            "total_seconds": table.c.total_seconds + stmt.excluded.total_seconds,
+            "max_seconds": case((stmt.excluded.max_seconds > table.c.max_seconds, stmt.excluded.max_seconds),
+                                else_=table.c.max_seconds),
+        },
+    ))
+
+
+def complaint_created(db, complaint):
+    """Count a new complaint; call before the commit that inserts it."""
+    complaint.date_created = complaint.date_created or datetime.utcnow()
+    complaint.status_changed_at = complaint.date_created
+    bump_complaints(db, _key(complaint, complaint.status), 1)
+
+
+def change_status(db, complaint, status):
+    """
+    Move a complaint to `status`, shifting its rollup bucket and recording
+    how long it sat in the old one. Returns False (and writes nothing) when
+    the status is unchanged. The caller commits.
+    """
+    old = complaint.status
+    if status == old:
+        return False
+    now = datetime.utcnow()
+    entered = complaint.status_changed_at or complaint.date_created or now
+    bump_complaints(db, _key(complaint, old), -1)
+    bump_complaints(db, _key(complaint, status), 1)
+    record_transition(db, old, status, max(0.0, (now - entered).total_seconds()), now)
+    complaint.status = status
+    complaint.status_changed_at = now
+    return True
+
+
+def change_status_many(conn, rows, status, now=None):
+    """
+    change_status() for many complaints at once, as one upsert per rollup
+    bucket and per old status instead of per complaint. `rows` carry status,
+    status_changed_at, date_created, district and fraud_type; rows already
+    in `status` are skipped. The caller updates the complaints and commits.
+    """
+    now = now or datetime.utcnow()
+    deltas = Counter()
+    waits = {}
+    for row in rows:
+        if row.status == status:
+            continue
+        deltas[tuple(_key(row, row.status).items())] -= 1
+        deltas[tuple(_key(row, status).items())] += 1
+        entered = row.status_changed_at or row.date_created or now
+        waits.setdefault(row.status, []).append(max(0.0, (now - entered).total_seconds()))
+    for key, delta in deltas.items():
+        if delta:
+            bump_complaints(conn, dict(key), delta)
+    for old, seconds in waits.items():
+        record_transition(conn, old, status, sum(seconds), now, count=len(seconds), max_seconds=max(seconds))
+
+
+def count_emotions(rows):
+    """Counter of (day, emotion) over logged message dicts; inbound messages with an emotion only."""
+    return Counter(
+        (row["timestamp"].date(), row["emotion"])
+        for row in rows if row.get("emotion") and row.get("direction", "in") == "in"
+    )
+
+
+# -------------------------------------------------------
+# 📈 Chart queries: read the rollups, never scan complaints
+# -------------------------------------------------------
+def complaint_counts(group_by="day", date_from=None, date_to=None, **filters):
+    """[{group_by: value, "count": n}] from complaint_daily_counts, filtered on the other dimensions."""
+    table = ComplaintDailyCount.__table__
+    column = table.c[group_by]
+    q = select(column, func.sum(table.c.count).label("count")).group_by(column).order_by(column)
+    for name, value in filters.items():
+        if value:
+            q = q.where(table.c[name] == value)
+    if date_from:
+        q = q.where(table.c.day >= date_from)
+    if date_to:
+        q = q.where(table.c.day <= date_to)
+    with engine.connect() as conn:
+        rows = conn.execute(q.having(func.sum(table.c.count) != 0)).all()
+    return [{group_by: _plain(value), "count": int(n)} for value, n in rows]
+
+
+def emotion_trend(date_from=None, date_to=None):
+    """{day: {emotion: n}} for inbound messages."""
+    table = EmotionDailyCount.__table__
+    q = select(table.c.day, table.c.emotion, table.c.count).order_by(table.c.day)
+    if date_from:
+        q = q.where(table.c.day >= date_from)
+    if date_to:
+        q = q.where(table.c.day <= date_to)
+    trend = {}
+    with engine.connect() as conn:
+        for day, emotion, n in conn.execute(q):
+            trend.setdefault(day.isoformat(), {})[emotion] = n
+    return trend
+
+
+def transition_latency(date_from=None, date_to=None):
+    """Per from -> to transition: count, average and max hours spent in the old status."""
+    table = StatusTransitionStat.__table__
+    q = (select(table.c.from_status, table.c.to_status, func.sum(table.c.count),
+                func.sum(table.c.total_seconds), func.max(table.c.max_seconds))
+         .group_by(table.c.from_status, table.c.to_status))
+    if date_from:
+        q = q.where(table.c.day >= date_from)
+    if date_to:
+        q = q.where(table.c.day <= date_to)
+    with engine.connect() as conn:
+        rows = conn.execute(q).all()
+    return [
+        {"from": f, "to": t, "count": int(n), "avg_hours": round(total / n / 3600, 2) if n else 0.0,
+         "max_hours": round(longest / 3600, 2)}
+        for f, t, n, total, longest in rows
+    ]
+
+
+def status_backlog(statuses):
+    """
+    Tickets currently in each status (from the rollup) and how long the
+    oldest has been waiting there (one (status, status_changed_at) index seek each).
+    """
+    counts = {row["status"]: row["count"] for row in complaint_counts("status")}
+    now = datetime.utcnow()
+    out = {}
+    with engine.connect() as conn:
+        for status in statuses:
+            oldest = conn.execute(
+                select(func.min(Complaint.status_changed_at)).where(Complaint.status == status)
+            ).scalar()
+            out[status] = {
+                "count": counts.get(status, 0),
+                "oldest_hours": round((now - oldest).total_seconds() / 3600, 2) if oldest else None,
+            }
+    return out
+
+
+def _plain(value):
+    return value.isoformat() if isinstance(value, date) else value
+
+
+# -------------------------------------------------------
+# 🛠️ Backfill: rebuild the rollups from the source tables
+# -------------------------------------------------------
+def backfill_status_changed_at():
+    """Complaints from before status_changed_at: assume they entered their status when filed."""
+    with engine.begin() as conn:
+        return conn.execute(
+            update(Complaint).where(Complaint.status_changed_at.is_(None))
+            .values(status_changed_at=Complaint.date_created)
+        ).rowcount
+
+
+def rebuild_complaint_counts():
+    """Recompute complaint_daily_counts with one GROUP BY over complaints. Returns buckets written."""
+    day = func.date(Complaint.date_created)
+    district = func.coalesce(Complaint.district, UNKNOWN)
+    fraud_type = func.coalesce(Complaint.fraud_type, UNKNOWN)
+    status = func.coalesce(Complaint.status, UNKNOWN)
+    with engine.begin() as conn:
+        rows = conn.execute(
+            select(day, district, fraud_type, status, func.count())
+            .where(Complaint.date_created.is_not(None))
+            .group_by(day, district, fraud_type, status)
+        ).all()
+        conn.execute(delete(ComplaintDailyCount))
+        if rows:
+            conn.execute(ComplaintDailyCount.__table__.insert(), [
+                {"day": _as_date(d), "district": di, "fraud_type": f, "status": s, "count": n}
+                for d, di, f, s, n in rows
+            ])
+    return len(rows)
+
+
+def rebuild_emotion_counts():
+    """
+    Recompute emotion_daily_counts for the days still in the message log
+    (older days were pruned; their counts are kept as they are).
+    """
+    day = func.date(MessageLog.timestamp)
+    with engine.begin() as conn:
+        first = conn.execute(select(func.min(MessageLog.timestamp))).scalar()
+        if first is None:
+            return 0
+        rows = conn.execute(
+            select(day, MessageLog.emotion, func.count())
+            .where(MessageLog.direction == "in", MessageLog.emotion.is_not(None))
+            .group_by(day, MessageLog.emotion)
+        ).all()
+        conn.execute(delete(EmotionDailyCount).where(EmotionDailyCount.day >= _as_date(first)))
+        if rows:
+            conn.execute(EmotionDailyCount.__table__.insert(), [
+                {"day": _as_date(d), "emotion": e, "count": n} for d, e, n in rows
+            ])
+    return len(rows)
+
+
+def _as_date(value):
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return datetime.strptime(str(value)[:10], "%Y-%m-%d").date()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rebuild dashboard rollups from complaints and messages")
+    parser.parse_args()
+    started = time.perf_counter()
+    filled = backfill_status_changed_at()
+    buckets = rebuild_complaint_counts()
+    emotions = rebuild_emotion_counts()
+    print(f"✅ Rollups rebuilt in {time.perf_counter() - started:.1f}s: {buckets} complaint buckets, "
+          f"{emotions} emotion buckets, {filled} complaints given status_changed_at")
@@ -1,44 +1,305 @@
-from fastapi import APIRouter, Request, Form
+from fastapi import APIRouter, Depends, HTTPException, Request, Form
+from typing import List, Literal
+from pydantic import BaseModel
 from fastapi.responses import HTMLResponse, RedirectResponse
 from fastapi.templating import Jinja2Templates
-from backend.models import Complaint
-from backend.init_db import SessionLocal
+from sqlalchemy import Text, and_, or_, select, type_coerce, update
+from backend.admin_auth import (check_credentials, clear_session_cookie, current_admin, require_admin,
+                                require_admin_form, require_admin_page, require_csrf, set_session_cookie)
+from backend.crypto import decrypt_many
+from backend.export import export_response, iter_chunks, parse_day
+from backend.models import Complaint, ENCRYPTED_FIELDS
+from backend import rollups
+from backend.rollups import change_status
+from backend.init_db import engine, get_db
+from backend import notifications
+from backend.notifications import notification_worker
+from backend.status_lookup import invalidate_complaint
+from backend.utils.tickets import normalize_ticket
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+import base64
 
 router = APIRouter()
 import os
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 templates = Jinja2Templates(directory=os.path.join(BASE_DIR, "templates"))
 
+PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+STATUSES = ["Registered", "Under Review", "Resolved"]
+MAX_BULK_TICKETS = 10000
+BULK_CHUNK = 500  # tickets per UPDATE ... WHERE ticket_number IN (...)
 
-# --- Admin credentials ---
-ADMIN_USER = "admin"
-ADMIN_PASS = "cybersathi123"
+# Columns the dashboard lists; encrypted ones are selected undecoded for decrypt_page()
+PAGE_ENCRYPTED_FIELDS = ("name", "phone")
+LIST_COLUMNS = [
+    type_coerce(getattr(Complaint, f), Text).label(f) if f in PAGE_ENCRYPTED_FIELDS else getattr(Complaint, f)
+    for f in ("id", "ticket_number", "name", "phone", "district", "fraud_type",
+              "description", "media_files", "status", "date_created")
+]
 
-# --- Show login page ---
+
+# --- Keyset pagination helpers ---
+def encode_cursor(complaint):
+    raw = f"{complaint.date_created.isoformat()}|{complaint.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor):
+    try:
+        created, complaint_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return datetime.fromisoformat(created), int(complaint_id)
+    except Exception:
+        return None
+
+
+def filter_complaints(q, status=None, district=None, fraud_type=None, date_from=None, date_to=None):
+    if status:
+        q = q.where(Complaint.status == status)
+    if district:
+        q = q.where(Complaint.district == district)
+    if fraud_type:
+        q = q.where(Complaint.fraud_type == fraud_type)
+    start, end = parse_day(date_from), parse_day(date_to)
+    if start:
+        q = q.where(Complaint.date_created >= start)
+    if end:
+        q = q.where(Complaint.date_created < end + timedelta(days=1))
+    return q
+
+
+def query_complaints(db, status=None, district=None, fraud_type=None,
+                     date_from=None, date_to=None, cursor=None, limit=PAGE_SIZE):
+    """
+    One page of complaints, newest first. Each filter lines up with a
+    (column, date_created, id) index, and the cursor continues strictly after
+    the last row of the previous page, so cost does not grow with the page number.
+    Returns (rows, next_cursor).
+
+    Encrypted columns are fetched as raw tokens and decrypted for the whole
+    page at once (see decrypt_page).
+    """
+    limit = max(1, min(int(limit or PAGE_SIZE), MAX_PAGE_SIZE))
+    q = filter_complaints(select(*LIST_COLUMNS), status, district, fraud_type, date_from, date_to)
+    position = decode_cursor(cursor) if cursor else None
+    if position:
+        created, complaint_id = position
+        q = q.where(or_(
+            Complaint.date_created < created,
+            and_(Complaint.date_created == created, Complaint.id < complaint_id),
+        ))
+    rows = db.execute(q.order_by(Complaint.date_created.desc(), Complaint.id.desc()).limit(limit + 1)).all()
+    next_cursor = encode_cursor(rows[limit - 1]) if len(rows) > limit else None
+    return decrypt_page(rows[:limit]), next_cursor
+
+
+def decrypt_page(rows):
+    """Rows with raw tokens -> objects with plaintext attributes, one batched decrypt per page."""
+    plain = decrypt_many(getattr(row, f) for row in rows for f in PAGE_ENCRYPTED_FIELDS)
+    return [
+        SimpleNamespace(**{k: plain[v] if k in PAGE_ENCRYPTED_FIELDS else v for k, v in row._mapping.items()})
+        for row in rows
+    ]
+
+
+# Export: every column except the blind index; encrypted ones fetched as tokens, decrypted per chunk
+EXPORT_FIELDS = ("ticket_number", "name", "father_name", "dob", "phone", "email", "village", "post_office",
+                 "police_station", "district", "pincode", "fraud_type", "description", "media_files",
+                 "status", "date_created")
+
+
+def complaints_export_query(status=None, district=None, fraud_type=None, date_from=None, date_to=None):
+    columns = [type_coerce(getattr(Complaint, f), Text) if f in ENCRYPTED_FIELDS else getattr(Complaint, f)
+               for f in EXPORT_FIELDS]
+    q = filter_complaints(select(*columns), status, district, fraud_type, date_from, date_to)
+    # Oldest first, along the same (filter, date_created, id) indexes as the dashboard
+    return q.order_by(Complaint.date_created, Complaint.id)
+
+
+def decrypt_chunks(chunks):
+    """Decrypt each chunk's PII in one decrypt_many() call, without filling the dashboard's cache."""
+    positions = [i for i, f in enumerate(EXPORT_FIELDS) if f in ENCRYPTED_FIELDS]
+    for chunk in chunks:
+        plain = decrypt_many((row[i] for row in chunk for i in positions), remember=False)
+        rows = []
+        for row in chunk:
+            row = list(row)
+            for i in positions:
+                row[i] = plain[row[i]]
+            rows.append(row)
+        yield rows
+
+
+# --- Bulk status change ---
+def bulk_change_status(tickets, status, notify=True):
+    """
+    Move every listed ticket to `status` in one transaction: per chunk one
+    SELECT and one UPDATE ... WHERE id IN (...), with the rollups shifted in
+    bulk and a notification job queued for each changed ticket. Tickets
+    already in `status` are left alone. Sending happens later on the
+    notification worker, so this returns as soon as the commit is done.
+    """
+    table = Complaint.__table__
+    columns = (table.c.id, table.c.ticket_number, table.c.phone_key, table.c.status,
+               table.c.status_changed_at, table.c.date_created, table.c.district, table.c.fraud_type)
+    now = datetime.utcnow()
+    found, changed = set(), []
+    batch_id = notifications.new_batch_id() if notify else None
+    with engine.begin() as conn:
+        for i in range(0, len(tickets), BULK_CHUNK):
+            chunk = tickets[i:i + BULK_CHUNK]
+            rows = conn.execute(select(*columns).where(table.c.ticket_number.in_(chunk))).all()
+            found.update(row.ticket_number for row in rows)
+            rows = [row for row in rows if row.status != status]
+            if not rows:
+                continue
+            rollups.change_status_many(conn, rows, status, now)
+            conn.execute(update(table).where(table.c.id.in_([row.id for row in rows]))
+                         .values(status=status, status_changed_at=now))
+            if notify:
+                notifications.enqueue(conn, [row.ticket_number for row in rows], status, batch_id)
+            changed += rows
+    for row in changed:
+        invalidate_complaint(row.ticket_number, row.phone_key)
+    if notify and changed:
+        notification_worker.trigger()
+    return {
+        "status": status,
+        "updated": len(changed),
+        "unchanged": len(found) - len(changed),
+        "not_found": [t for t in tickets if t not in found],
+        "batch_id": batch_id if changed else None,
+    }
+
+
+def complaint_to_dict(c):
+    return {
+        "ticket_number": c.ticket_number,
+        "name": c.name,
+        "phone": c.phone,
+        "district": c.district,
+        "fraud_type": c.fraud_type,
+        "description": c.description,
+        "media_files": c.media_files,
+        "status": c.status,
+        "date_created": c.date_created.isoformat() if c.date_created else None,
+    }
+
+
+def filters_from(request):
+    params = request.query_params
+    return {k: params.get(k) or None for k in ("status", "district", "fraud_type", "date_from", "date_to")}
+
+
+def render_dashboard(request, db, admin, filters=None, cursor=None, message=None):
+    filters = filters or {}
+    complaints, next_cursor = query_complaints(db, cursor=cursor, **filters)
+    return templates.TemplateResponse(request, "dashboard.html", {
+        "complaints": complaints,
+        "next_cursor": next_cursor,
+        "filters": filters,
+        "statuses": STATUSES,
+        "message": message,
+        "csrf_token": admin.csrf,
+    })
+
+
+# --- Show login page (straight to the dashboard when already signed in) ---
 @router.get("/admin", response_class=HTMLResponse)
 async def admin_login_page(request: Request):
-    return templates.TemplateResponse("admin_login.html", {"request": request})
+    if current_admin(request):
+        return RedirectResponse("/admin/complaints", status_code=303)
+    return templates.TemplateResponse(request, "admin_login.html")
 
-# --- Handle login form ---
+# --- Handle login form: sets the signed session cookie every admin route checks ---
 @router.post("/admin", response_class=HTMLResponse)
-async def admin_login(request: Request, username: str = Form(...), password: str = Form(...)):
-    if username == ADMIN_USER and password == ADMIN_PASS:
-        db = SessionLocal()
-        complaints = db.query(Complaint).order_by(Complaint.date_created.desc()).all()
-        return templates.TemplateResponse("dashboard.html", {"request": request, "complaints": complaints})
-    else:
-        return templates.TemplateResponse("admin_login.html", {"request": request, "error": "❌ Invalid credentials"})
+def admin_login(request: Request, username: str = Form(...), password: str = Form(...)):
+    if check_credentials(username, password):
+        return set_session_cookie(RedirectResponse("/admin/complaints", status_code=303))
+    return templates.TemplateResponse(request, "admin_login.html", {"error": "❌ Invalid credentials"},
+                                      status_code=401)
+
+@router.get("/admin/logout")
+def admin_logout():
+    return clear_session_cookie(RedirectResponse("/admin", status_code=303))
+
+# --- Filtered, paginated complaint list (HTML) ---
+# DB-bound handlers are plain `def` so FastAPI runs them on its threadpool
+@router.get("/admin/complaints", response_class=HTMLResponse)
+def admin_complaints(request: Request, cursor: str = None, admin=Depends(require_admin_page), db=Depends(get_db)):
+    return render_dashboard(request, db, admin, filters_from(request), cursor)
+
+# --- Same list as JSON, for lazy loading ---
+@router.get("/admin/api/complaints", dependencies=[Depends(require_admin)])
+def admin_complaints_api(request: Request, cursor: str = None, limit: int = PAGE_SIZE, db=Depends(get_db)):
+    rows, next_cursor = query_complaints(db, cursor=cursor, limit=limit, **filters_from(request))
+    return {"items": [complaint_to_dict(c) for c in rows], "next_cursor": next_cursor}
 
 # --- Update status ---
 @router.post("/admin/update_status", response_class=HTMLResponse)
-async def update_status(request: Request, ticket: str = Form(...), status: str = Form(...)):
-    db = SessionLocal()
+def update_status(request: Request, ticket: str = Form(...), status: str = Form(...),
+                  admin=Depends(require_admin_form), db=Depends(get_db)):
+    if status not in STATUSES:
+        raise HTTPException(status_code=400, detail=f"Unknown status; expected one of {STATUSES}")
     complaint = db.query(Complaint).filter(Complaint.ticket_number == ticket).first()
-    if complaint:
-        complaint.status = status
+    if complaint and change_status(db, complaint, status):
+        notifications.enqueue(db, [complaint.ticket_number], status)
         db.commit()
-    complaints = db.query(Complaint).order_by(Complaint.date_created.desc()).all()
-    return templates.TemplateResponse(
-        "dashboard.html",
-        {"request": request, "complaints": complaints, "message": "✅ Status updated successfully."}
-    )
+        invalidate_complaint(complaint.ticket_number, complaint.phone_key)
+        notification_worker.trigger()
+    return render_dashboard(request, db, admin, message="✅ Status updated successfully.")
+
+# --- Bulk status change (JSON); the citizens are notified in the background ---
+class BulkStatusIn(BaseModel):
+    tickets: List[str]
+    status: str
+    notify: bool = True
+
+
+@router.post("/admin/api/bulk_status", dependencies=[Depends(require_csrf)])
+def bulk_status(body: BulkStatusIn):
+    if body.status not in STATUSES:
+        raise HTTPException(status_code=400, detail=f"Unknown status; expected one of {STATUSES}")
+    if len(body.tickets) > MAX_BULK_TICKETS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BULK_TICKETS} tickets per request")
+    tickets = list(dict.fromkeys(normalize_ticket(t) or t.strip().upper() for t in body.tickets))
+    return bulk_change_status(tickets, body.status, body.notify)
+
+@router.get("/admin/api/notifications/{batch_id}", dependencies=[Depends(require_admin)])
+def notification_progress(batch_id: str):
+    progress = notifications.batch_progress(batch_id)
+    if not progress["total"]:
+        raise HTTPException(status_code=404, detail="Unknown batch")
+    return progress
+
+@router.get("/admin/api/notifications", dependencies=[Depends(require_admin)])
+def notification_stats():
+    return notification_worker.stats()
+
+# --- Streamed export (CSV or NDJSON, optionally gzipped) with the dashboard filters ---
+@router.get("/admin/export/complaints.{fmt}", dependencies=[Depends(require_admin)])
+def export_complaints(request: Request, fmt: Literal["csv", "ndjson"], gzip: bool = False):
+    chunks = decrypt_chunks(iter_chunks(complaints_export_query(**filters_from(request))))
+    return export_response("complaints", fmt, list(EXPORT_FIELDS), chunks, gzip)
+
+# --- Chart data, served from the rollup tables (cost independent of complaint count) ---
+@router.get("/admin/api/stats/complaints", dependencies=[Depends(require_admin)])
+def complaint_stats(request: Request, group_by: Literal["day", "district", "fraud_type", "status"] = "day"):
+    filters = filters_from(request)
+    start, end = parse_day(filters.pop("date_from")), parse_day(filters.pop("date_to"))
+    return {"group_by": group_by, "items": rollups.complaint_counts(
+        group_by, start.date() if start else None, end.date() if end else None, **filters)}
+
+@router.get("/admin/api/stats/emotions", dependencies=[Depends(require_admin)])
+def emotion_stats(date_from: str = None, date_to: str = None):
+    start, end = parse_day(date_from), parse_day(date_to)
+    return rollups.emotion_trend(start.date() if start else None, end.date() if end else None)
+
+@router.get("/admin/api/stats/status_latency", dependencies=[Depends(require_admin)])
+def status_latency(date_from: str = None, date_to: str = None):
+    start, end = parse_day(date_from), parse_day(date_to)
+    return {
+        "transitions": rollups.transition_latency(start.date() if start else None, end.date() if end else None),
+        "backlog": rollups.status_backlog(STATUSES),
+    }
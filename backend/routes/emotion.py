@@ -0,0 +1,74 @@
+from datetime import datetime
+from typing import List
+
+from fastapi import APIRouter, Depends, HTTPException
+from pydantic import BaseModel
+from sqlalchemy import case, update
+
+from backend.admin_auth import require_csrf
+from backend.emotion_model import emotion_model, emotion_service, model_reloader, read_meta
+from backend.emotion_trainer import emotion_trainer, model_classes, pending_labels
+from backend.init_db import engine
+from backend.models import MessageLog
+
+router = APIRouter()
+
+MAX_LABELS_PER_REQUEST = 1000
+
+
+class LabelIn(BaseModel):
+    id: int
+    label: str
+
+
+class LabelsIn(BaseModel):
+    items: List[LabelIn]
+
+
+# --- Label logged messages (training data for the online model) ---
+@router.post("/label_messages", dependencies=[Depends(require_csrf)])
+def label_messages(body: LabelsIn):
+    classes = set(model_classes())
+    if len(body.items) > MAX_LABELS_PER_REQUEST:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_LABELS_PER_REQUEST} labels per request")
+    bad = sorted({item.label for item in body.items} - classes)
+    if bad:
+        raise HTTPException(status_code=400, detail=f"Unknown labels {bad}; expected one of {sorted(classes)}")
+    if not body.items:
+        return {"updated": 0}
+    labels = {item.id: item.label for item in body.items}
+    with engine.begin() as conn:
+        # Relabeling clears trained_at so the correction is learned on the next run
+        updated = conn.execute(
+            update(MessageLog).where(MessageLog.id.in_(list(labels)))
+            .values(label=case(labels, value=MessageLog.id), labeled_at=datetime.utcnow(), trained_at=None)
+        ).rowcount
+    return {"updated": updated}
+
+
+@router.post("/train_emotion", dependencies=[Depends(require_csrf)])
+def train_emotion(full: bool = False):
+    """Train now instead of waiting for the next background run."""
+    result = emotion_trainer.run_once(full=full)
+    if result is None and emotion_trainer.last_error:
+        raise HTTPException(status_code=500, detail=emotion_trainer.last_error)
+    return {"trained": result is not None, "version": (result or read_meta()).get("version", 0)}
+
+
+@router.get("/model/info")
+def model_info():
+    meta = read_meta()
+    loaded = emotion_model.get() if emotion_model.loaded else None
+    last_trained = meta.get("last_trained")
+    return {
+        "version": meta.get("version", 0),
+        "kind": "online" if meta.get("artifact") else "pipeline",
+        "classes": model_classes(meta),
+        "last_trained": datetime.utcfromtimestamp(last_trained).isoformat() if last_trained else None,
+        "samples_seen": meta.get("samples_seen", 0),
+        "pending_labels": pending_labels(),
+        "loaded_version": loaded.version if loaded else None,
+        "swaps": model_reloader.swaps,
+        "trainer": emotion_trainer.stats(),
+        "service": emotion_service.stats(),
+    }
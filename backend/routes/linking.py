@@ -0,0 +1,37 @@
+from typing import Literal
+
+from fastapi import APIRouter, Depends, HTTPException
+
+from backend import linking
+from backend.admin_auth import require_admin
+from backend.utils.tickets import normalize_ticket
+
+# Clusters, indicators and unfreeze requests expose complaint data: admin session or X-Admin-Token only
+router = APIRouter(dependencies=[Depends(require_admin)])
+
+MAX_PAGE_SIZE = 200
+
+
+# --- Complaints linked by shared UPI IDs, phones, sites and accounts ---
+@router.get("/admin/api/clusters")
+def clusters(limit: int = 20, min_size: int = 2):
+    return {
+        "items": linking.top_clusters(max(1, min(limit, 100)), max(2, min_size)),
+        "sizes": linking.cluster_size_histogram(),
+    }
+
+@router.get("/admin/api/clusters/{ticket}")
+def cluster_of(ticket: str):
+    cluster = linking.cluster_for_ticket(normalize_ticket(ticket) or ticket.strip().upper())
+    if cluster is None:
+        raise HTTPException(status_code=404, detail="Ticket not found")
+    return cluster
+
+@router.get("/admin/api/indicators/top")
+def indicators(kind: Literal["upi", "phone", "url", "email", "account"] = None, limit: int = 20):
+    return {"items": linking.top_indicators(kind, max(1, min(limit, MAX_PAGE_SIZE)))}
+
+# --- Unfreeze requests (menu option C), newest first ---
+@router.get("/admin/api/unfreeze_requests")
+def unfreeze_requests(before_id: int = None, limit: int = 50):
+    return linking.list_unfreeze_requests(before_id, max(1, min(limit, MAX_PAGE_SIZE)))
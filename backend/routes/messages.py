@@ -0,0 +1,93 @@
+from datetime import timedelta
+from typing import Literal
+
+from fastapi import APIRouter, Depends
+from pydantic import BaseModel
+from sqlalchemy import select
+
+from backend.admin_auth import require_admin, require_csrf
+from backend.export import export_response, iter_chunks, parse_day
+from backend.init_db import get_db
+from backend.message_log import message_log
+from backend.models import MessageLog
+from backend.search import message_search_filter
+
+router = APIRouter()
+
+PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+EXPORT_COLUMNS = ["id", "timestamp", "direction", "sender", "message", "emotion"]
+
+
+class LogMessageIn(BaseModel):
+    sender: str
+    message: str
+    direction: str = "in"
+    emotion: str = None
+
+
+def message_to_dict(m):
+    return {
+        "id": m.id,
+        "timestamp": m.timestamp.isoformat() if m.timestamp else None,
+        "direction": m.direction,
+        "sender": m.sender,
+        "message": m.message,
+        "emotion": m.emotion,
+    }
+
+
+# --- List / search logged messages ---
+@router.get("/messages", dependencies=[Depends(require_admin)])
+def list_messages(sender: str = None, q: str = None, direction: str = None,
+                  before_id: int = None, limit: int = PAGE_SIZE, db=Depends(get_db)):
+    """Newest first; page with `before_id` = the last id of the previous page."""
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    query = db.query(MessageLog)
+    if sender:
+        # (sender, timestamp) index serves per-sender history
+        query = query.filter(MessageLog.sender == sender).order_by(MessageLog.timestamp.desc(), MessageLog.id.desc())
+    else:
+        query = query.order_by(MessageLog.id.desc())
+    if direction:
+        query = query.filter(MessageLog.direction == direction)
+    if q:
+        # Every word of q, through the messages_fts index when SQLite has FTS5
+        query = query.filter(message_search_filter(q))
+    if before_id:
+        query = query.filter(MessageLog.id < before_id)
+    rows = query.limit(limit).all()
+    return {
+        "items": [message_to_dict(m) for m in rows],
+        "next_before_id": rows[-1].id if len(rows) == limit else None,
+    }
+
+
+# --- Manual logging (testing) ---
+@router.post("/log_message", dependencies=[Depends(require_csrf)])
+def log_message(item: LogMessageIn):
+    message_log.log(item.sender, item.message, item.direction, item.emotion)
+    return {"status": "buffered"}
+
+
+# --- Export, streamed straight from a server-side cursor ---
+def messages_export_query(sender=None, direction=None, date_from=None, date_to=None):
+    table = MessageLog.__table__
+    stmt = select(*[table.c[name] for name in EXPORT_COLUMNS]).order_by(table.c.id)
+    if sender:
+        stmt = stmt.where(table.c.sender == sender)
+    if direction:
+        stmt = stmt.where(table.c.direction == direction)
+    start, end = parse_day(date_from), parse_day(date_to)
+    if start:
+        stmt = stmt.where(table.c.timestamp >= start)
+    if end:
+        stmt = stmt.where(table.c.timestamp < end + timedelta(days=1))
+    return stmt
+
+
+@router.get("/export/messages.{fmt}", dependencies=[Depends(require_admin)])
+def export_messages(fmt: Literal["csv", "ndjson"], sender: str = None, direction: str = None,
+                    date_from: str = None, date_to: str = None, gzip: bool = False):
+    stmt = messages_export_query(sender, direction, date_from, date_to)
+    return export_response("messages", fmt, EXPORT_COLUMNS, iter_chunks(stmt), gzip)
@@ -0,0 +1,51 @@
+import hmac
+import os
+
+from fastapi import APIRouter, Header, HTTPException
+from fastapi.responses import PlainTextResponse
+
+from backend.metrics import registry
+from backend.profiler import PROFILER_INTERVAL_MS, PROFILER_MAX_SECONDS, profiler
+
+router = APIRouter()
+
+# Profiler endpoints answer only when a token is configured and sent as X-Debug-Token
+DEBUG_TOKEN = os.getenv("DEBUG_TOKEN")
+
+
+def require_debug_token(token):
+    if not DEBUG_TOKEN or not token or not hmac.compare_digest(token.encode(), DEBUG_TOKEN.encode()):
+        raise HTTPException(status_code=403, detail="Debug endpoints are disabled or the token is wrong")
+
+
+# --- Prometheus scrape target (per worker process) ---
+@router.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
+
+# --- Sampling profiler, switchable at runtime ---
+@router.post("/debug/profiler/start")
+def start_profiler(interval_ms: float = PROFILER_INTERVAL_MS, seconds: float = PROFILER_MAX_SECONDS,
+                   x_debug_token: str = Header(None)):
+    require_debug_token(x_debug_token)
+    return {"started": profiler.start(interval_ms, seconds), **profiler.report(top=0)}
+
+
+@router.post("/debug/profiler/stop")
+def stop_profiler(x_debug_token: str = Header(None)):
+    require_debug_token(x_debug_token)
+    return profiler.stop()
+
+
+@router.get("/debug/profiler")
+def profiler_report(top: int = 25, x_debug_token: str = Header(None)):
+    require_debug_token(x_debug_token)
+    return profiler.report(top)
+
+
+@router.get("/debug/profiler/collapsed", response_class=PlainTextResponse)
+def profiler_collapsed(x_debug_token: str = Header(None)):
+    """Collapsed stacks for flamegraph.pl / speedscope."""
+    require_debug_token(x_debug_token)
+    return profiler.collapsed()
@@ -0,0 +1,34 @@
+from typing import Literal
+
+from fastapi import APIRouter, Depends
+
+from backend import search
+from backend.admin_auth import require_admin
+
+# Every route here reads complaint contents: admin session or X-Admin-Token only
+router = APIRouter(dependencies=[Depends(require_admin)])
+
+PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+EntityKind = Literal["upi", "phone", "url", "email", "account"]
+
+
+# --- Ranked complaint search; a UPI ID / phone / URL query pivots on the entity index ---
+@router.get("/admin/api/search")
+def search_complaints(q: str, cursor: int = None, limit: int = PAGE_SIZE, status: str = None,
+                      district: str = None, fraud_type: str = None):
+    """Page with `cursor` = next_cursor of the previous response."""
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    return search.search_complaints(q, cursor, limit, status=status, district=district, fraud_type=fraud_type)
+
+# --- Exact pivot: every complaint naming one entity ---
+@router.get("/admin/api/entities/{kind}")
+def complaints_with_entity(kind: EntityKind, value: str, cursor: int = None, limit: int = PAGE_SIZE):
+    found = search.extract_entities(value)
+    normalized = next((v for k, v in found if k == kind), value.strip().lower())
+    return search.complaints_with_entity(kind, normalized, before_id=cursor, limit=max(1, min(limit, MAX_PAGE_SIZE)))
+
+# --- Most reported UPI IDs, numbers, sites ---
+@router.get("/admin/api/entities/{kind}/top")
+def top_entities(kind: EntityKind, limit: int = 20):
+    return {"kind": kind, "items": search.top_entities(kind, max(1, min(limit, MAX_PAGE_SIZE)))}
@@ -0,0 +1,384 @@
+import argparse
+import os
+import re
+import time
+
+from sqlalchemy import column, delete, func, insert, literal_column, select, table, text
+
+from backend.init_db import engine
+from backend.logs import get_logger
+from backend.models import Complaint, ComplaintEntity, MessageLog
+from backend.utils_main import normalize_phone
+
+# messages_fts is a second plaintext copy of every message body, so it is opt-in
+SEARCH_MESSAGES = os.getenv("SEARCH_MESSAGES", "0") == "1"
+SEARCH_MAX_OFFSET = int(os.getenv("SEARCH_MAX_OFFSET", "1000"))
+FTS_TOKENIZER = "unicode61 remove_diacritics 2"
+
+log = get_logger("search")
+
+
+# -------------------------------------------------------
+# 🧲 Entities: UPI IDs, phones, URLs, emails, account numbers
+# -------------------------------------------------------
+_EMAIL = re.compile(r"(?<![\w.+-])[a-z0-9][\w.+-]*@[a-z0-9-]+(?:\.[a-z0-9-]+)*\.[a-z]{2,}\b", re.I)
+_UPI = re.compile(r"(?<![\w.+-])[a-z0-9][\w.-]{1,63}@[a-z][a-z0-9]{1,31}\b(?![.@-]?\w)", re.I)
+_URL = re.compile(
+    r"\b(?:https?://|www\.)[^\s<>\"']+"
+    r"|(?<![@\w.-])[a-z0-9-]+(?:\.[a-z0-9-]+)*\.(?:com|in|ly|io|co|me|app|net|org|xyz|top|info|link|site|online)"
+    r"(?:/[^\s<>\"']*)?(?![\w@-])",
+    re.I,
+)
+_PHONE = re.compile(r"(?<![\d\w])(?:\+?91[\s-]?|0)?[6-9]\d{4}[\s-]?\d{5}(?!\d)")
+_ACCOUNT = re.compile(r"(?<!\d)\d{9,18}(?!\d)")
+ENTITY_KINDS = ("upi", "phone", "url", "email", "account")
+
+
+def normalize_url(url):
+    url = re.sub(r"^(?:https?://)?(?:www\.)?", "", url.strip().rstrip(".,;:!?)]}'\""), flags=re.I)
+    host, _, path = url.partition("/")
+    return host.lower() + ("/" + path if path else "")
+
+
+def find_entities(text):
+    """[(kind, normalized value, span)] in free text; each span counts as one kind only."""
+    if not text:
+        return []
+    found = []
+    taken = []
+
+    def free(match):
+        return all(match.end() <= start or match.start() >= end for start, end in taken)
+
+    def add(kind, value, match):
+        if value:
+            found.append((kind, value, match.span()))
+            taken.append(match.span())
+
+    for match in _URL.finditer(text):
+        add("url", normalize_url(match.group()), match)
+    for match in _EMAIL.finditer(text):
+        if free(match):
+            add("email", match.group().lower(), match)
+    for match in _UPI.finditer(text):
+        if free(match):
+            add("upi", match.group().lower(), match)
+    for match in _PHONE.finditer(text):
+        if free(match):
+            add("phone", normalize_phone(match.group()), match)
+    for match in _ACCOUNT.finditer(text):
+        if free(match):
+            add("account", match.group(), match)
+    return found
+
+
+def extract_entities(text):
+    return {(kind, value) for kind, value, _ in find_entities(text)}
+
+
+def as_entity(query):
+    """(kind, value) when the whole query is one entity (an exact-match pivot), else None."""
+    query = query.strip()
+    found = find_entities(query)
+    if len(found) == 1 and found[0][2] == (0, len(query)):
+        return found[0][:2]
+    return None
+
+
+def index_entities(conn, complaint_id, description, replace=False):
+    """Write the description's entities for one complaint, in the caller's transaction."""
+    entities = ComplaintEntity.__table__
+    if replace:
+        conn.execute(delete(entities).where(entities.c.complaint_id == complaint_id))
+    rows = [{"complaint_id": complaint_id, "kind": kind, "value": value}
+            for kind, value in sorted(extract_entities(description))]
+    if rows:
+        conn.execute(insert(entities), rows)
+    return len(rows)
+
+
+def complaint_indexed(db, complaint):
+    """Index a new complaint's entities; call after it is added and before the commit. Returns them."""
+    if complaint.id is None:
+        db.flush()
+    index_entities(db, complaint.id, complaint.description)
+    return extract_entities(complaint.description)
+
+
+# -------------------------------------------------------
+# 🔎 FTS5 external-content indexes, kept in sync by triggers
+# -------------------------------------------------------
+FTS_TABLES = {
+    # name: (content table, indexed columns)
+    "complaints_fts": ("complaints", ("description", "fraud_type", "district")),
+    "messages_fts": ("messages", ("message",)),
+}
+
+
+def fts_available():
+    if engine.dialect.name != "sqlite":
+        return False
+    try:
+        with engine.connect() as conn:
+            conn.execute(text("CREATE VIRTUAL TABLE IF NOT EXISTS temp.fts5_probe USING fts5(x)"))
+            conn.execute(text("DROP TABLE temp.fts5_probe"))
+        return True
+    except Exception:
+        return False
+
+
+FTS5 = None
+
+
+def use_fts():
+    global FTS5
+    if FTS5 is None:
+        FTS5 = fts_available()
+    return FTS5
+
+
+def fts_enabled(name):
+    return use_fts() and (name != "messages_fts" or SEARCH_MESSAGES)
+
+
+def _trigger_sql(name, content, columns):
+    cols = ", ".join(columns)
+    new = ", ".join(f"new.{c}" for c in columns)
+    old = ", ".join(f"old.{c}" for c in columns)
+    remove = f"INSERT INTO {name}({name}, rowid, {cols}) VALUES ('delete', old.id, {old});"
+    add = f"INSERT INTO {name}(rowid, {cols}) VALUES (new.id, {new});"
+    return [
+        f"CREATE TRIGGER IF NOT EXISTS {name}_ai AFTER INSERT ON {content} BEGIN {add} END",
+        f"CREATE TRIGGER IF NOT EXISTS {name}_ad AFTER DELETE ON {content} BEGIN {remove} END",
+        f"CREATE TRIGGER IF NOT EXISTS {name}_au AFTER UPDATE OF {cols} ON {content} BEGIN {remove} {add} END",
+    ]
+
+
+def ensure_fts():
+    """Create missing FTS tables and triggers; returns the names built from existing rows."""
+    if not use_fts():
+        return []
+    built = []
+    with engine.begin() as conn:
+        existing = set(conn.execute(text("SELECT name FROM sqlite_master")).scalars())
+        for name, (content, columns) in FTS_TABLES.items():
+            if not fts_enabled(name):
+                # Turned off: drop the triggers and the indexed copy; turning it back on rebuilds it
+                for suffix in ("ai", "ad", "au"):
+                    conn.execute(text(f"DROP TRIGGER IF EXISTS {name}_{suffix}"))
+                conn.execute(text(f"DROP TABLE IF EXISTS {name}"))
+                continue
+            if name not in existing:
+                conn.execute(text(
+                    f"CREATE VIRTUAL TABLE {name} USING fts5({', '.join(columns)}, "
+                    f"content='{content}', content_rowid='id', tokenize='{FTS_TOKENIZER}')"
+                ))
+            stale = name not in existing or f"{name}_ai" not in existing
+            for sql in _trigger_sql(name, content, columns):
+                conn.execute(text(sql))
+            if stale:
+                conn.execute(text(f"INSERT INTO {name}({name}) VALUES ('rebuild')"))
+                built.append(name)
+    return built
+
+
+def fts_query(query):
+    """User text -> FTS5 query: every word must match, `word*` is a prefix, operators are literal."""
+    terms = []
+    for word in query.split():
+        prefix = word.endswith("*")
+        word = word.rstrip("*").replace('"', '""')
+        if word:
+            terms.append(f'"{word}"' + ("*" if prefix else ""))
+    return " ".join(terms)
+
+
+# -------------------------------------------------------
+# 📋 Search
+# -------------------------------------------------------
+complaints_fts = table("complaints_fts", column("rowid"))
+messages_fts = table("messages_fts", column("rowid"))
+RESULT_COLUMNS = (Complaint.id, Complaint.ticket_number, Complaint.district, Complaint.fraud_type,
+                  Complaint.status, Complaint.date_created)
+
+
+def _complaint_row(row, snippet=None, rank=None):
+    item = {
+        "ticket_number": row.ticket_number,
+        "district": row.district,
+        "fraud_type": row.fraud_type,
+        "status": row.status,
+        "date_created": row.date_created.isoformat() if row.date_created else None,
+        "snippet": snippet,
+    }
+    if rank is not None:
+        item["rank"] = round(rank, 4)
+    return item
+
+
+def _filtered(q, status=None, district=None, fraud_type=None):
+    for column, value in ((Complaint.status, status), (Complaint.district, district),
+                          (Complaint.fraud_type, fraud_type)):
+        if value:
+            q = q.where(column == value)
+    return q
+
+
+def complaints_with_entity(kind, value, before_id=None, limit=50, **filters):
+    """Exact pivot on the (kind, value) index, newest first; page with before_id."""
+    entity = ComplaintEntity.__table__
+    q = (select(*RESULT_COLUMNS, Complaint.description)
+         .join(entity, entity.c.complaint_id == Complaint.id)
+         .where(entity.c.kind == kind, entity.c.value == value))
+    if before_id:
+        q = q.where(Complaint.id < before_id)
+    q = _filtered(q, **filters).order_by(Complaint.id.desc()).limit(limit + 1)
+    with engine.connect() as conn:
+        rows = conn.execute(q).all()
+        total = conn.execute(
+            select(func.count()).select_from(entity).where(entity.c.kind == kind, entity.c.value == value)
+        ).scalar()
+    more = len(rows) > limit
+    rows = rows[:limit]
+    return {
+        "mode": "entity",
+        "entity": {"kind": kind, "value": value, "complaints": total},
+        "items": [_complaint_row(r, _excerpt(r.description, value)) for r in rows],
+        "next_cursor": str(rows[-1].id) if more else None,
+    }
+
+
+def search_complaints(query, cursor=None, limit=50, **filters):
+    """
+    One page of complaints matching `query`. A query that is a single
+    entity (UPI ID, phone, URL, ...) pivots on complaint_entities; anything
+    else is ranked by bm25 over description, fraud type and district on
+    FTS5, or matched with LIKE (newest first) where FTS5 is unavailable.
+    """
+    query = (query or "").strip()
+    entity = as_entity(query)
+    if entity:
+        return complaints_with_entity(*entity, before_id=int(cursor) if cursor else None, limit=limit, **filters)
+    if not fts_query(query):
+        return {"mode": "empty", "items": [], "next_cursor": None}
+    if not use_fts():
+        return _like_complaints(query, int(cursor) if cursor else None, limit, **filters)
+
+    offset = max(0, min(int(cursor or 0), SEARCH_MAX_OFFSET))
+    # Description hits weigh most, then fraud type, then district
+    rank = func.bm25(literal_column("complaints_fts"), 10.0, 2.0, 1.0)
+    snippet = func.snippet(literal_column("complaints_fts"), 0, "[", "]", "…", 12)
+    q = (select(*RESULT_COLUMNS, snippet.label("snippet"), rank.label("rank"))
+         .select_from(Complaint.__table__.join(complaints_fts, complaints_fts.c.rowid == Complaint.id))
+         .where(text("complaints_fts MATCH :match").bindparams(match=fts_query(query))))
+    q = _filtered(q, **filters).order_by(rank).limit(limit + 1).offset(offset)
+    with engine.connect() as conn:
+        rows = conn.execute(q).all()
+    more = len(rows) > limit and offset + limit < SEARCH_MAX_OFFSET
+    return {
+        "mode": "fts",
+        "items": [_complaint_row(r, r.snippet, -r.rank) for r in rows[:limit]],
+        "next_cursor": str(offset + limit) if more else None,
+    }
+
+
+def _like_complaints(query, before_id, limit, **filters):
+    q = select(*RESULT_COLUMNS, Complaint.description)
+    for word in query.replace("*", " ").split():
+        q = q.where(Complaint.description.ilike(f"%{word}%"))
+    if before_id:
+        q = q.where(Complaint.id < before_id)
+    with engine.connect() as conn:
+        rows = conn.execute(_filtered(q, **filters).order_by(Complaint.id.desc()).limit(limit + 1)).all()
+    more = len(rows) > limit
+    rows = rows[:limit]
+    return {
+        "mode": "like",
+        "items": [_complaint_row(r, _excerpt(r.description, query.split()[0])) for r in rows],
+        "next_cursor": str(rows[-1].id) if more else None,
+    }
+
+
+def _excerpt(description, needle, width=60):
+    if not description:
+        return None
+    at = description.lower().find(needle.lower().rstrip("*"))
+    if at < 0:
+        return description[:2 * width]
+    start = max(0, at - width)
+    return ("…" if start else "") + description[start:at + len(needle) + width]
+
+
+def message_search_filter(query):
+    """WHERE clause for messages containing every word of `query` (FTS5 when indexed, else LIKE)."""
+    if fts_enabled("messages_fts") and fts_query(query):
+        return MessageLog.id.in_(
+            select(messages_fts.c.rowid)
+            .where(text("messages_fts MATCH :message_match").bindparams(message_match=fts_query(query)))
+        )
+    clause = None
+    for word in query.replace("*", " ").split() or [query]:
+        term = MessageLog.message.contains(word)
+        clause = term if clause is None else clause & term
+    return clause
+
+
+def top_entities(kind, limit=20):
+    """Most reported values of one kind, e.g. the UPI IDs named in the most complaints."""
+    entity = ComplaintEntity.__table__
+    n = func.count().label("complaints")
+    with engine.connect() as conn:
+        rows = conn.execute(
+            select(entity.c.value, n).where(entity.c.kind == kind)
+            .group_by(entity.c.value).order_by(n.desc()).limit(limit)
+        ).all()
+    return [{"value": value, "complaints": count} for value, count in rows]
+
+
+# -------------------------------------------------------
+# 🛠️ Backfill
+# -------------------------------------------------------
+def rebuild_entities(batch_size=1000):
+    """Re-extract entities for every complaint (after changing the extractors or on upgrade)."""
+    total, last_id = 0, 0
+    with engine.begin() as conn:
+        conn.execute(delete(ComplaintEntity.__table__))
+    while True:
+        with engine.begin() as conn:
+            rows = conn.execute(
+                select(Complaint.id, Complaint.description).where(Complaint.id > last_id)
+                .order_by(Complaint.id).limit(batch_size)
+            ).all()
+            if not rows:
+                break
+            batch = [{"complaint_id": r.id, "kind": kind, "value": value}
+                     for r in rows for kind, value in sorted(extract_entities(r.description))]
+            if batch:
+                conn.execute(insert(ComplaintEntity.__table__), batch)
+            total += len(batch)
+            last_id = rows[-1].id
+    return total
+
+
+def rebuild_fts():
+    rebuilt = []
+    with engine.begin() as conn:
+        for name in FTS_TABLES:
+            if fts_enabled(name):
+                conn.execute(text(f"INSERT INTO {name}({name}) VALUES ('rebuild')"))
+                conn.execute(text(f"INSERT INTO {name}({name}) VALUES ('optimize')"))
+                rebuilt.append(name)
+    return rebuilt
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rebuild the complaint entity index and FTS5 tables")
+    parser.add_argument("--entities", action="store_true", help="re-extract complaint entities")
+    parser.add_argument("--fts", action="store_true", help="rebuild and optimize the FTS5 indexes")
+    args = parser.parse_args()
+    started = time.perf_counter()
+    if args.entities or not args.fts:
+        print(f"✅ {rebuild_entities()} entities indexed")
+    if args.fts or not args.entities:
+        print(f"✅ Rebuilt {', '.join(rebuild_fts()) or 'nothing (FTS5 unavailable)'}")
+    print(f"⏱️ {time.perf_counter() - started:.1f}s")
@@ -0,0 +1,101 @@
+import threading
+import time
+from contextlib import contextmanager
+
+from backend.logs import get_logger
+
+log = get_logger("startup")
+
+
+# -------------------------------------------------------
+# ⏱️ Startup cost report: import and init time per subsystem
+# -------------------------------------------------------
+class StartupReport:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = []
+        self._origin = time.perf_counter()
+
+    def record(self, phase, subsystem, seconds, error=None):
+        with self._lock:
+            self._entries.append({
+                "phase": phase,
+                "subsystem": subsystem,
+                "ms": round(seconds * 1000, 2),
+                "error": error,
+            })
+
+    def as_dict(self):
+        with self._lock:
+            entries = list(self._entries)
+        totals = {}
+        for e in entries:
+            totals[e["phase"]] = round(totals.get(e["phase"], 0.0) + e["ms"], 2)
+        return {
+            "since_process_import_ms": round((time.perf_counter() - self._origin) * 1000, 2),
+            "totals_ms": totals,
+            "entries": entries,
+        }
+
+    def log_summary(self):
+        """One structured line per timed subsystem, then the totals per phase."""
+        report = self.as_dict()
+        for e in report["entries"]:
+            if e["error"]:
+                log.warning("⏱️ Startup phase failed", phase=e["phase"], subsystem=e["subsystem"], ms=e["ms"],
+                            error=e["error"])
+            else:
+                log.info("⏱️ Startup phase", phase=e["phase"], subsystem=e["subsystem"], ms=e["ms"])
+        log.info("⏱️ Startup finished", ms=report["since_process_import_ms"],
+                 **{f"{phase}_ms": ms for phase, ms in report["totals_ms"].items()})
+
+
+startup_report = StartupReport()
+
+
+@contextmanager
+def timed(phase, subsystem):
+    """Time a block into the startup report (failures are recorded, then re-raised)."""
+    started = time.perf_counter()
+    try:
+        yield
+    except Exception as e:
+        startup_report.record(phase, subsystem, time.perf_counter() - started, error=str(e))
+        raise
+    else:
+        startup_report.record(phase, subsystem, time.perf_counter() - started)
+
+
+class LazyResource:
+    """Thread-safe build-once holder for heavy objects (models, clients, keys)."""
+
+    def __init__(self, name, factory):
+        self.name = name
+        self.factory = factory
+        self._value = None
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self):
+        return self._loaded
+
+    def get(self):
+        if not self._loaded:
+            with self._lock:
+                if not self._loaded:
+                    with timed("init", self.name):
+                        self._value = self.factory()
+                    self._loaded = True
+        return self._value
+
+    def set(self, value):
+        """Swap in a new value (hot reload); readers see the old or the new one, never neither."""
+        with self._lock:
+            self._value = value
+            self._loaded = True
+
+    def reset(self):
+        with self._lock:
+            self._value = None
+            self._loaded = False
@@ -0,0 +1,134 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from backend.models import Complaint, phone_blind_index
+from backend.utils.tickets import normalize_ticket
+
+STATUS_CACHE_TTL = float(os.getenv("STATUS_CACHE_TTL", "60"))
+STATUS_CACHE_SIZE = int(os.getenv("STATUS_CACHE_SIZE", "20000"))
+
+_MISSING = object()
+
+
+# -------------------------------------------------------
+# ⚡ Read-through cache of status summaries
+# -------------------------------------------------------
+class StatusCache:
+    """
+    Small LRU of status summaries keyed by ("ticket", X) or ("phone", X).
+    "Not found" is cached too; registering a complaint or changing a status
+    invalidates the affected keys, and the TTL bounds staleness across workers.
+    """
+
+    def __init__(self, ttl=STATUS_CACHE_TTL, max_entries=STATUS_CACHE_SIZE):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None or item[0] <= time.monotonic():
+                self.misses += 1
+                return _MISSING
+            self._data.move_to_end(key)
+            self.hits += 1
+            return item[1]
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def invalidate(self, *keys):
+        with self._lock:
+            for key in keys:
+                self._data.pop(key, None)
+
+    def stats(self):
+        return {"entries": len(self._data), "hits": self.hits, "misses": self.misses}
+
+
+status_cache = StatusCache()
+
+
+def summarize(record):
+    return {
+        "name": record.name,
+        "ticket_number": record.ticket_number,
+        "fraud_type": record.fraud_type,
+        "district": record.district,
+        "media_files": record.media_files,
+        "status": record.status,
+        "phone_key": record.phone_key,
+    }
+
+
+def lookup_key(text):
+    """
+    Classify the citizen's input: tickets start with CYB-, anything else is
+    a phone number. A mistyped ticket (bad check character) is None, so it
+    never reaches the cache or the database.
+    """
+    value = (text or "").strip()
+    if value.upper().startswith("CYB-"):
+        ticket = normalize_ticket(value)
+        return ("ticket", ticket) if ticket else None
+    phone_key = phone_blind_index(value)
+    return ("phone", phone_key) if phone_key else None
+
+
+def lookup_status(db, text):
+    """
+    Status summary for a ticket number or phone number, or None.
+    Each branch is a single indexed lookup (unique ticket index, or
+    (phone_key, date_created) for the newest complaint from that number).
+    """
+    key = lookup_key(text)
+    if key is None:
+        return None
+    cached = status_cache.get(key)
+    if cached is not _MISSING:
+        return cached
+
+    kind, value = key
+    if kind == "ticket":
+        record = db.query(Complaint).filter(Complaint.ticket_number == value).first()
+    else:
+        record = (
+            db.query(Complaint)
+            .filter(Complaint.phone_key == value)
+            .order_by(Complaint.date_created.desc())
+            .first()
+        )
+    summary = summarize(record) if record else None
+    status_cache.put(key, summary)
+    return summary
+
+
+def invalidate_complaint(ticket_number=None, phone_key=None):
+    keys = []
+    if ticket_number:
+        keys.append(("ticket", ticket_number.upper()))
+    if phone_key:
+        keys.append(("phone", phone_key))
+    status_cache.invalidate(*keys)
+
+
+def format_status(summary):
+    return (
+        f"📋 *Complaint Status*\n"
+        f"👤 Name: {summary['name']}\n"
+        f"🆔 Ticket: {summary['ticket_number']}\n"
+        f"💬 Type: {summary['fraud_type']}\n"
+        f"📍 District: {summary['district']}\n"
+        f"📎 File: {summary['media_files'] or 'No files uploaded'}\n"
+        f"📦 Status: {summary['status']}"
+    )
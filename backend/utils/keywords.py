@@ -0,0 +1,160 @@
+import json
+import os
+import re
+import threading
+import unicodedata
+from collections import namedtuple
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+KEYWORD_RULES_FILE = os.getenv("KEYWORD_RULES_FILE", os.path.join(BASE_DIR, "data", "keywords.json"))
+
+Hit = namedtuple("Hit", "table priority category")
+
+
+def _mark_ranges():
+    """Regex class body for every BMP combining mark (vowel signs, virama...): \\w misses them."""
+    ranges, start, prev = [], None, None
+    for cp in range(0x10000):
+        if unicodedata.category(chr(cp)).startswith("M"):
+            if start is None:
+                start = cp
+            prev = cp
+        elif start is not None:
+            ranges.append(f"\\u{start:04x}-\\u{prev:04x}")
+            start = None
+    return "".join(ranges)
+
+
+# A keyword must not start or end inside a word; in Odia/Devanagari a word goes on through its marks
+WORD_CHAR = f"[\\w{_mark_ranges()}]"
+
+
+def _is_word_char(ch):
+    return ch.isalnum() or ch == "_" or unicodedata.category(ch).startswith("M")
+
+
+def _trie_regex(exact, stems):
+    """
+    Alternation of all keywords factored into a character trie, so the regex
+    engine branches on each next character instead of trying every keyword in
+    turn. Longer continuations are tried first; an exact keyword ends with a
+    word boundary, a stem ends unconditionally.
+    """
+    root = {}
+    for words, marker in ((exact, "exact"), (stems, "stem")):
+        for word in words:
+            node = root
+            for ch in word:
+                node = node.setdefault(ch, {})
+            node.setdefault("", set()).add(marker)
+
+    def build(node):
+        branches = [re.escape(ch) + build(child) for ch, child in sorted(node.items()) if ch]
+        ends = node.get("", ())
+        if "stem" in ends:
+            branches.append("")
+        elif "exact" in ends:
+            branches.append(f"(?!{WORD_CHAR})")
+        if len(branches) == 1:
+            return branches[0]
+        return "(?:" + "|".join(branches) + ")"
+
+    return build(root)
+
+
+# -------------------------------------------------------
+# 🔎 Single-pass keyword classifier
+# -------------------------------------------------------
+class KeywordEngine:
+    """
+    Compiles every rule table (intent, fraud category, advice, grievance...)
+    into one regex and scans the text once, returning each matching category
+    of each table with its priority (its position in the table).
+
+    Keywords match whole words/phrases; "stem*" also matches continuations
+    ("scam*" -> scammed). The pattern is a zero-width lookahead, so matches
+    starting at different positions may overlap ("debit card" and "card").
+    A match at one position also counts every keyword that is a word-prefix
+    of it ("loan app" also hits "loan").
+    """
+
+    def __init__(self, tables):
+        self.tables = tables
+        self.defaults = {}
+        self.responses = {}
+        exact, stems = {}, {}
+        for table, spec in tables.items():
+            if table.startswith("_"):
+                continue
+            self.defaults[table] = spec.get("default")
+            for priority, rule in enumerate(spec["rules"]):
+                hit = Hit(table, priority, rule["category"])
+                if "response" in rule:
+                    self.responses[(table, rule["category"])] = rule["response"]
+                for keyword in rule["keywords"]:
+                    keyword = keyword.lower()
+                    if keyword.endswith("*"):
+                        stems.setdefault(keyword[:-1], set()).add(hit)
+                    else:
+                        exact.setdefault(keyword, set()).add(hit)
+
+        # Fold shorter keywords that are prefixes of a longer one into its hit set
+        self._lookup = {}
+        for literal in set(exact) | set(stems):
+            hits = set()
+            for e, e_hits in exact.items():
+                if literal == e or (literal.startswith(e) and not _is_word_char(literal[len(e)])):
+                    hits |= e_hits
+            for s, s_hits in stems.items():
+                if literal.startswith(s):
+                    hits |= s_hits
+            self._lookup[literal] = hits
+
+        self.pattern = re.compile(f"(?<!{WORD_CHAR})(?=({_trie_regex(exact, stems)}))")
+
+    @classmethod
+    def from_file(cls, path=KEYWORD_RULES_FILE):
+        with open(path, encoding="utf-8") as f:
+            return cls(json.load(f))
+
+    def scan(self, text):
+        """{table: [Hit, ...]} sorted by priority, for every table with a hit."""
+        found = {}
+        for match in self.pattern.finditer((text or "").lower()):
+            for hit in self._lookup[match.group(1)]:
+                found.setdefault(hit.table, set()).add(hit)
+        return {table: sorted(hits) for table, hits in found.items()}
+
+    def classify(self, text, table, scanned=None):
+        """Highest-priority category in `table`, or the table's default."""
+        hits = (scanned if scanned is not None else self.scan(text)).get(table)
+        return hits[0].category if hits else self.defaults.get(table)
+
+    def respond(self, text, table, scanned=None):
+        """Response text of the highest-priority rule in `table`, or the table's default."""
+        hits = (scanned if scanned is not None else self.scan(text)).get(table)
+        if hits:
+            return self.responses.get((table, hits[0].category), self.defaults.get(table))
+        return self.defaults.get(table)
+
+
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def get_engine():
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = KeywordEngine.from_file()
+    return _engine
+
+
+def reload_rules(path=KEYWORD_RULES_FILE):
+    """Recompile after editing the rules file."""
+    global _engine
+    engine = KeywordEngine.from_file(path)
+    with _engine_lock:
+        _engine = engine
+    return engine
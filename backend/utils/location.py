@@ -1,8 +1,210 @@
-import requests
-
-def get_location():
-    try:
-        loc = requests.get("https://ipapi.co/json/").json()
-        return loc.get("city"), loc.get("region")
-    except:
-        return None, None
+import csv
+import difflib
+import math
+import os
+import re
+from collections import namedtuple
+
+from backend.startup import LazyResource
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+POLICE_STATIONS_FILE = os.getenv("POLICE_STATIONS_FILE", os.path.join(BASE_DIR, "data", "police_stations.csv"))
+FALLBACK_PHONE = "+91100"
+
+Station = namedtuple("Station", "name district pincode lat lon phone")
+
+FALLBACK_STATION = Station("Local Police Station", None, None, None, None, FALLBACK_PHONE)
+
+# Words that don't identify a place ("Puri PS", "cuttack thana", "khurda district")
+_NOISE = {"police", "station", "ps", "thana", "district", "dist", "town", "city", "odisha", "orissa", "near"}
+# Common parts of locality names ("Saheed Nagar", "Jeypore", "Rasulgarh"): never matched on their own
+_COMMON_WORDS = {"nagar", "pur", "puram", "para", "pada", "pali", "patna", "garh", "sahi", "basti", "colony",
+                 "road", "chowk", "bazar", "market", "village", "post", "block", "sector", "new", "old", "main"}
+SKELETON_MIN_RATIO = 0.75  # spelling similarity a skeleton match must also reach
+_NON_LETTERS = re.compile(r"[^a-z]+")
+_PIN = re.compile(r"(?<!\d)(\d{6})(?!\d)")
+
+
+def normalize_name(text):
+    """'Bhubaneswar P.S.' -> 'bhubaneswar'; lowercase letters only, noise words dropped."""
+    words = _NON_LETTERS.split((text or "").lower())
+    # Single letters are initials ("P.S.", "P.O.")
+    return " ".join(w for w in words if len(w) > 1 and w not in _NOISE)
+
+
+def skeleton(name):
+    """Spelling-tolerant key: first letter, then consonants with h dropped and repeats collapsed."""
+    name = name.replace(" ", "")
+    if not name:
+        return ""
+    out = [name[0]]
+    for ch in name[1:]:
+        if ch in "aeiouyh" or ch == out[-1]:
+            continue
+        out.append(ch)
+    return "".join(out)
+
+
+# -------------------------------------------------------
+# 🌳 2-d tree over projected station coordinates
+# -------------------------------------------------------
+def _project(lat, lon):
+    """Equirectangular km; accurate enough across one state."""
+    return (math.radians(lon) * math.cos(math.radians(20.5)) * 6371.0, math.radians(lat) * 6371.0)
+
+
+class KDTree:
+    def __init__(self, items):
+        """items: [((x, y), value), ...]"""
+        self.root = self._build(list(items), 0)
+
+    def _build(self, items, depth):
+        if not items:
+            return None
+        axis = depth % 2
+        items.sort(key=lambda item: item[0][axis])
+        mid = len(items) // 2
+        return (items[mid], axis, self._build(items[:mid], depth + 1), self._build(items[mid + 1:], depth + 1))
+
+    def nearest(self, point):
+        """(distance, value) of the closest item, or None for an empty tree."""
+        best = [math.inf, None]
+
+        def visit(node):
+            if node is None:
+                return
+            (coords, value), axis, left, right = node
+            d = math.dist(point, coords)
+            if d < best[0]:
+                best[0], best[1] = d, value
+            diff = point[axis] - coords[axis]
+            near, far = (left, right) if diff < 0 else (right, left)
+            visit(near)
+            if abs(diff) < best[0]:
+                visit(far)
+
+        visit(self.root)
+        return None if best[1] is None else (best[0], best[1])
+
+
+# -------------------------------------------------------
+# 🚔 Police station directory
+# -------------------------------------------------------
+class StationDirectory:
+    """
+    Police stations indexed once by PIN code, district, station name/alias
+    (normalized and spelling-skeleton keys) and location. All lookups are
+    dict hits or a tree search; spelling-tolerant matching is only tried
+    after exact names, the PIN and the district have all failed.
+    """
+
+    def __init__(self, stations, aliases=None):
+        self.stations = stations
+        self.by_pin = {}
+        self.by_district = {}
+        self.by_name = {}
+        self.by_skeleton = {}
+        for station, names in zip(stations, aliases or [[] for _ in stations]):
+            self.by_pin.setdefault(station.pincode, station)
+            self.by_district.setdefault(normalize_name(station.district), station)
+            for name in [station.name, *names]:
+                self._add_name(name, station)
+        self.by_pin_prefix = {length: {} for length in (5, 4, 3)}
+        for pin, station in sorted(self.by_pin.items()):
+            for length, index in self.by_pin_prefix.items():
+                index.setdefault(pin[:length], station)
+        # District HQ stations answer for the district name too
+        for key, station in self.by_district.items():
+            self.by_name.setdefault(key, station)
+            self.by_skeleton.setdefault(skeleton(key), key)
+        self.tree = KDTree(
+            (_project(s.lat, s.lon), s) for s in stations if s.lat is not None and s.lon is not None
+        )
+
+    def _add_name(self, name, station):
+        key = normalize_name(name)
+        if key:
+            self.by_name.setdefault(key, station)
+            self.by_skeleton.setdefault(skeleton(key), key)
+
+    @classmethod
+    def from_file(cls, path=POLICE_STATIONS_FILE):
+        stations, aliases = [], []
+        with open(path, encoding="utf-8", newline="") as f:
+            for row in csv.DictReader(f):
+                stations.append(Station(
+                    name=row["station"],
+                    district=row["district"],
+                    pincode=row["pincode"],
+                    lat=float(row["lat"]) if row["lat"] else None,
+                    lon=float(row["lon"]) if row["lon"] else None,
+                    phone=row["phone"] or FALLBACK_PHONE,
+                ))
+                aliases.append([a for a in row["aliases"].split("|") if a])
+        return cls(stations, aliases)
+
+    def by_pincode(self, pincode):
+        """Exact PIN, else the station sharing the longest PIN prefix (same postal division)."""
+        pincode = (pincode or "").strip()
+        if pincode in self.by_pin:
+            return self.by_pin[pincode]
+        for length in (5, 4, 3):
+            station = self.by_pin_prefix[length].get(pincode[:length])
+            if station:
+                return station
+        return None
+
+    def by_name_text(self, text, fuzzy=True, district=None):
+        """
+        Station for free text naming a station, town or district: the exact
+        name, or one exact word of it ("saheed nagar, bhubaneswar"). With
+        fuzzy, misspellings match too, restricted to `district` when given.
+        """
+        key = normalize_name(text)
+        if not key or key in _COMMON_WORDS:
+            return None
+        # "near old town, bhubaneswar" -> try each word, but never "nagar" or "pur" alone
+        words = [w for w in key.split() if w not in _COMMON_WORDS]
+        for candidate in [key, *words]:
+            if candidate in self.by_name:
+                return self.by_name[candidate]
+        if not fuzzy:
+            return None
+        for candidate in [key, *(w for w in words if len(w) >= 4)]:
+            name = self.by_skeleton.get(skeleton(candidate))
+            if name and difflib.SequenceMatcher(None, candidate, name).ratio() >= SKELETON_MIN_RATIO:
+                station = self.by_name[name]
+                if district is None or station.district == district:
+                    return station
+        names = self.by_name if district is None else [n for n, s in self.by_name.items() if s.district == district]
+        close = difflib.get_close_matches(key, names, n=1, cutoff=0.8)
+        return self.by_name[close[0]] if close else None
+
+    def nearest(self, lat, lon):
+        found = self.tree.nearest(_project(lat, lon))
+        return found[1] if found else None
+
+    def resolve(self, police_station=None, district=None, pincode=None):
+        """
+        Best station for what the user typed: exact station name, then PIN,
+        then district (a misspelt station inside it first), and only then a
+        spelling-tolerant match on the station or district name.
+        """
+        if not pincode:
+            typed_pin = _PIN.search(police_station or "")
+            pincode = typed_pin.group(1) if typed_pin else None
+        station = self.by_name_text(police_station, fuzzy=False) or self.by_pincode(pincode)
+        if station:
+            return station
+        in_district = self.by_district.get(normalize_name(district)) or self.by_name_text(district, fuzzy=False)
+        if in_district:
+            return self.by_name_text(police_station, district=in_district.district) or in_district
+        return self.by_name_text(police_station) or self.by_name_text(district) or FALLBACK_STATION
+
+
+station_directory = LazyResource("police_stations", StationDirectory.from_file)
+
+
+def get_location(lat, lon):
+    """Nearest police station to a WhatsApp location share (no network call)."""
+    return station_directory.get().nearest(float(lat), float(lon)) or FALLBACK_STATION
@@ -0,0 +1,128 @@
+import base64
+import hashlib
+import os
+import tempfile
+from collections import namedtuple
+
+MEDIA_ROOT = os.getenv("MEDIA_ROOT", "media")
+MEDIA_MAX_BYTES = int(os.getenv("MEDIA_MAX_BYTES", str(25 * 1024 * 1024)))
+CHUNK_SIZE = 64 * 1024
+
+StoredMedia = namedtuple("StoredMedia", "path sha256 size mime deduped")
+
+
+class MediaTooLarge(Exception):
+    pass
+
+
+# Leading bytes -> (mime, extension). Checked in order.
+MAGIC_NUMBERS = [
+    (b"\x89PNG\r\n\x1a\n", "image/png", ".png"),
+    (b"\xff\xd8\xff", "image/jpeg", ".jpg"),
+    (b"GIF87a", "image/gif", ".gif"),
+    (b"GIF89a", "image/gif", ".gif"),
+    (b"%PDF-", "application/pdf", ".pdf"),
+    (b"OggS", "audio/ogg", ".ogg"),
+    (b"PK\x03\x04", "application/zip", ".zip"),
+]
+SNIFF_BYTES = 16
+
+# Declared types trusted when no magic number matches. Anything else (text/html,
+# image/svg+xml, ...) is stored as .bin so it can never be served as active content.
+DECLARED_TYPES = {
+    "application/vnd.openxmlformats-officedocument.wordprocessingml.document": ".docx",
+    "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet": ".xlsx",
+    "application/vnd.openxmlformats-officedocument.presentationml.presentation": ".pptx",
+    "application/msword": ".doc",
+    "application/vnd.ms-excel": ".xls",
+    "application/vnd.ms-powerpoint": ".ppt",
+    "audio/mpeg": ".mp3",
+    "audio/aac": ".aac",
+    "audio/amr": ".amr",
+    "audio/mp4": ".m4a",
+    "video/3gpp": ".3gp",
+    "text/plain": ".txt",
+}
+UNKNOWN = ("application/octet-stream", ".bin")
+
+
+def sniff_mime(head, declared=None):
+    """Detect the real type from the first bytes, else an allowlisted declared type, else .bin."""
+    declared = (declared or "").split(";")[0].strip().lower()
+    for magic, mime, ext in MAGIC_NUMBERS:
+        if head.startswith(magic):
+            # Office documents are zip containers; trust a declared OOXML type
+            if mime == "application/zip" and "officedocument" in declared and declared in DECLARED_TYPES:
+                return declared, DECLARED_TYPES[declared]
+            return mime, ext
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "image/webp", ".webp"
+    if head[4:8] == b"ftyp":
+        return "video/mp4", ".mp4"
+    if declared in DECLARED_TYPES and "officedocument" not in declared:
+        return declared, DECLARED_TYPES[declared]
+    return UNKNOWN
+
+
+def shard_path(sha256, ext, root=MEDIA_ROOT):
+    """media/ab/cd/abcd...ext — two levels keep every directory small."""
+    return os.path.join(root, sha256[:2], sha256[2:4], sha256 + ext)
+
+
+def store_stream(chunks, declared_mime=None, max_bytes=MEDIA_MAX_BYTES, root=MEDIA_ROOT):
+    """
+    Stream an iterable of byte chunks into the content-addressed store.
+    Hashes while writing, aborts past max_bytes, and drops the copy if the
+    same evidence is already stored. Memory use is one chunk at a time.
+    """
+    tmp_dir = os.path.join(root, "tmp")
+    os.makedirs(tmp_dir, exist_ok=True)
+    digest = hashlib.sha256()
+    head = b""
+    size = 0
+
+    fd, tmp_path = tempfile.mkstemp(dir=tmp_dir)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            for chunk in chunks:
+                if not chunk:
+                    continue
+                size += len(chunk)
+                if size > max_bytes:
+                    raise MediaTooLarge(f"attachment exceeds {max_bytes} bytes")
+                if len(head) < SNIFF_BYTES:
+                    head += chunk[:SNIFF_BYTES - len(head)]
+                digest.update(chunk)
+                f.write(chunk)
+
+        sha256 = digest.hexdigest()
+        mime, ext = sniff_mime(head, declared_mime)
+        final_path = shard_path(sha256, ext, root)
+        if os.path.exists(final_path):
+            os.remove(tmp_path)
+            return StoredMedia(final_path, sha256, size, mime, True)
+
+        os.makedirs(os.path.dirname(final_path), exist_ok=True)
+        os.replace(tmp_path, final_path)
+        return StoredMedia(final_path, sha256, size, mime, False)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def iter_base64(b64str, chunk_chars=CHUNK_SIZE):
+    """Decode base64 text in fixed-size slices instead of one big buffer."""
+    carry = ""
+    for start in range(0, len(b64str), chunk_chars):
+        piece = carry + "".join(b64str[start:start + chunk_chars].split())
+        usable = len(piece) - len(piece) % 4
+        carry = piece[usable:]
+        if usable:
+            yield base64.b64decode(piece[:usable])
+    if carry:
+        yield base64.b64decode(carry + "=" * (-len(carry) % 4))
+
+
+def store_base64(b64str, declared_mime=None, max_bytes=MEDIA_MAX_BYTES, root=MEDIA_ROOT):
+    return store_stream(iter_base64(b64str), declared_mime, max_bytes, root)
@@ -0,0 +1,232 @@
+import os
+import random
+import re
+import secrets
+import socket
+import threading
+import time
+from datetime import datetime, timezone
+
+# -------------------------------------------------------
+# 🎫 Ticket IDs: Snowflake layout, Crockford base32, Luhn mod 32 check
+# -------------------------------------------------------
+# 41 bits of milliseconds since TICKET_EPOCH | 10 bits worker | 12 bits sequence
+TICKET_EPOCH_MS = 1704067200000  # 2024-01-01T00:00:00Z
+WORKER_BITS = 10
+SEQUENCE_BITS = 12
+MAX_WORKER = (1 << WORKER_BITS) - 1
+MAX_SEQUENCE = (1 << SEQUENCE_BITS) - 1
+TICKET_WORKER_ID = os.getenv("TICKET_WORKER_ID")
+# Without TICKET_WORKER_ID each process leases a free worker ID in ticket_workers for this long, renewed as it issues
+TICKET_LEASE_SECONDS = float(os.getenv("TICKET_LEASE_SECONDS", "600"))
+
+ALPHABET = "0123456789ABCDEFGHJKMNPQRSTVWXYZ"  # Crockford: no I, L, O, U
+_VALUE = {ch: i for i, ch in enumerate(ALPHABET)}
+# Characters people confuse with Crockford symbols
+_ALIASES = str.maketrans({"O": "0", "I": "1", "L": "1"})
+PAYLOAD_CHARS = 13  # 63 bits
+
+TICKET_RE = re.compile(r"CYB-([0-9A-HJKMNP-TV-Z]{6})-([0-9A-HJKMNP-TV-Z]{8})")
+# Formats issued before this service; they have no check character
+LEGACY_TICKET_RE = re.compile(r"CYB-(?:[0-9A-F]{8}|\d{8}-\d{4})")
+
+
+def luhn_check_char(payload):
+    """Luhn mod 32 check character: catches any single typo and most adjacent swaps."""
+    factor, total = 2, 0
+    for ch in reversed(payload):
+        addend = factor * _VALUE[ch]
+        total += addend // 32 + addend % 32
+        factor = 1 if factor == 2 else 2
+    return ALPHABET[(32 - total % 32) % 32]
+
+
+def encode(number):
+    chars = []
+    for _ in range(PAYLOAD_CHARS):
+        number, rem = divmod(number, 32)
+        chars.append(ALPHABET[rem])
+    return "".join(reversed(chars))
+
+
+def format_ticket(snowflake):
+    """CYB-XXXXXX-XXXXXXXC: fixed width, so string order is issue order."""
+    payload = encode(snowflake)
+    body = payload + luhn_check_char(payload)
+    return f"CYB-{body[:6]}-{body[6:]}"
+
+
+class WorkerLease:
+    """
+    A worker ID leased from the ticket_workers table, which every process
+    and host on the database shares. A free or expired ID is claimed with an
+    insert-or-nothing / conditional update, so two processes never hold the
+    same one. The holder renews before issuing once a third of the lease has
+    passed, and claims a new ID if its lease was lost meanwhile.
+    """
+
+    def __init__(self, seconds=TICKET_LEASE_SECONDS, clock=time.time):
+        self.seconds = seconds
+        self._clock = clock
+        self.holder = f"{socket.gethostname()[:60]}:{os.getpid()}:{secrets.token_hex(4)}"
+        self.worker_id = None
+        self._renewed = 0.0
+
+    def current(self):
+        now = self._clock()
+        if self.worker_id is None or (now - self._renewed > self.seconds / 3 and not self._renew(now)):
+            self.worker_id = self._claim(now)
+            self._renewed = now
+        return self.worker_id
+
+    def _renew(self, now):
+        from sqlalchemy import update
+        from backend.init_db import engine
+        from backend.models import TicketWorker
+        table = TicketWorker.__table__
+        with engine.begin() as conn:
+            renewed = conn.execute(
+                update(table).where(table.c.worker_id == self.worker_id, table.c.holder == self.holder)
+                .values(expires_at=datetime.utcfromtimestamp(now + self.seconds))
+            ).rowcount
+        if renewed:
+            self._renewed = now
+        return bool(renewed)
+
+    def _claim(self, now):
+        from sqlalchemy import select, update
+        from backend.init_db import dialect_insert, engine
+        from backend.models import TicketWorker
+        table = TicketWorker.__table__
+        moment = datetime.utcfromtimestamp(now)
+        values = {"holder": self.holder, "expires_at": datetime.utcfromtimestamp(now + self.seconds)}
+        for _ in range(MAX_WORKER + 1):
+            with engine.connect() as conn:
+                leases = dict(conn.execute(select(table.c.worker_id, table.c.expires_at)).all())
+            free = [w for w in range(MAX_WORKER + 1) if w not in leases or leases[w] < moment]
+            if not free:
+                break
+            worker_id = random.choice(free)  # spread processes starting together over different IDs
+            with engine.begin() as conn:
+                if worker_id in leases:
+                    claimed = conn.execute(update(table).where(
+                        table.c.worker_id == worker_id, table.c.expires_at < moment).values(**values)).rowcount
+                else:
+                    claimed = conn.execute(dialect_insert(table).values(worker_id=worker_id, **values)
+                                           .on_conflict_do_nothing(index_elements=["worker_id"])).rowcount
+            if claimed:
+                return worker_id
+        raise RuntimeError(f"No free ticket worker ID among {MAX_WORKER + 1}; set TICKET_WORKER_ID")
+
+    def release(self):
+        """Hand the ID back at shutdown instead of letting it expire."""
+        if self.worker_id is None:
+            return
+        from sqlalchemy import delete
+        from backend.init_db import engine
+        from backend.models import TicketWorker
+        table = TicketWorker.__table__
+        with engine.begin() as conn:
+            conn.execute(delete(table).where(table.c.worker_id == self.worker_id, table.c.holder == self.holder))
+        self.worker_id = None
+
+
+class TicketGenerator:
+    """
+    Monotonic, time-sortable IDs without a database round trip per ticket.
+    Processes differ by worker ID: TICKET_WORKER_ID when set, else one leased
+    from the database (see WorkerLease), since pids repeat across hosts and
+    containers. Within a process a lock-protected sequence orders IDs issued
+    in the same millisecond. If the clock steps back, the last timestamp is
+    reused.
+    """
+
+    def __init__(self, worker_id=None, clock=time.time, lease=None):
+        if worker_id is None and TICKET_WORKER_ID is not None:
+            worker_id = int(TICKET_WORKER_ID)
+        self.worker_id = None if worker_id is None else worker_id & MAX_WORKER
+        self.lease = lease or (WorkerLease(clock=clock) if self.worker_id is None else None)
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._last_ms = -1
+        self._sequence = 0
+
+    def next_id(self):
+        with self._lock:
+            worker_id = self.worker_id if self.lease is None else self.lease.current()
+            now = int(self._clock() * 1000) - TICKET_EPOCH_MS
+            if now <= self._last_ms:
+                self._sequence = (self._sequence + 1) & MAX_SEQUENCE
+                if self._sequence == 0:
+                    # 4096 IDs in one millisecond: borrow the next one
+                    self._last_ms += 1
+                now = self._last_ms
+            else:
+                self._sequence = 0
+                self._last_ms = now
+            return (now << (WORKER_BITS + SEQUENCE_BITS)) | (worker_id << SEQUENCE_BITS) | self._sequence
+
+    def new_ticket(self):
+        return format_ticket(self.next_id())
+
+
+_generator = TicketGenerator()
+
+
+def _reset_after_fork():
+    # A forked worker must not share the parent's worker ID (or lease) and sequence
+    global _generator
+    _generator = TicketGenerator()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def new_ticket():
+    return _generator.new_ticket()
+
+
+def release_worker_id():
+    if _generator.lease is not None:
+        _generator.lease.release()
+
+
+def normalize_ticket(text):
+    """
+    Canonical ticket number for what the user typed, or None when it cannot
+    be one (wrong shape or failed check character). Legacy tickets pass
+    through unchecked. No database access.
+    """
+    value = re.sub(r"\s+", "", (text or "")).upper()
+    if LEGACY_TICKET_RE.fullmatch(value):
+        return value
+    if value.startswith("CYB-"):
+        value = "CYB-" + value[4:].translate(_ALIASES)
+    match = TICKET_RE.fullmatch(value)
+    if not match:
+        return None
+    body = match.group(1) + match.group(2)
+    if luhn_check_char(body[:-1]) != body[-1]:
+        return None
+    return value
+
+
+def is_valid_ticket(text):
+    return normalize_ticket(text) is not None
+
+
+def parse_ticket(ticket):
+    """(issued_at UTC, worker_id, sequence) of a current-format ticket, or None."""
+    value = normalize_ticket(ticket)
+    if not value or not TICKET_RE.fullmatch(value):
+        return None
+    number = 0
+    for ch in (value[4:10] + value[11:18]):
+        number = number * 32 + _VALUE[ch]
+    ms = (number >> (WORKER_BITS + SEQUENCE_BITS)) + TICKET_EPOCH_MS
+    return (
+        datetime.fromtimestamp(ms / 1000, tz=timezone.utc),
+        (number >> SEQUENCE_BITS) & MAX_WORKER,
+        number & MAX_SEQUENCE,
+    )
@@ -1,16 +1,386 @@
-from googletrans import Translator
+import asyncio
+import hashlib
+import math
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import Counter, OrderedDict
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+
+from backend.logs import get_logger
+from backend.startup import LazyResource
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+REMOTE_TRANSLATOR = os.getenv("REMOTE_TRANSLATOR", "google")  # "google", "stub" or "none"
+TRANSLATE_TIMEOUT = float(os.getenv("TRANSLATE_TIMEOUT", "3"))
+TRANSLATION_CACHE_PATH = os.getenv("TRANSLATION_CACHE_PATH", os.path.join(BASE_DIR, "../translations.db"))
+TRANSLATION_CACHE_SIZE = int(os.getenv("TRANSLATION_CACHE_SIZE", "5000"))  # in memory
+TRANSLATION_DISK_MAX = int(os.getenv("TRANSLATION_DISK_MAX", "200000"))
+BREAKER_FAILURES = int(os.getenv("TRANSLATE_BREAKER_FAILURES", "5"))
+BREAKER_RESET_SECONDS = float(os.getenv("TRANSLATE_BREAKER_RESET_SECONDS", "60"))
+
+log = get_logger("translator")
+
+
+# -------------------------------------------------------
+# 🔤 Local language detection (script first, then character n-grams)
+# -------------------------------------------------------
+SCRIPT_RANGES = {
+    "or": (0x0B00, 0x0B7F),  # Odia
+    "hi": (0x0900, 0x097F),  # Devanagari
+}
+
+# Seed text for romanized Hindi vs English trigram profiles
+_SEED = {
+    "hi": (
+        "mera paisa kat gaya hai kripya madad kijiye mujhe ek call aaya tha usne otp manga "
+        "maine link par click kiya aur mere khate se paise nikal gaye mera account band ho gaya hai "
+        "kya aap meri shikayat ki sthiti bata sakte hain main bahut pareshan hoon bhai kuch karo "
+        "unhone kaha ki loan mil jayega aur phir paise maange abhi tak koi jawab nahi aaya"
+    ),
+    "en": (
+        "my money was deducted please help me i received a call and they asked for the otp "
+        "i clicked on the link and money was taken from my account my account has been frozen "
+        "can you tell me the status of my complaint i am very worried please do something "
+        "they said i would get a loan and then asked for money there has been no reply yet"
+    ),
+}
+
+
+def _trigrams(text):
+    padded = f"  {text} "
+    return Counter(padded[i:i + 3] for i in range(len(padded) - 2))
+
+
+def _build_profiles():
+    profiles = {}
+    for lang, seed in _SEED.items():
+        counts = _trigrams(seed)
+        total = sum(counts.values())
+        vocab = len(counts) + 1
+        # add-one smoothed log probabilities; unseen trigrams get the floor value
+        profiles[lang] = (
+            {g: math.log((c + 1) / (total + vocab)) for g, c in counts.items()},
+            math.log(1 / (total + vocab)),
+        )
+    return profiles
+
+
+_PROFILES = _build_profiles()
+_WORDS = re.compile(r"[a-z]+")
 
-translator_instance = Translator()
 
 def detect_language(text):
-    try:
-        return translator_instance.detect(text).lang
-    except:
+    """
+    'or', 'hi' or 'en' without a network call. Native scripts are decided by
+    Unicode block; Latin text is scored against romanized-Hindi and English
+    character trigram profiles.
+    """
+    text = (text or "").strip()
+    if not text:
+        return "en"
+    counts = Counter()
+    for ch in text:
+        cp = ord(ch)
+        for lang, (lo, hi) in SCRIPT_RANGES.items():
+            if lo <= cp <= hi:
+                counts[lang] += 1
+                break
+        else:
+            if "a" <= ch.lower() <= "z":
+                counts["latin"] += 1
+    if not counts:
         return "en"
+    top, n = counts.most_common(1)[0]
+    if top != "latin":
+        return top
+    if n < 8:  # too short to tell ("hi", "a", "ok"): treat as English
+        return "en"
+    grams = _trigrams(" ".join(_WORDS.findall(text.lower())))
+    scores = {}
+    for lang, (probs, floor) in _PROFILES.items():
+        scores[lang] = sum(probs.get(g, floor) * c for g, c in grams.items())
+    return max(scores, key=scores.get)
+
+
+# -------------------------------------------------------
+# 💾 Persistent LRU translation cache (memory front, SQLite behind)
+# -------------------------------------------------------
+# Short replies citizens send over and over; anything else a citizen types is never cached
+COMMON_REPLIES = frozenset({
+    "yes", "no", "ok", "okay", "thanks", "thank you", "hi", "hello", "help", "status", "menu",
+    "haan", "han", "ha", "nahi", "nahin", "ji", "theek hai", "dhanyavad", "shukriya",
+})
+
+
+def reply_key(text):
+    return " ".join((text or "").lower().split())
+
+
+class TranslationCache:
+    """
+    Translations of bot prompts and COMMON_REPLIES only (see
+    TranslationService.cacheable), so citizens' own messages are never
+    written to disk.
+    """
+
+    def __init__(self, path=TRANSLATION_CACHE_PATH, size=TRANSLATION_CACHE_SIZE, disk_max=TRANSLATION_DISK_MAX):
+        self.path = path
+        self.size = size
+        self.disk_max = disk_max
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._writes = 0
+        self.hits = 0
+        self.misses = 0
+        if self.path:
+            conn = self._conn()
+            # Older versions cached every translation, citizens' messages included
+            conn.execute("DROP TABLE IF EXISTS translations")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS prompt_translations ("
+                "key TEXT PRIMARY KEY, result TEXT NOT NULL, used_at REAL NOT NULL)"
+            )
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def key(text, src, dest):
+        return hashlib.sha1(f"{src}|{dest}|{text}".encode()).hexdigest()
+
+    def get(self, text, src, dest):
+        k = self.key(text, src, dest)
+        with self._lock:
+            if k in self._memory:
+                self._memory.move_to_end(k)
+                self.hits += 1
+                return self._memory[k]
+        row = None
+        if self.path:
+            row = self._conn().execute("SELECT result FROM prompt_translations WHERE key = ?", (k,)).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._remember(k, row[0])
+        return row[0]
+
+    def put(self, text, src, dest, result):
+        k = self.key(text, src, dest)
+        self._remember(k, result)
+        if not self.path:
+            return
+        conn = self._conn()
+        conn.execute(
+            "INSERT OR REPLACE INTO prompt_translations (key, result, used_at) VALUES (?, ?, ?)",
+            (k, result, time.time()),
+        )
+        self._writes += 1
+        if self._writes % 1000 == 0:
+            conn.execute(
+                "DELETE FROM prompt_translations WHERE key IN (SELECT key FROM prompt_translations "
+                "ORDER BY used_at DESC LIMIT -1 OFFSET ?)",
+                (self.disk_max,),
+            )
+
+    def _remember(self, k, result):
+        with self._lock:
+            self._memory[k] = result
+            self._memory.move_to_end(k)
+            while len(self._memory) > self.size:
+                self._memory.popitem(last=False)
+
+    def stats(self):
+        return {"memory_entries": len(self._memory), "hits": self.hits, "misses": self.misses}
+
+
+# -------------------------------------------------------
+# 🌐 Remote translators behind a circuit breaker
+# -------------------------------------------------------
+class GoogleTranslator:
+    """googletrans web client (optional, imported on first use)."""
+
+    def __init__(self):
+        self._client = LazyResource("googletrans", self._build)
+
+    @staticmethod
+    def _build():
+        from googletrans import Translator  # heavy import (httpx, hstspreload)
+        return Translator()
+
+    def translate(self, text, src, dest):
+        return self._client.get().translate(text, src=src or "auto", dest=dest).text
+
+
+class StubTranslator:
+    """Deterministic stand-in for tests: canned answers, else '[dest] text'."""
+
+    def __init__(self, table=None, fail=False, delay=0.0):
+        self.table = table or {}
+        self.fail = fail
+        self.delay = delay
+        self.calls = []
+
+    def translate(self, text, src, dest):
+        self.calls.append((text, src, dest))
+        if self.delay:
+            time.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError("stub translator failure")
+        return self.table.get((text, dest), f"[{dest}] {text}")
+
+
+class CircuitBreaker:
+    """Opens after `threshold` consecutive failures; one trial call after `reset_after` seconds."""
+
+    def __init__(self, threshold=BREAKER_FAILURES, reset_after=BREAKER_RESET_SECONDS, clock=time.monotonic):
+        self.threshold = threshold
+        self.reset_after = reset_after
+        self.failures = 0
+        self.opened_at = None
+        self._trial = False  # the half-open trial call is in flight
+        self._clock = clock
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return "closed"
+        return "half-open" if self._trial or self._clock() - self.opened_at >= self.reset_after else "open"
+
+    def allow(self):
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            if self._trial or self._clock() - self.opened_at < self.reset_after:
+                return False
+            self._trial = True  # every other caller waits for this one's success() or failure()
+            return True
+
+    def success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial = False
+
+    def failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.failures >= self.threshold:
+                self.opened_at = self._clock()
+            self._trial = False
+
+
+def _default_remote():
+    if REMOTE_TRANSLATOR == "google":
+        return GoogleTranslator()
+    if REMOTE_TRANSLATOR == "stub":
+        return StubTranslator()
+    return None
+
+
+class TranslationService:
+    """
+    Offline-first translation: same-language text is returned as is, cached
+    results are served locally, and only misses go to the remote translator,
+    with a timeout and a circuit breaker. Any failure returns the input text.
+    Only bot prompts (registered by prewarm) and COMMON_REPLIES are cached.
+    """
+
+    def __init__(self, remote=None, cache=None, breaker=None, timeout=TRANSLATE_TIMEOUT):
+        self.remote = remote
+        self.cache = cache
+        self.prompts = set()
+        self.breaker = breaker or CircuitBreaker()
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="translate")
+
+    def cacheable(self, text):
+        return text in self.prompts or reply_key(text) in COMMON_REPLIES
+
+    def _lookup(self, text, target_lang, source_lang):
+        text = (text or "").strip()
+        if not text:
+            return text, None, True
+        src = source_lang or detect_language(text)
+        if src == target_lang:
+            return text, src, True
+        cached = self.cache.get(text, src, target_lang) if self.cache and self.cacheable(text) else None
+        if cached is not None:
+            return cached, src, True
+        return text, src, False
+
+    def _finish(self, text, src, target_lang, result):
+        self.breaker.success()
+        if self.cache and self.cacheable(text):
+            self.cache.put(text, src, target_lang, result)
+        return result
+
+    def translate(self, text, target_lang="en", source_lang=None):
+        result, src, done = self._lookup(text, target_lang, source_lang)
+        if done or self.remote is None or not self.breaker.allow():
+            return result
+        try:
+            translated = self._executor.submit(self.remote.translate, result, src, target_lang).result(self.timeout)
+        except (FutureTimeout, Exception) as e:
+            self.breaker.failure()
+            log.warning("⚠️ Translation failed, using original text", error=str(e) or "timed out")
+            return result
+        return self._finish(result, src, target_lang, translated)
+
+    async def translate_async(self, text, target_lang="en", source_lang=None):
+        result, src, done = self._lookup(text, target_lang, source_lang)
+        if done or self.remote is None or not self.breaker.allow():
+            return result
+        loop = asyncio.get_running_loop()
+        try:
+            translated = await asyncio.wait_for(
+                loop.run_in_executor(self._executor, self.remote.translate, result, src, target_lang),
+                self.timeout,
+            )
+        except Exception as e:
+            self.breaker.failure()
+            log.warning("⚠️ Translation failed, using original text", error=str(e) or "timed out")
+            return result
+        return self._finish(result, src, target_lang, translated)
+
+    def prewarm(self, texts, langs=("or", "hi")):
+        """Translate fixed bot prompts ahead of time so replies are served from the cache."""
+        texts = [(t or "").strip() for t in texts]
+        self.prompts.update(texts)
+        for text in texts:
+            for lang in langs:
+                self.translate(text, lang, source_lang="en")
+
+    def stats(self):
+        return {
+            "remote": type(self.remote).__name__ if self.remote else None,
+            "breaker": self.breaker.state,
+            "cache": self.cache.stats() if self.cache else None,
+        }
+
+
+translation_service = LazyResource(
+    "translator",
+    lambda: TranslationService(remote=_default_remote(), cache=TranslationCache()),
+)
+translator = translation_service  # warm-up hook used by backend.app
+
 
 def translate_text(text, target_lang="en"):
-    try:
-        result = translator_instance.translate(text, dest=target_lang)
-        return result.text
-    except:
-        return text
+    return translation_service.get().translate(text, target_lang)
+
+
+async def translate_text_async(text, target_lang="en"):
+    return await translation_service.get().translate_async(text, target_lang)
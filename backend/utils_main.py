@@ -1,30 +1,25 @@
-import re, datetime, random, base64, json, os
-from cryptography.fernet import Fernet
+import re
+from backend.utils.media_store import MEDIA_ROOT, store_base64
+from backend.utils.tickets import new_ticket
 
-KEY_FILE = os.environ.get("CYBERSATHI_FERNET_KEY_FILE", "./fernet_pro.key")
-
-def load_or_create_key():
-    if os.path.exists(KEY_FILE):
-        with open(KEY_FILE, "rb") as f:
-            return f.read()
-    key = Fernet.generate_key()
-    with open(KEY_FILE, "wb") as f:
-        f.write(key)
-    return key
-
-FERNET_KEY = load_or_create_key()
-fernet = Fernet(FERNET_KEY)
+# Key ring is read (or created) on first encrypt/decrypt, not at import
+from backend.crypto import key_ring as fernet
 
 def encrypt_text(plain: str) -> str:
-    return fernet.encrypt(plain.encode()).decode()
+    return fernet.get().encrypt(plain.encode()).decode()
 
 def decrypt_text(token: str) -> str:
-    return fernet.decrypt(token.encode()).decode()
+    return fernet.get().decrypt(token.encode()).decode()
 
 def valid_phone(phone: str) -> bool:
     import re
     return bool(re.fullmatch(r"[6-9]\d{9}", phone or ""))
 
+def normalize_phone(phone):
+    """Last 10 digits, so '+91 98765-43210' and '9876543210' match."""
+    digits = re.sub(r"\D", "", phone or "")
+    return digits[-10:] if len(digits) >= 10 else None
+
 def valid_email(email: str) -> bool:
     import re
     return bool(re.fullmatch(r"[^@\s]+@[^@\s]+\.[^@\s]+", email or ""))
@@ -34,14 +29,9 @@ def valid_pincode(pin: str) -> bool:
     return bool(re.fullmatch(r"\d{6}", pin or ""))
 
 def gen_ticket():
-    today = datetime.datetime.utcnow().strftime("%Y%m%d")
-    rand = random.randint(1000, 9999)
-    return f"CYB-{today}-{rand}"
-
-def save_attachment_base64(b64str: str, folder="./uploads"):
-    os.makedirs(folder, exist_ok=True)
-    filename = f"attach_{datetime.datetime.utcnow().strftime('%Y%m%d%H%M%S')}_{random.randint(1000,9999)}.bin"
-    path = os.path.join(folder, filename)
-    with open(path, "wb") as f:
-        f.write(base64.b64decode(b64str))
-    return path
+    # One generator for every caller (see backend/utils/tickets.py)
+    return new_ticket()
+
+def save_attachment_base64(b64str: str, folder=MEDIA_ROOT):
+    # Decoded slice by slice into the content-addressed media store
+    return store_base64(b64str, root=folder).path
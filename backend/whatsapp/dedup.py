@@ -0,0 +1,180 @@
+import argparse
+import json
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete
+
+from backend.init_db import dialect_insert, engine
+from backend.models import ProcessedMessage
+
+try:
+    import orjson
+except ImportError:  # optional speed-up
+    orjson = None
+
+DEDUP_WINDOW_SECONDS = int(os.getenv("DEDUP_WINDOW_SECONDS", str(24 * 3600)))
+DEDUP_MAX_IDS = int(os.getenv("DEDUP_MAX_IDS", "200000"))
+DEDUP_BLOOM = os.getenv("DEDUP_BLOOM", "0") == "1"
+DEDUP_RETENTION_DAYS = int(os.getenv("DEDUP_RETENTION_DAYS", "7"))
+
+
+# -------------------------------------------------------
+# 📦 Payload parsing
+# -------------------------------------------------------
+def loads(body):
+    """Parse a webhook body once, with orjson when it is installed."""
+    return orjson.loads(body) if orjson else json.loads(body)
+
+
+def iter_messages(payload):
+    """Every message in a delivery: Meta may batch several entries/changes/messages."""
+    for entry in payload.get("entry") or ():
+        for change in entry.get("changes") or ():
+            for message_obj in (change.get("value") or {}).get("messages") or ():
+                if message_obj.get("from"):
+                    yield message_obj
+
+
+# -------------------------------------------------------
+# 🌸 Bloom filter (two rotating generations cover one window)
+# -------------------------------------------------------
+class BloomFilter:
+    def __init__(self, capacity, error_rate=0.001):
+        # m = -n ln p / (ln 2)^2 bits, k = m/n ln 2 hashes
+        self.bits = max(64, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.bits / capacity * math.log(2)))
+        self._array = bytearray((self.bits + 7) // 8)
+
+    def _positions(self, key):
+        # Double hashing from the interpreter's string hash (per-process, fine in memory)
+        h1 = hash(key)
+        h2 = hash((key, 1)) | 1
+        bits = self.bits
+        return [(h1 + i * h2) % bits for i in range(self.hashes)]
+
+    def add(self, key):
+        for pos in self._positions(key):
+            self._array[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, key):
+        return all(self._array[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(key))
+
+
+# -------------------------------------------------------
+# 🔁 Seen-ID window
+# -------------------------------------------------------
+class MessageDeduplicator:
+    """
+    Remembers message IDs for `window` seconds (at most `max_ids`, oldest
+    dropped first) so a redelivered webhook is answered from memory. With
+    `bloom`, a lookup that misses the filter is known new without touching
+    the ID map. The processed_messages table (see claim()) is the durable
+    check across restarts and worker processes.
+    """
+
+    def __init__(self, window=DEDUP_WINDOW_SECONDS, max_ids=DEDUP_MAX_IDS, bloom=DEDUP_BLOOM):
+        self.window = window
+        self.max_ids = max_ids
+        self._ids = OrderedDict()  # message_id -> first seen (monotonic)
+        self._lock = threading.Lock()
+        self._blooms = [BloomFilter(max_ids), BloomFilter(max_ids)] if bloom else None
+        self._bloom_started = time.monotonic()
+        self.duplicates = 0
+        self.persistent_duplicates = 0
+
+    def _expire(self, now):
+        ids = self._ids
+        while ids:
+            seen_at = next(iter(ids.values()))
+            if now - seen_at < self.window and len(ids) <= self.max_ids:
+                break
+            ids.popitem(last=False)
+        if self._blooms and now - self._bloom_started >= self.window:
+            # Retire the older generation; IDs older than two windows are forgotten
+            self._blooms = [self._blooms[1], BloomFilter(self.max_ids)]
+            self._bloom_started = now
+
+    def first_sighting(self, message_id):
+        """True (and remember it) if this ID hasn't been seen within the window."""
+        if not message_id:
+            return True
+        now = time.monotonic()
+        with self._lock:
+            self._expire(now)
+            if self._blooms is not None and not any(message_id in b for b in self._blooms):
+                self._remember(message_id, now)
+                return True
+            if message_id in self._ids:
+                self.duplicates += 1
+                return False
+            self._remember(message_id, now)
+            return True
+
+    def _remember(self, message_id, now):
+        self._ids[message_id] = now
+        if self._blooms is not None:
+            self._blooms[1].add(message_id)
+
+    def forget(self, message_id):
+        """Undo first_sighting() when the message could not be accepted (so the retry is processed)."""
+        with self._lock:
+            self._ids.pop(message_id, None)
+
+    def stats(self):
+        return {
+            "tracked_ids": len(self._ids),
+            "bloom": self._blooms is not None,
+            "duplicates": self.duplicates,
+            "persistent_duplicates": self.persistent_duplicates,
+        }
+
+
+dedup = MessageDeduplicator()
+
+
+def claim(message_id, sender=None):
+    """
+    Record the ID in processed_messages; False if another delivery (or
+    another worker process) already did. Runs once per new message, before
+    any side effect, so a message is processed at most once; if processing
+    fails the caller release()s the ID so it can be retried.
+    """
+    if not message_id:
+        return True
+    stmt = dialect_insert(ProcessedMessage.__table__).values(message_id=message_id, sender=sender)
+    with engine.begin() as conn:
+        inserted = conn.execute(stmt.on_conflict_do_nothing(index_elements=["message_id"])).rowcount
+    if not inserted:
+        dedup.persistent_duplicates += 1
+    return bool(inserted)
+
+
+def release(message_id):
+    """
+    Undo claim() for a message whose processing failed, in the database and
+    the in-memory window, so a redelivery is processed instead of dropped.
+    """
+    if not message_id:
+        return
+    with engine.begin() as conn:
+        conn.execute(delete(ProcessedMessage).where(ProcessedMessage.message_id == message_id))
+    dedup.forget(message_id)
+
+
+def prune(keep_days=DEDUP_RETENTION_DAYS):
+    """Drop IDs older than Meta's redelivery horizon."""
+    cutoff = datetime.utcnow() - timedelta(days=keep_days)
+    with engine.begin() as conn:
+        return conn.execute(delete(ProcessedMessage).where(ProcessedMessage.received_at < cutoff)).rowcount
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Prune processed webhook message IDs")
+    parser.add_argument("--keep-days", type=int, default=DEDUP_RETENTION_DAYS)
+    args = parser.parse_args()
+    print(f"✅ Pruned {prune(args.keep_days)} processed message IDs older than {args.keep_days} days")
@@ -0,0 +1,138 @@
+import asyncio
+import os
+import time
+import zlib
+
+from backend.logs import get_logger
+
+WEBHOOK_WORKERS = int(os.getenv("WEBHOOK_WORKERS", "8"))
+WEBHOOK_QUEUE_SIZE = int(os.getenv("WEBHOOK_QUEUE_SIZE", "1000"))
+
+log = get_logger("dispatcher")
+
+
+# -------------------------------------------------------
+# 📬 Webhook dispatcher: ack fast, process off the request path
+# -------------------------------------------------------
+class WebhookDispatcher:
+    """
+    Bounded worker pool for inbound WhatsApp messages.
+
+    Every sender is pinned to one shard (crc32 of the sender id), and each
+    shard is drained by a single worker, so one citizen's messages are always
+    handled in arrival order while different citizens run concurrently.
+    The handler is a coroutine; blocking work inside it belongs on a thread.
+    """
+
+    def __init__(self, handler, workers=WEBHOOK_WORKERS, queue_size=WEBHOOK_QUEUE_SIZE):
+        self.handler = handler
+        self.workers = max(1, workers)
+        self.queue_size = max(1, queue_size)
+        self._queues = []
+        self._tasks = []
+        self._in_flight = 0
+        self._counters = {
+            "enqueued": 0,
+            "processed": 0,
+            "failed": 0,
+            "rejected": 0,
+        }
+        self._max_depth = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._run_total = 0.0
+        self._run_max = 0.0
+
+    @property
+    def running(self):
+        return bool(self._tasks)
+
+    def start(self):
+        """Create shard queues and worker tasks on the running event loop."""
+        if self.running:
+            return
+        per_shard = max(1, self.queue_size // self.workers)
+        self._queues = [asyncio.Queue(maxsize=per_shard) for _ in range(self.workers)]
+        self._tasks = [
+            asyncio.create_task(self._worker(q), name=f"webhook-worker-{i}")
+            for i, q in enumerate(self._queues)
+        ]
+
+    async def stop(self, drain=True, timeout=10.0):
+        """Stop the workers, optionally letting queued messages finish first."""
+        if not self.running:
+            return
+        if drain:
+            try:
+                await asyncio.wait_for(
+                    asyncio.gather(*(q.join() for q in self._queues)), timeout
+                )
+            except asyncio.TimeoutError:
+                log.warning("⚠️ Webhook queue did not drain before shutdown.", queue_depth=self.depth())
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._queues = []
+
+    def _shard(self, sender):
+        return zlib.crc32(str(sender).encode()) % self.workers
+
+    def submit(self, sender, item):
+        """
+        Enqueue one message without waiting. Returns False when the sender's
+        shard is full so the caller can push back on Meta instead of queueing
+        unbounded work.
+        """
+        if not self.running:
+            self.start()
+        queue = self._queues[self._shard(sender)]
+        try:
+            queue.put_nowait((time.perf_counter(), item))
+        except asyncio.QueueFull:
+            self._counters["rejected"] += 1
+            return False
+        self._counters["enqueued"] += 1
+        self._max_depth = max(self._max_depth, self.depth())
+        return True
+
+    def depth(self):
+        return sum(q.qsize() for q in self._queues)
+
+    async def _worker(self, queue):
+        while True:
+            queued_at, item = await queue.get()
+            started = time.perf_counter()
+            wait = started - queued_at
+            self._wait_total += wait
+            self._wait_max = max(self._wait_max, wait)
+            self._in_flight += 1
+            try:
+                await self.handler(item)
+                self._counters["processed"] += 1
+            except Exception:
+                self._counters["failed"] += 1
+                log.error("❌ Webhook worker error", exc_info=True)
+            finally:
+                elapsed = time.perf_counter() - started
+                self._run_total += elapsed
+                self._run_max = max(self._run_max, elapsed)
+                self._in_flight -= 1
+                queue.task_done()
+
+    def stats(self):
+        """Backpressure snapshot for /webhook/stats."""
+        done = self._counters["processed"] + self._counters["failed"]
+        return {
+            "workers": self.workers,
+            "queue_capacity": self.queue_size,
+            "queue_depth": self.depth(),
+            "shard_depths": [q.qsize() for q in self._queues],
+            "max_queue_depth": self._max_depth,
+            "in_flight": self._in_flight,
+            **self._counters,
+            "avg_wait_ms": round(self._wait_total / done * 1000, 3) if done else 0.0,
+            "max_wait_ms": round(self._wait_max * 1000, 3),
+            "avg_processing_ms": round(self._run_total / done * 1000, 3) if done else 0.0,
+            "max_processing_ms": round(self._run_max * 1000, 3),
+        }
@@ -0,0 +1,349 @@
+import re
+import sys
+from collections import namedtuple
+
+from backend.models import Complaint, ComplaintEvidence
+from backend.linking import link_complaint, save_unfreeze_request
+from backend.rollups import complaint_created
+from backend.search import complaint_indexed
+from backend.status_lookup import format_status, invalidate_complaint, lookup_status
+from backend.utils.grievance_links import get_grievance_link
+from backend.utils.location import get_location
+from backend.utils.tickets import is_valid_ticket, new_ticket, normalize_ticket
+from backend.whatsapp.meta_handler import get_nearest_police_station
+
+# -------------------------------------------------------
+# 💬 Prompt catalogue (interned: every chat shares one copy of each prompt)
+# -------------------------------------------------------
+PROMPTS = {key: sys.intern(text) for key, text in {
+    "welcome": (
+        "👋 *Welcome to CyberSathi!* 🚔\n\n"
+        "Choose an option:\n"
+        "A️⃣ Register New Complaint\n"
+        "B️⃣ Check Complaint Status\n"
+        "C️⃣ Account Unfreeze Request\n"
+        "D️⃣ Other Queries\n"
+        "E️⃣ Add Evidence to a Complaint"
+    ),
+    "invalid_option": "❌ Invalid option. Please type A, B, C or E.",
+    "name": "Please enter your *Full Name*:",
+    "father": "Enter your *Father/Spouse/Guardian Name*:",
+    "dob": "Enter your *Date of Birth (DD-MM-YYYY)*:",
+    "dob_retry": "⚠️ Invalid format. Please use DD-MM-YYYY.",
+    "phone": "Enter your *Phone Number* (+91XXXXXXXXXX):",
+    "phone_retry": "⚠️ Invalid number. Please re-enter (+91XXXXXXXXXX):",
+    "email": "Enter your *Email ID*:",
+    "email_retry": "⚠️ Invalid email. Please re-enter:",
+    "village": "Enter your *Village Name*:",
+    "post_office": "Enter your *Post Office Name*:",
+    "police_station": "Enter your *Nearest Police Station* (or share your 📍 location):",
+    "district": "Enter your *District Name*:",
+    "pincode": "Enter your *PIN Code (6 digits)*:",
+    "pincode_retry": "⚠️ Invalid PIN. Please enter a 6-digit number:",
+    "fraud": (
+        "Select Fraud Type:\n"
+        "1️⃣ UPI / Banking\n"
+        "2️⃣ Social Media\n"
+        "3️⃣ Job / Loan App\n"
+        "4️⃣ Other"
+    ),
+    "desc": "Please describe your issue briefly and upload any related *screenshots, PDFs, or Aadhaar* if available.",
+    "status": "Enter your *Phone Number* or *Ticket Number* to check status:",
+    "status_missing": "⚠️ No record found for the given details.",
+    "ticket_typo": "⚠️ That ticket number doesn't look right. Please check it and try again:",
+    "unfreeze": "Enter your *Account Number or UPI ID* for unfreeze request:",
+    "unfreeze_bank": "Enter your *Bank Name*:",
+    "unfreeze_reference": "Enter the *Complaint/Ticket Number* linked to the freeze, or type *skip*:",
+    "evidence_ticket": "Enter the *Ticket Number* of your complaint:",
+    "evidence_ticket_retry": "⚠️ No complaint found with that ticket number. Please re-enter:",
+    "evidence_upload": "📎 Send your *screenshots or documents* now. Type *done* when finished.",
+    "evidence_none": "ℹ️ No files received yet. Send a file or type *done* to cancel.",
+    "upload_ack": "📎 File received successfully. You can send more or type *done* to finish.",
+}.items()}
+
+# Precompiled validators; a step's input must fully match
+VALIDATORS = {
+    "dob": re.compile(r"\d{2}-\d{2}-\d{4}"),
+    "phone": re.compile(r"\+?\d{10,13}"),
+    "email": re.compile(r"[^@]+@[^@]+\.[^@]+"),
+    "pincode": re.compile(r"\d{6}"),
+}
+
+FRAUD_TYPES = {"1": "UPI/Banking", "2": "Social Media", "3": "Job/Loan App", "4": "Other"}
+
+
+# One inbound message as seen by a flow step
+Turn = namedtuple("Turn", "db sender user text media_file_path location send")
+
+
+class Step:
+    """
+    One question of a flow. By default the answer is checked against
+    `validator`, stored as user[field] (after `parse`) and the next step's
+    prompt is sent; `handler(turn, step)` replaces that for special steps.
+    """
+    __slots__ = ("name", "field", "validator", "retry", "parse", "handler", "next", "flow")
+
+    def __init__(self, name, field=None, validator=None, parse=None, handler=None):
+        self.name = name
+        self.field = field or name
+        self.validator = VALIDATORS.get(validator) if validator else None
+        self.retry = PROMPTS.get(f"{name}_retry")
+        self.parse = parse
+        self.handler = handler
+        self.next = None
+        self.flow = None
+
+    @property
+    def prompt(self):
+        return PROMPTS[self.name]
+
+
+class Flow:
+    """Ordered steps; `on_complete(turn)` runs after the last answer is stored."""
+
+    def __init__(self, name, steps, on_complete):
+        self.name = name
+        self.steps = steps
+        self.on_complete = on_complete
+        for step, following in zip(steps, steps[1:] + [None]):
+            step.next = following
+            step.flow = self
+
+
+class FlowEngine:
+    """
+    Dispatches a chat's current stage to its step with one dict lookup.
+    Stage names are the step names, so sessions saved by earlier releases
+    resume where they left off.
+    """
+
+    def __init__(self, flows, menu):
+        self.flows = {flow.name: flow for flow in flows}
+        self.menu = {choice: self.flows[name] for choice, name in menu.items()}
+        self.stages = {}
+        for flow in flows:
+            for step in flow.steps:
+                if step.name in self.stages:
+                    raise ValueError(f"Duplicate stage name: {step.name}")
+                self.stages[step.name] = step
+
+    def greet(self, send, sender, user):
+        user.clear()
+        user["stage"] = "menu"
+        send(sender, PROMPTS["welcome"])
+
+    def handle(self, turn):
+        stage = turn.user.get("stage")
+        if stage == "menu":
+            flow = self.menu.get(turn.text.lower())
+            if flow is None:
+                turn.send(turn.sender, PROMPTS["invalid_option"])
+            else:
+                self.enter(turn, flow.steps[0])
+            return {"status": "menu received"}
+
+        step = self.stages.get(stage)
+        if step is None:
+            # Stage from a flow that no longer exists: start over
+            self.greet(turn.send, turn.sender, turn.user)
+            return {"status": "menu sent"}
+        if step.handler:
+            return step.handler(turn, step)
+        result = self.answer(turn, step, turn.text)
+        if turn.media_file_path and result["status"] == "done":
+            turn.send(turn.sender, PROMPTS["upload_ack"])
+        return result
+
+    def enter(self, turn, step):
+        turn.user["stage"] = step.name
+        turn.send(turn.sender, step.prompt)
+
+    def answer(self, turn, step, value):
+        """Validate and store one answer, then ask the next question or finish the flow."""
+        if step.validator and not step.validator.fullmatch(value):
+            turn.send(turn.sender, step.retry)
+            return {"status": "retry"}
+        turn.user[step.field] = step.parse(value) if step.parse else value
+        if step.next:
+            self.enter(turn, step.next)
+            return {"status": "done"}
+        return step.flow.on_complete(turn)
+
+
+# -------------------------------------------------------
+# 📝 Complaint registration
+# -------------------------------------------------------
+def police_station_step(turn, step):
+    """A shared location fills in the station and district, skipping the district question."""
+    if not turn.location:
+        return engine.answer(turn, step, turn.text)
+    station = get_location(*turn.location)
+    turn.user["police_station"] = station.name
+    turn.user["district"] = station.district
+    turn.user["stage"] = "pincode"
+    turn.send(turn.sender,
+        f"📍 Nearest police station: *{station.name}* ({station.district} district)\n\n"
+        + PROMPTS["pincode"]
+    )
+    return {"status": "done"}
+
+
+def register_complaint(turn):
+    user, send, sender = turn.user, turn.send, turn.sender
+    ticket = new_ticket()
+
+    complaint = Complaint(
+        ticket_number=ticket,
+        name=user["name"],
+        father_name=user["father_name"],
+        dob=user["dob"],
+        phone=user["phone"],
+        email=user["email"],
+        wa_id=sender,
+        village=user["village"],
+        post_office=user["post_office"],
+        police_station=user["police_station"],
+        district=user["district"],
+        pincode=user["pincode"],
+        fraud_type=user["fraud"],
+        description=user["desc"],
+        media_files=turn.media_file_path,
+        status="Registered"
+    )
+    complaint_created(turn.db, complaint)
+    turn.db.add(complaint)
+    entities = complaint_indexed(turn.db, complaint)  # flushes, so complaint.id is set
+    link_complaint(turn.db, complaint.id, entities)
+    turn.db.commit()
+    invalidate_complaint(ticket, complaint.phone_key)
+
+    # ✅ Send confirmation
+    send(sender,
+        f"✅ *Complaint Registered Successfully!*\n\n"
+        f"🆔 Ticket No: *{ticket}*\n"
+        "Keep this safe for future status checks (Option B)."
+    )
+
+    # 🚓 Nearest police station call info
+    station_info = get_nearest_police_station(user["police_station"], user["district"], user["pincode"])
+    send(sender,
+        f"📍 Based on your location, your nearest police station is:\n"
+        f"*{station_info['name']}*\n\n"
+        f"📞 Call Now: {station_info['phone']}\n\n"
+        f"Stay alert and do not share OTP or banking details with anyone. 🚔"
+    )
+
+    # Suggest grievance portal link
+    link_message = get_grievance_link(user["fraud"] + " " + user["desc"])
+    send(sender, f"📎 You may also visit this link for direct help:\n{link_message}")
+
+    user.clear()
+    return {"status": "complaint registered"}
+
+
+# -------------------------------------------------------
+# 🔍 Status check
+# -------------------------------------------------------
+def check_status(turn):
+    query = turn.user["status"]
+    if query.upper().startswith("CYB-") and not is_valid_ticket(query):
+        # Caught by the check character; let them retype instead of ending the chat
+        turn.user["stage"] = "status"
+        turn.send(turn.sender, PROMPTS["ticket_typo"])
+        return {"status": "retry"}
+    summary = lookup_status(turn.db, query)
+    turn.send(turn.sender, format_status(summary) if summary else PROMPTS["status_missing"])
+    turn.user.clear()
+    return {"status": "status checked"}
+
+
+# -------------------------------------------------------
+# 🧊 Account unfreeze
+# -------------------------------------------------------
+def submit_unfreeze(turn):
+    user = turn.user
+    reference = user["unfreeze_reference"]
+    save_unfreeze_request(turn.db, turn.sender, user["unfreeze"], user["unfreeze_bank"],
+                          normalize_ticket(reference) or reference)
+    turn.db.commit()
+    turn.send(turn.sender,
+        f"🧊 Your unfreeze request for *{user['unfreeze']}* ({user['unfreeze_bank']}"
+        f"{', ref ' + reference if reference else ''}) has been received. We’ll review it soon."
+    )
+    user.clear()
+    return {"status": "unfreeze submitted"}
+
+
+# -------------------------------------------------------
+# 📎 Evidence append
+# -------------------------------------------------------
+def evidence_ticket_step(turn, step):
+    ticket = normalize_ticket(turn.text)
+    if ticket is None:
+        turn.send(turn.sender, PROMPTS["ticket_typo"])
+        return {"status": "retry"}
+    exists = turn.db.query(Complaint.id).filter(Complaint.ticket_number == ticket).first()
+    if not exists:
+        turn.send(turn.sender, step.retry)
+        return {"status": "retry"}
+    turn.user["evidence_ticket"] = ticket
+    turn.user["evidence_files"] = []
+    engine.enter(turn, step.next)
+    return {"status": "done"}
+
+
+def evidence_upload_step(turn, step):
+    user = turn.user
+    if turn.media_file_path:
+        user["evidence_files"].append(turn.media_file_path)
+        turn.send(turn.sender, PROMPTS["upload_ack"])
+        return {"status": "file received"}
+    if turn.text.lower() != "done":
+        turn.send(turn.sender, PROMPTS["evidence_none"])
+        return {"status": "retry"}
+    return attach_evidence(turn)
+
+
+def attach_evidence(turn):
+    user = turn.user
+    ticket, files = user["evidence_ticket"], user["evidence_files"]
+    if files:
+        turn.db.add_all(ComplaintEvidence(ticket_number=ticket, path=path) for path in files)
+        turn.db.commit()
+    turn.send(turn.sender, f"✅ {len(files)} file(s) added to complaint *{ticket}*.")
+    user.clear()
+    return {"status": "evidence added"}
+
+
+# -------------------------------------------------------
+# 🧭 Flow table
+# -------------------------------------------------------
+FLOWS = [
+    Flow("complaint", [
+        Step("name"),
+        Step("father", field="father_name"),
+        Step("dob", validator="dob"),
+        Step("phone", validator="phone"),
+        Step("email", validator="email"),
+        Step("village"),
+        Step("post_office"),
+        Step("police_station", handler=police_station_step),
+        Step("district"),
+        Step("pincode", validator="pincode"),
+        Step("fraud", parse=lambda choice: FRAUD_TYPES.get(choice, "Other")),
+        Step("desc"),
+    ], register_complaint),
+    Flow("status", [Step("status")], check_status),
+    Flow("unfreeze", [
+        Step("unfreeze"),
+        Step("unfreeze_bank"),
+        Step("unfreeze_reference", parse=lambda ref: "" if ref.lower() == "skip" else ref),
+    ], submit_unfreeze),
+    Flow("evidence", [
+        Step("evidence_ticket", handler=evidence_ticket_step),
+        Step("evidence_upload", handler=evidence_upload_step),
+    ], attach_evidence),
+]
+
+engine = FlowEngine(FLOWS, menu={"a": "complaint", "b": "status", "c": "unfreeze", "e": "evidence"})
@@ -0,0 +1,208 @@
+import asyncio
+import os
+import random
+import time
+
+import httpx
+from dotenv import load_dotenv
+
+from backend.logs import get_logger
+from backend.metrics import GRAPH_SEND_SECONDS
+
+load_dotenv()
+
+GRAPH_API_BASE = os.getenv("GRAPH_API_BASE", "https://graph.facebook.com/v20.0")
+WHATSAPP_TOKEN = os.getenv("WHATSAPP_TOKEN")
+WHATSAPP_PHONE_ID = os.getenv("WHATSAPP_PHONE_ID")
+
+# Meta Cloud API throughput per business phone number (messages/second)
+THROUGHPUT_TIERS = {"standard": 80, "high": 1000}
+GRAPH_THROUGHPUT_TIER = os.getenv("GRAPH_THROUGHPUT_TIER", "standard")
+GRAPH_RATE_LIMIT = float(os.getenv("GRAPH_RATE_LIMIT", THROUGHPUT_TIERS.get(GRAPH_THROUGHPUT_TIER, 80)))
+GRAPH_MAX_RETRIES = int(os.getenv("GRAPH_MAX_RETRIES", "4"))
+GRAPH_TIMEOUT = float(os.getenv("GRAPH_TIMEOUT", "10"))
+GRAPH_MAX_CONNECTIONS = int(os.getenv("GRAPH_MAX_CONNECTIONS", "50"))
+
+# Sends are POSTs: retry only what Meta certainly did not process (a 500/502/504 or a
+# read timeout may come after the message was accepted, and a retry would send it twice)
+RETRYABLE_STATUS = {429, 503}
+RETRYABLE_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+
+log = get_logger("graph")
+
+try:
+    import h2  # noqa: F401  (httpx needs it for HTTP/2)
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+
+# -------------------------------------------------------
+# 🪣 Token bucket sized to the phone number's throughput tier
+# -------------------------------------------------------
+class TokenBucket:
+    def __init__(self, rate, capacity=None):
+        self.rate = float(rate)
+        self.capacity = float(capacity or rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+def backoff_delay(attempt, base=0.25, cap=8.0):
+    """Full-jitter exponential backoff."""
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+# -------------------------------------------------------
+# 📡 Async WhatsApp Cloud API client
+# -------------------------------------------------------
+class GraphClient:
+    """
+    Shared async client for outbound WhatsApp messages.
+
+    One keep-alive (HTTP/2 when available) connection pool per process,
+    a token bucket for the phone number's throughput tier, and a lock per
+    recipient so each citizen receives messages in the order they were queued
+    while sends to different citizens run concurrently.
+    """
+
+    def __init__(self, base_url=GRAPH_API_BASE, token=WHATSAPP_TOKEN, phone_id=WHATSAPP_PHONE_ID,
+                 rate=GRAPH_RATE_LIMIT, max_retries=GRAPH_MAX_RETRIES, timeout=GRAPH_TIMEOUT,
+                 transport=None):
+        self.base_url = base_url.rstrip("/")
+        self.token = token
+        self.phone_id = phone_id
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self.transport = transport
+        self.bucket = TokenBucket(rate)
+        self.latency = GRAPH_SEND_SECONDS
+        self.retries = 0
+        self._client = None
+        self._recipient_locks = {}
+
+    def _get_client(self):
+        if self._client is None:
+            kwargs = {
+                "timeout": httpx.Timeout(self.timeout),
+                "headers": {"Authorization": f"Bearer {self.token}"},
+            }
+            if self.transport is not None:
+                kwargs["transport"] = self.transport
+            else:
+                kwargs["http2"] = HTTP2_AVAILABLE
+            if hasattr(httpx, "Limits"):
+                kwargs["limits"] = httpx.Limits(
+                    max_connections=GRAPH_MAX_CONNECTIONS,
+                    max_keepalive_connections=GRAPH_MAX_CONNECTIONS,
+                )
+            self._client = httpx.AsyncClient(**kwargs)
+        return self._client
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+        # asyncio primitives are bound to the loop that used them
+        self.bucket = TokenBucket(self.bucket.rate, self.bucket.capacity)
+
+    async def _post(self, payload):
+        url = f"{self.base_url}/{self.phone_id}/messages"
+        client = self._get_client()
+        for attempt in range(self.max_retries + 1):
+            await self.bucket.acquire()
+            started = time.perf_counter()
+            try:
+                response = await client.post(url, json=payload)
+            except httpx.HTTPError as e:
+                self.latency.observe(time.perf_counter() - started, "error")
+                if not isinstance(e, RETRYABLE_ERRORS):
+                    log.error("❌ Graph API send outcome unknown, not retrying", error=str(e) or type(e).__name__)
+                    return None
+                if attempt == self.max_retries:
+                    log.error("❌ Graph API unreachable", error=str(e))
+                    return None
+                self.retries += 1
+                await asyncio.sleep(backoff_delay(attempt))
+                continue
+
+            self.latency.observe(time.perf_counter() - started, str(response.status_code))
+            if response.status_code not in RETRYABLE_STATUS or attempt == self.max_retries:
+                return response
+
+            self.retries += 1
+            retry_after = response.headers.get("Retry-After")
+            try:
+                delay = float(retry_after) if retry_after else backoff_delay(attempt)
+            except ValueError:
+                delay = backoff_delay(attempt)
+            await asyncio.sleep(delay)
+        return None
+
+    async def send_text(self, to, message):
+        """Send one text message, keeping per-recipient order."""
+        if not self.token or not self.phone_id:
+            log.error("❌ Missing WhatsApp credentials in .env file")
+            return None
+
+        payload = {
+            "messaging_product": "whatsapp",
+            "to": to,
+            "type": "text",
+            "text": {"preview_url": False, "body": message},
+        }
+        entry = self._recipient_locks.get(to)
+        if entry is None:
+            entry = self._recipient_locks[to] = [asyncio.Lock(), 0]
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                response = await self._post(payload)
+        finally:
+            # Drop idle locks so the map does not grow with every citizen ever messaged
+            entry[1] -= 1
+            if entry[1] == 0:
+                del self._recipient_locks[to]
+
+        if response is None or response.status_code != 200:
+            log.warning("⚠️ Failed to send message. Check token or phone ID.", to=to,
+                        status=response.status_code if response is not None else None)
+        return response
+
+    async def send_batch(self, messages):
+        """
+        Send [(to, message), ...]. Messages for the same recipient go out
+        sequentially in list order; different recipients are sent concurrently.
+        """
+        by_recipient = {}
+        for to, message in messages:
+            by_recipient.setdefault(to, []).append(message)
+
+        async def _send_all(to, bodies):
+            return [await self.send_text(to, body) for body in bodies]
+
+        results = await asyncio.gather(*(_send_all(to, bodies) for to, bodies in by_recipient.items()))
+        return dict(zip(by_recipient, results))
+
+    def stats(self):
+        return {
+            "rate_limit_per_sec": self.bucket.rate,
+            "http2": HTTP2_AVAILABLE and self.transport is None,
+            "retries": self.retries,
+            "latency_seconds": self.latency.snapshot(),
+        }
+
+
+graph_client = GraphClient()
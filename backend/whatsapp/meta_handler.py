@@ -1,35 +1,67 @@
 import os
+import time
 import requests
 import json
 from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from backend.logs import get_logger
+from backend.metrics import GRAPH_SEND_SECONDS, MEDIA_BYTES, MEDIA_SECONDS
+from backend.utils.location import station_directory
+from backend.utils.media_store import CHUNK_SIZE, MEDIA_MAX_BYTES, MEDIA_ROOT, MediaTooLarge, store_stream
 
 # Load environment variables
 load_dotenv()
 
 WHATSAPP_TOKEN = os.getenv("WHATSAPP_TOKEN")
 WHATSAPP_PHONE_ID = os.getenv("WHATSAPP_PHONE_ID")
+GRAPH_API_BASE = os.getenv("GRAPH_API_BASE", "https://graph.facebook.com/v20.0").rstrip("/")
+GRAPH_TIMEOUT = float(os.getenv("GRAPH_TIMEOUT", "10"))
+GRAPH_MAX_RETRIES = int(os.getenv("GRAPH_MAX_RETRIES", "4"))
+
+log = get_logger("meta")
+
+
+def _build_session(retry):
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=32, max_retries=retry)
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+# Keep-alive sessions with backoff retries for the blocking callers. Media GETs are
+# idempotent and retried on 429/5xx; message POSTs only on 429/503 and connection
+# failures, since after a 500/502/504 or a read timeout Meta may already have sent it.
+http = _build_session(Retry(
+    total=GRAPH_MAX_RETRIES,
+    backoff_factor=0.25,
+    status_forcelist=(429, 500, 502, 503, 504),
+    respect_retry_after_header=True,
+    raise_on_status=False,
+))
+send_http = _build_session(Retry(
+    total=GRAPH_MAX_RETRIES,
+    read=0,
+    other=0,
+    backoff_factor=0.25,
+    status_forcelist=(429, 503),
+    allowed_methods=frozenset({"POST"}),
+    respect_retry_after_header=True,
+    raise_on_status=False,
+))
 
 
 # -------------------------------------------------------
 # 🚔 NEW: Get nearest police station by user location
 # -------------------------------------------------------
-def get_nearest_police_station(user_location: str):
+def get_nearest_police_station(user_location: str, district=None, pincode=None):
     """
-    Return nearest police station phone number and name based on user location keyword.
+    Return nearest police station phone number and name from the bundled
+    directory, matching the station/town typed, then PIN code, then district.
     """
-    location_map = {
-        "bhubaneswar": {"name": "Bhubaneswar Police Station", "phone": "+916742537777"},
-        "cuttack": {"name": "Cuttack Police Station", "phone": "+916712334455"},
-        "puri": {"name": "Puri Police Station", "phone": "+916752888777"},
-        "rourkela": {"name": "Rourkela Police Station", "phone": "+916616778899"},
-        "sambalpur": {"name": "Sambalpur Police Station", "phone": "+916633224466"},
-    }
-
-    key = user_location.strip().lower()
-    for city in location_map:
-        if city in key:
-            return location_map[city]
-    return {"name": "Local Police Station", "phone": "+91100"}  # fallback if no match
+    station = station_directory.get().resolve(user_location, district, pincode)
+    return {"name": station.name, "phone": station.phone, "district": station.district}
 
 
 # -------------------------------------------------------
@@ -37,13 +69,14 @@ def get_nearest_police_station(user_location: str):
 # -------------------------------------------------------
 def send_whatsapp_message(to, message):
     """
-    Sends a WhatsApp message via Meta Cloud API
+    Sends a WhatsApp message via Meta Cloud API; returns the response,
+    or None when it could not be sent at all.
     """
     if not WHATSAPP_TOKEN or not WHATSAPP_PHONE_ID:
-        print("❌ Missing WhatsApp credentials in .env file")
+        log.error("❌ Missing WhatsApp credentials in .env file")
         return
 
-    url = f"https://graph.facebook.com/v20.0/{WHATSAPP_PHONE_ID}/messages"
+    url = f"{GRAPH_API_BASE}/{WHATSAPP_PHONE_ID}/messages"
     headers = {
         "Authorization": f"Bearer {WHATSAPP_TOKEN}",
         "Content-Type": "application/json"
@@ -56,47 +89,74 @@ def send_whatsapp_message(to, message):
         "text": {"preview_url": False, "body": message}
     }
 
-    response = requests.post(url, headers=headers, data=json.dumps(payload))
-    print(f"📤 Sent to {to}: {message}")
-    print(f"Meta Response: {response.status_code} - {response.text}")
+    started = time.perf_counter()
+    try:
+        response = send_http.post(url, headers=headers, data=json.dumps(payload), timeout=GRAPH_TIMEOUT)
+    except requests.RequestException as e:
+        GRAPH_SEND_SECONDS.observe(time.perf_counter() - started, "error")
+        log.error("❌ Graph API unreachable", error=str(e))
+        return
+    GRAPH_SEND_SECONDS.observe(time.perf_counter() - started, str(response.status_code))
 
+    # Never the message body: it carries the citizen's answers
     if response.status_code != 200:
-        print("⚠️ Failed to send message. Check token or phone ID.")
+        log.warning("⚠️ Failed to send message. Check token or phone ID.", to=to,
+                    status=response.status_code, response=response.text[:500])
+    else:
+        log.debug("📤 Sent", to=to, chars=len(message))
+    return response
 
 
 # -------------------------------------------------------
 # 📥 Download media from WhatsApp
 # -------------------------------------------------------
-def download_media(media_id, file_path="downloads"):
+def download_media(media_id, root=MEDIA_ROOT):
     """
-    Downloads a media file from WhatsApp servers and saves it locally.
+    Streams a media file from WhatsApp servers into the content-addressed
+    media store and returns its relative path (identical files are stored once).
     """
+    started = time.perf_counter()
+    outcome = "error"
     try:
-        os.makedirs(file_path, exist_ok=True)
-
         # Step 1: Get the media URL
-        url = f"https://graph.facebook.com/v20.0/{media_id}"
+        url = f"{GRAPH_API_BASE}/{media_id}"
         headers = {"Authorization": f"Bearer {WHATSAPP_TOKEN}"}
-        response = requests.get(url, headers=headers)
+        response = http.get(url, headers=headers, timeout=GRAPH_TIMEOUT)
         if response.status_code != 200:
-            print("⚠️ Could not fetch media URL:", response.text)
+            outcome = f"meta_{response.status_code}"
+            log.warning("⚠️ Could not fetch media URL", media_id=media_id, status=response.status_code)
             return None
 
-        media_url = response.json().get("url")
-
-        # Step 2: Download actual file
-        response = requests.get(media_url, headers=headers)
-        if response.status_code != 200:
-            print("⚠️ Media download failed:", response.text)
+        meta = response.json()
+        media_url = meta.get("url")
+        if int(meta.get("file_size") or 0) > MEDIA_MAX_BYTES:
+            outcome = "too_large"
+            log.warning("⚠️ Media larger than the limit, skipped", media_id=media_id, limit=MEDIA_MAX_BYTES)
             return None
 
-        file_name = f"{file_path}/{media_id}.jpg"
-        with open(file_name, "wb") as f:
-            f.write(response.content)
-
-        print(f"✅ Media saved to {file_name}")
-        return file_name
-
+        # Step 2: Stream the actual file to disk chunk by chunk
+        with http.get(media_url, headers=headers, timeout=GRAPH_TIMEOUT, stream=True) as response:
+            if response.status_code != 200:
+                outcome = f"http_{response.status_code}"
+                log.warning("⚠️ Media download failed", media_id=media_id, status=response.status_code)
+                return None
+            stored = store_stream(
+                response.iter_content(CHUNK_SIZE),
+                declared_mime=meta.get("mime_type") or response.headers.get("Content-Type"),
+                root=root,
+            )
+
+        outcome = "duplicate" if stored.deduped else "stored"
+        MEDIA_BYTES.observe(stored.size)
+        log.info("✅ Media saved", path=stored.path, mime=stored.mime, bytes=stored.size, duplicate=stored.deduped)
+        return stored.path
+
+    except MediaTooLarge as e:
+        outcome = "too_large"
+        log.warning("⚠️ Media rejected", media_id=media_id, error=str(e))
+        return None
     except Exception as e:
-        print("❌ Error in download_media:", str(e))
+        log.error("❌ Error in download_media", media_id=media_id, error=str(e))
         return None
+    finally:
+        MEDIA_SECONDS.observe(time.perf_counter() - started, outcome)
@@ -0,0 +1,271 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from cryptography.fernet import InvalidToken
+
+from backend.crypto import key_ring
+from backend.logs import get_logger
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SESSION_BACKEND = os.getenv("SESSION_BACKEND", "memory")  # "memory" or "sqlite"
+SESSION_TTL = int(os.getenv("SESSION_TTL", "1800"))  # idle seconds before a chat is dropped
+SESSION_MAX = int(os.getenv("SESSION_MAX", "50000"))
+SESSION_DB_PATH = os.getenv("SESSION_DB_PATH", os.path.join(BASE_DIR, "../sessions.db"))
+SESSION_SNAPSHOT = os.getenv("SESSION_SNAPSHOT", os.path.join(BASE_DIR, "../sessions.snapshot.json"))
+
+log = get_logger("sessions")
+
+
+def pack(data):
+    """Compact record: minified UTF-8 JSON."""
+    return json.dumps(data, separators=(",", ":"), ensure_ascii=False).encode()
+
+
+def unpack(blob):
+    return json.loads(blob)
+
+
+# Chats hold registration answers (name, phone, DOB...), so records on disk are Fernet tokens
+def seal(blob):
+    return key_ring.get().encrypt(blob)
+
+
+def unseal(blob):
+    """Plain packed record; ones written before encryption (starting with '{') pass through."""
+    blob = bytes(blob)
+    return blob if blob[:1] == b"{" else key_ring.get().decrypt(blob)
+
+
+# -------------------------------------------------------
+# 🧠 Single-process store: LRU + idle TTL
+# -------------------------------------------------------
+class MemorySessionStore:
+    """
+    Bounded in-process store. Records are kept packed, ordered by last use;
+    the least recently used chat is evicted past `max_entries` and any chat
+    idle for longer than `ttl` is treated as gone. close() snapshots to disk
+    and the next start resumes from it.
+    """
+
+    def __init__(self, ttl=SESSION_TTL, max_entries=SESSION_MAX, snapshot_path=SESSION_SNAPSHOT):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.snapshot_path = snapshot_path
+        self._data = OrderedDict()  # sender -> (expires_at, packed)
+        self._lock = threading.Lock()
+        self.evicted = 0
+        self.expired = 0
+        self._load_snapshot()
+
+    def get(self, sender):
+        with self._lock:
+            item = self._data.get(sender)
+            if item is None:
+                return None
+            expires_at, blob = item
+            if expires_at <= time.time():
+                del self._data[sender]
+                self.expired += 1
+                return None
+            self._data.move_to_end(sender)
+            return unpack(blob)
+
+    def load(self, sender):
+        """(data, version) for save(); one process only, so there is nothing to compare."""
+        return self.get(sender), None
+
+    def save(self, sender, data, version=None):
+        with self._lock:
+            self._data[sender] = (time.time() + self.ttl, pack(data))
+            self._data.move_to_end(sender)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                self.evicted += 1
+        return True
+
+    def delete(self, sender, version=None):
+        with self._lock:
+            self._data.pop(sender, None)
+        return True
+
+    def purge_expired(self):
+        now = time.time()
+        with self._lock:
+            stale = [k for k, (expires_at, _) in self._data.items() if expires_at <= now]
+            for k in stale:
+                del self._data[k]
+            self.expired += len(stale)
+        return len(stale)
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self):
+        return {
+            "backend": "memory",
+            "active": len(self._data),
+            "max_entries": self.max_entries,
+            "evicted": self.evicted,
+            "expired": self.expired,
+        }
+
+    def close(self):
+        if not self.snapshot_path:
+            return
+        self.purge_expired()
+        with self._lock:
+            rows = {k: [exp, blob.decode()] for k, (exp, blob) in self._data.items()}
+        tmp = self.snapshot_path + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(seal(pack(rows)))
+        os.replace(tmp, self.snapshot_path)
+
+    def _load_snapshot(self):
+        if not self.snapshot_path or not os.path.exists(self.snapshot_path):
+            return
+        try:
+            with open(self.snapshot_path, "rb") as f:
+                rows = unpack(unseal(f.read()))
+        except (OSError, ValueError, InvalidToken) as e:
+            log.warning("⚠️ Could not read session snapshot", error=str(e))
+            return
+        now = time.time()
+        for sender, (expires_at, blob) in sorted(rows.items(), key=lambda kv: kv[1][0]):
+            if expires_at > now:
+                self._data[sender] = (expires_at, blob.encode())
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+
+
+# -------------------------------------------------------
+# 🗄️ Shared store: SQLite in WAL mode (safe across uvicorn workers)
+# -------------------------------------------------------
+class SQLiteSessionStore:
+    """
+    Sessions in one SQLite file so every worker process sees the same chat
+    state; no sticky routing needed. WAL lets readers run alongside the single
+    writer. Expired rows are filtered on read and swept every `sweep_every` writes.
+
+    Each row carries a version. load() returns it and save()/delete() given
+    that version only apply if no other worker wrote the chat in between
+    (compare-and-set), returning False otherwise.
+    """
+
+    def __init__(self, path=SESSION_DB_PATH, ttl=SESSION_TTL, max_entries=SESSION_MAX, sweep_every=500):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.sweep_every = sweep_every
+        self._local = threading.local()
+        self._writes = 0
+        conn = self._conn()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS sessions ("
+            "sender TEXT PRIMARY KEY, data BLOB NOT NULL, expires_at REAL NOT NULL, "
+            "version INTEGER NOT NULL DEFAULT 0)"
+        )
+        if "version" not in {row[1] for row in conn.execute("PRAGMA table_info(sessions)")}:
+            conn.execute("ALTER TABLE sessions ADD COLUMN version INTEGER NOT NULL DEFAULT 0")
+        conn.execute("CREATE INDEX IF NOT EXISTS ix_sessions_expires_at ON sessions (expires_at)")
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=5000")
+            self._local.conn = conn
+        return conn
+
+    def get(self, sender):
+        return self.load(sender)[0]
+
+    def load(self, sender):
+        """(data, version); (None, 0) for a chat that is absent or expired."""
+        row = self._conn().execute(
+            "SELECT data, version FROM sessions WHERE sender = ? AND expires_at > ?", (sender, time.time())
+        ).fetchone()
+        if not row:
+            return None, 0
+        try:
+            return unpack(unseal(row[0])), row[1]
+        except InvalidToken:
+            log.warning("⚠️ Session record not readable with the current keys")
+            return None, row[1]
+
+    def save(self, sender, data, version=None):
+        """
+        Write the chat. With the version from load(), only if it is still that
+        version (0: still absent or expired); False means another worker won.
+        """
+        now = time.time()
+        params = {"sender": sender, "data": seal(pack(data)), "expires_at": now + self.ttl,
+                  "version": version, "now": now}
+        if version is None:
+            sql = ("INSERT INTO sessions (sender, data, expires_at, version) VALUES (:sender, :data, :expires_at, 1) "
+                   "ON CONFLICT(sender) DO UPDATE SET data = excluded.data, expires_at = excluded.expires_at, "
+                   "version = sessions.version + 1")
+        elif version == 0:
+            sql = ("INSERT INTO sessions (sender, data, expires_at, version) VALUES (:sender, :data, :expires_at, 1) "
+                   "ON CONFLICT(sender) DO UPDATE SET data = excluded.data, expires_at = excluded.expires_at, "
+                   "version = sessions.version + 1 WHERE sessions.expires_at <= :now")
+        else:
+            sql = ("UPDATE sessions SET data = :data, expires_at = :expires_at, version = version + 1 "
+                   "WHERE sender = :sender AND version = :version")
+        saved = self._conn().execute(sql, params).rowcount == 1
+        self._writes += 1
+        if self._writes % self.sweep_every == 0:
+            self.purge_expired()
+        return saved
+
+    def delete(self, sender, version=None):
+        if version is None:
+            self._conn().execute("DELETE FROM sessions WHERE sender = ?", (sender,))
+            return True
+        if version == 0:
+            return self._conn().execute(
+                "SELECT 1 FROM sessions WHERE sender = ? AND expires_at > ?", (sender, time.time())
+            ).fetchone() is None
+        return self._conn().execute(
+            "DELETE FROM sessions WHERE sender = ? AND version = ?", (sender, version)
+        ).rowcount == 1
+
+    def purge_expired(self):
+        conn = self._conn()
+        removed = conn.execute("DELETE FROM sessions WHERE expires_at <= ?", (time.time(),)).rowcount
+        # Hard cap: drop the chats closest to expiry (least recently active)
+        overflow = len(self) - self.max_entries
+        if overflow > 0:
+            conn.execute(
+                "DELETE FROM sessions WHERE sender IN "
+                "(SELECT sender FROM sessions ORDER BY expires_at LIMIT ?)",
+                (overflow,),
+            )
+            removed += overflow
+        return removed
+
+    def __len__(self):
+        return self._conn().execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+
+    def stats(self):
+        return {"backend": "sqlite", "active": len(self), "max_entries": self.max_entries, "path": self.path}
+
+    def close(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+
+def get_session_store(backend=SESSION_BACKEND):
+    if backend == "sqlite":
+        return SQLiteSessionStore()
+    if backend == "memory":
+        return MemorySessionStore()
+    raise ValueError(f"Unknown SESSION_BACKEND: {backend}")
@@ -0,0 +1,85 @@
+"""
+Local stand-in for the WhatsApp Cloud (Graph) API.
+
+Run it next to the backend and point GRAPH_API_BASE at it:
+
+    uvicorn backend.whatsapp.stub_graph:app --port 9000
+    GRAPH_API_BASE=http://127.0.0.1:9000/v20.0 WHATSAPP_TOKEN=x WHATSAPP_PHONE_ID=1 \\
+        uvicorn backend.app:app
+
+STUB_LATENCY_MS, STUB_FAIL_RATE (fraction answered 503) and STUB_THROTTLE_RATE
+(fraction answered 429 with Retry-After) shape its behaviour.
+"""
+import asyncio
+import os
+import random
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, Response
+
+STUB_LATENCY_MS = float(os.getenv("STUB_LATENCY_MS", "20"))
+STUB_FAIL_RATE = float(os.getenv("STUB_FAIL_RATE", "0"))
+STUB_THROTTLE_RATE = float(os.getenv("STUB_THROTTLE_RATE", "0"))
+STUB_MEDIA_BYTES = int(os.getenv("STUB_MEDIA_BYTES", str(256 * 1024)))
+
+# 1x1 PNG header followed by filler so MIME sniffing sees a real image
+PNG_PREFIX = b"\x89PNG\r\n\x1a\n"
+
+app = FastAPI(title="Graph API stub")
+sent = []  # (to, body) of every accepted message, for assertions
+downloads = 0
+
+
+async def _simulate():
+    if STUB_LATENCY_MS:
+        await asyncio.sleep(STUB_LATENCY_MS / 1000)
+    roll = random.random()
+    if roll < STUB_THROTTLE_RATE:
+        return JSONResponse(
+            {"error": {"code": 130429, "message": "Rate limit hit"}},
+            status_code=429,
+            headers={"Retry-After": "0.05"},
+        )
+    if roll < STUB_THROTTLE_RATE + STUB_FAIL_RATE:
+        return JSONResponse({"error": {"code": 2, "message": "Service temporarily unavailable"}}, status_code=503)
+    return None
+
+
+@app.post("/{version}/{phone_id}/messages")
+async def send_message(version: str, phone_id: str, request: Request):
+    error = await _simulate()
+    if error is not None:
+        return error
+    payload = await request.json()
+    sent.append((payload.get("to"), payload.get("text", {}).get("body")))
+    return {
+        "messaging_product": "whatsapp",
+        "contacts": [{"input": payload.get("to"), "wa_id": payload.get("to")}],
+        "messages": [{"id": f"wamid.stub{len(sent)}"}],
+    }
+
+
+@app.get("/stub/stats")
+async def stub_stats():
+    """Counters the load harness polls to tell when queued work has drained."""
+    return {"sent": len(sent), "downloads": downloads}
+
+
+@app.get("/media/{media_id}")
+async def media_download(media_id: str):
+    global downloads
+    error = await _simulate()
+    if error is not None:
+        return error
+    downloads += 1
+    body = PNG_PREFIX + media_id.encode() + b"\0" * max(0, STUB_MEDIA_BYTES - len(PNG_PREFIX) - len(media_id))
+    return Response(body, media_type="image/png")
+
+
+@app.get("/{version}/{media_id}")
+async def media_info(version: str, media_id: str, request: Request):
+    error = await _simulate()
+    if error is not None:
+        return error
+    base = str(request.base_url).rstrip("/")
+    return {"url": f"{base}/media/{media_id}", "mime_type": "image/png", "id": media_id}
@@ -1,23 +1,36 @@
 from fastapi import APIRouter, Request
+from fastapi.concurrency import run_in_threadpool
 from fastapi.responses import PlainTextResponse, JSONResponse
-from backend.init_db import SessionLocal
-from backend.models import Complaint
-from backend.whatsapp.meta_handler import send_whatsapp_message, download_media, get_nearest_police_station
-from uuid import uuid4
-import re, os
-from backend.utils.grievance_links import get_grievance_link
+from backend.init_db import session_scope
+from backend.whatsapp.meta_handler import send_whatsapp_message, download_media
+from backend.whatsapp.flows import Turn, engine
+from backend.whatsapp.dedup import claim, dedup, iter_messages, loads, release
+from backend.whatsapp.dispatcher import WebhookDispatcher
+from backend.whatsapp.graph_client import graph_client
+from backend.whatsapp.session_store import get_session_store
+import asyncio, json, os
+from backend.message_log import message_log
+from backend.emotion_model import emotion_service, predict_emotion
+from backend.status_lookup import status_cache
+from backend.logs import get_logger
+from backend.metrics import STAGE_SECONDS, WEBHOOK_SECONDS, registry
+import time
 
 router = APIRouter()
 
 VERIFY_TOKEN = os.getenv("VERIFY_TOKEN", "cybersathi_verify")
-sessions = {}  # Temporary memory for user chat progress
+WEBHOOK_MODE = os.getenv("WEBHOOK_MODE", "queue")  # "queue" (ack first) or "inline"
+sessions = get_session_store()  # Chat progress per sender (see SESSION_BACKEND)
+# Compare-and-set retries when another worker process saved the same chat during a turn (SESSION_BACKEND=sqlite)
+SESSION_SAVE_ATTEMPTS = int(os.getenv("SESSION_SAVE_ATTEMPTS", "3"))
+WEBHOOK_RECORD_FILE = os.getenv("WEBHOOK_RECORD_FILE")  # append raw payloads (JSONL) for benchmarks/replay_flows.py
 
-# ---------------- Validation Helpers ----------------
-def validate_email(email): return re.match(r"[^@]+@[^@]+\.[^@]+", email)
-def validate_phone(phone): return re.match(r"^\+?\d{10,13}$", phone)
-def validate_dob(dob): return re.match(r"^\d{2}-\d{2}-\d{4}$", dob)
-def validate_pin(pin): return re.match(r"^\d{6}$", pin)
-def generate_ticket(): return f"CYB-{str(uuid4())[:8].upper()}"
+log = get_logger("webhook")
+
+
+def record_payload(data):
+    with open(WEBHOOK_RECORD_FILE, "a", encoding="utf-8") as f:
+        f.write(json.dumps(data, ensure_ascii=False) + "\n")
 
 # ---------------- Webhook Verification ----------------
 @router.get("/webhook")
@@ -27,233 +40,180 @@ async def verify_webhook(request: Request):
     challenge = request.query_params.get("hub.challenge")
 
     if mode == "subscribe" and token == VERIFY_TOKEN:
-        print("✅ Webhook Verified Successfully!")
+        log.info("✅ Webhook Verified Successfully!")
         return PlainTextResponse(content=challenge)
     else:
-        print("❌ Webhook Verification Failed.")
+        log.warning("❌ Webhook Verification Failed.")
         return JSONResponse({"error": "Verification failed"}, status_code=403)
 
 # ---------------- Message Handling ----------------
 @router.post("/webhook")
 async def receive_message(request: Request):
-    data = await request.json()
-    db = SessionLocal()
+    started = time.perf_counter()
+    response = await _receive_message(request)
+    outcome = response.get("status", "?") if isinstance(response, dict) else str(response.status_code)
+    WEBHOOK_SECONDS.observe(time.perf_counter() - started, outcome)
+    return response
 
-    try:
-        entry = data["entry"][0]
-        change = entry["changes"][0]["value"]
-        message_obj = change["messages"][0]
-        sender = message_obj["from"]
-
-        # Detect message type (text / image / document)
-        msg_type = message_obj.get("type", "text")
-        text = ""
-        media_file_path = None
-
-        if msg_type == "text":
-            text = message_obj["text"]["body"].strip()
-        elif msg_type == "image":
-            media_id = message_obj["image"]["id"]
-            media_file_path = download_media(media_id, "image")
-            text = "[image uploaded]"
-        elif msg_type == "document":
-            media_id = message_obj["document"]["id"]
-            media_file_path = download_media(media_id, "document")
-            text = "[document uploaded]"
-        else:
-            print("⚠️ Unsupported message type:", msg_type)
-            return {"status": "unsupported"}
 
-    except Exception as e:
-        print("⚠️ Webhook received non-message payload:", e)
+async def _receive_message(request):
+    data = loads(await request.body())
+    if WEBHOOK_RECORD_FILE:
+        record_payload(data)
+
+    messages = list(iter_messages(data))
+    if not messages:
+        log.debug("Webhook received non-message payload")
         return {"status": "ignored"}
 
-    # ---- New user greeting ----
-    if sender not in sessions:
-        sessions[sender] = {"stage": "menu"}
-        send_whatsapp_message(sender,
-            "👋 *Welcome to CyberSathi!* 🚔\n\n"
-            "Choose an option:\n"
-            "A️⃣ Register New Complaint\n"
-            "B️⃣ Check Complaint Status\n"
-            "C️⃣ Account Unfreeze Request\n"
-            "D️⃣ Other Queries"
-        )
-        return {"status": "menu sent"}
-
-    user = sessions[sender]
-
-    # ---- Menu ----
-    if user["stage"] == "menu":
-        choice = text.lower()
-        if choice == "a":
-            user["stage"] = "name"
-            send_whatsapp_message(sender, "Please enter your *Full Name*:")
-        elif choice == "b":
-            user["stage"] = "status"
-            send_whatsapp_message(sender, "Enter your *Phone Number* or *Ticket Number* to check status:")
-        elif choice == "c":
-            user["stage"] = "unfreeze"
-            send_whatsapp_message(sender, "Enter your *Account Number or UPI ID* for unfreeze request:")
+    results, duplicates = [], 0
+    for message_obj in messages:
+        message_id = message_obj.get("id")
+        if not dedup.first_sighting(message_id):
+            # Redelivery of a message we already accepted: ack without side effects
+            duplicates += 1
+            continue
+
+        if WEBHOOK_MODE == "inline":
+            results.append(await run_in_threadpool(process_message, message_obj))
+        elif not dispatcher.submit(message_obj["from"], message_obj):
+            # Shard is full: ask Meta to redeliver later instead of buffering unbounded work
+            dedup.forget(message_id)
+            return JSONResponse({"status": "busy"}, status_code=503, headers={"Retry-After": "5"})
         else:
-            send_whatsapp_message(sender, "❌ Invalid option. Please type A, B, or C.")
-        return {"status": "menu received"}
-
-    # ---------------- Complaint Registration Flow ----------------
-    if user["stage"] == "name":
-        user["name"] = text
-        user["stage"] = "father"
-        send_whatsapp_message(sender, "Enter your *Father/Spouse/Guardian Name*:")
-
-    elif user["stage"] == "father":
-        user["father_name"] = text
-        user["stage"] = "dob"
-        send_whatsapp_message(sender, "Enter your *Date of Birth (DD-MM-YYYY)*:")
-
-    elif user["stage"] == "dob":
-        if not validate_dob(text):
-            send_whatsapp_message(sender, "⚠️ Invalid format. Please use DD-MM-YYYY.")
-            return {"status": "retry"}
-        user["dob"] = text
-        user["stage"] = "phone"
-        send_whatsapp_message(sender, "Enter your *Phone Number* (+91XXXXXXXXXX):")
-
-    elif user["stage"] == "phone":
-        if not validate_phone(text):
-            send_whatsapp_message(sender, "⚠️ Invalid number. Please re-enter (+91XXXXXXXXXX):")
-            return {"status": "retry"}
-        user["phone"] = text
-        user["stage"] = "email"
-        send_whatsapp_message(sender, "Enter your *Email ID*:")
-
-    elif user["stage"] == "email":
-        if not validate_email(text):
-            send_whatsapp_message(sender, "⚠️ Invalid email. Please re-enter:")
-            return {"status": "retry"}
-        user["email"] = text
-        user["stage"] = "village"
-        send_whatsapp_message(sender, "Enter your *Village Name*:")
-
-    elif user["stage"] == "village":
-        user["village"] = text
-        user["stage"] = "post_office"
-        send_whatsapp_message(sender, "Enter your *Post Office Name*:")
-
-    elif user["stage"] == "post_office":
-        user["post_office"] = text
-        user["stage"] = "police_station"
-        send_whatsapp_message(sender, "Enter your *Nearest Police Station*:")
-
-    elif user["stage"] == "police_station":
-        user["police_station"] = text
-        user["stage"] = "district"
-        send_whatsapp_message(sender, "Enter your *District Name*:")
-
-    elif user["stage"] == "district":
-        user["district"] = text
-        user["stage"] = "pincode"
-        send_whatsapp_message(sender, "Enter your *PIN Code (6 digits)*:")
-
-    elif user["stage"] == "pincode":
-        if not validate_pin(text):
-            send_whatsapp_message(sender, "⚠️ Invalid PIN. Please enter a 6-digit number:")
-            return {"status": "retry"}
-        user["pincode"] = text
-        user["stage"] = "fraud"
-        send_whatsapp_message(sender,
-            "Select Fraud Type:\n"
-            "1️⃣ UPI / Banking\n"
-            "2️⃣ Social Media\n"
-            "3️⃣ Job / Loan App\n"
-            "4️⃣ Other"
-        )
-
-    elif user["stage"] == "fraud":
-        mapping = {"1": "UPI/Banking", "2": "Social Media", "3": "Job/Loan App", "4": "Other"}
-        user["fraud"] = mapping.get(text, "Other")
-        user["stage"] = "desc"
-        send_whatsapp_message(sender,
-            "Please describe your issue briefly and upload any related *screenshots, PDFs, or Aadhaar* if available."
-        )
-
-    elif user["stage"] == "desc":
-        user["desc"] = text
-        ticket = generate_ticket()
-
-        complaint = Complaint(
-            ticket_number=ticket,
-            name=user["name"],
-            father_name=user["father_name"],
-            dob=user["dob"],
-            phone=user["phone"],
-            email=user["email"],
-            village=user["village"],
-            post_office=user["post_office"],
-            police_station=user["police_station"],
-            district=user["district"],
-            pincode=user["pincode"],
-            fraud_type=user["fraud"],
-            description=text,
-            media_files=media_file_path,
-            status="Registered"
-        )
-        db.add(complaint)
-        db.commit()
-
-        # ✅ Send confirmation
-        send_whatsapp_message(sender,
-            f"✅ *Complaint Registered Successfully!*\n\n"
-            f"🆔 Ticket No: *{ticket}*\n"
-            "Keep this safe for future status checks (Option B)."
-        )
-
-        # 🚓 NEW: Add nearest police station call info
-        station_info = get_nearest_police_station(user["police_station"])
-        station_msg = (
-            f"📍 Based on your location, your nearest police station is:\n"
-            f"*{station_info['name']}*\n\n"
-            f"📞 Call Now: {station_info['phone']}\n\n"
-            f"Stay alert and do not share OTP or banking details with anyone. 🚔"
-        )
-        send_whatsapp_message(sender, station_msg)
-
-        # Suggest grievance portal link
-        link_message = get_grievance_link(user["fraud"] + " " + user["desc"])
-        send_whatsapp_message(sender, f"📎 You may also visit this link for direct help:\n{link_message}")
-
-        sessions.pop(sender, None)
-        return {"status": "complaint registered"}
-
-    # ---------------- Status Check ----------------
-    elif user["stage"] == "status":
-        record = db.query(Complaint).filter(
-            (Complaint.phone == text) | (Complaint.ticket_number == text)
-        ).first()
-
-        if record:
-            msg = (
-                f"📋 *Complaint Status*\n"
-                f"👤 Name: {record.name}\n"
-                f"🆔 Ticket: {record.ticket_number}\n"
-                f"💬 Type: {record.fraud_type}\n"
-                f"📍 District: {record.district}\n"
-                f"📎 File: {record.media_files or 'No files uploaded'}\n"
-                f"📦 Status: {record.status}"
-            )
+            results.append({"status": "queued"})
+
+    if not results:
+        return {"status": "duplicate"}
+    if len(messages) == 1:
+        return results[0]
+    return {"status": "accepted", "results": results, "duplicates": duplicates}
+
+
+@router.get("/webhook/stats")
+async def webhook_stats():
+    return {
+        **dispatcher.stats(),
+        "outbound": graph_client.stats(),
+        "sessions": sessions.stats(),
+        "status_cache": status_cache.stats(),
+        "message_log": message_log.stats(),
+        "emotion": emotion_service.stats(),
+        "dedup": dedup.stats(),
+    }
+
+
+def logged_sender(send):
+    """Wrap a send function so every outbound reply is appended to the message log."""
+    def _send(to, message):
+        message_log.log(to, message, "out")
+        return send(to, message)
+    return _send
+
+
+def process_message(message_obj, send=send_whatsapp_message):
+    """
+    Runs the conversation state machine for one inbound message.
+    Synchronous on purpose: it is executed on a worker thread. Replies go
+    through `send(to, text)` so the queued path can hand them to the async client.
+    """
+    sender = message_obj["from"]
+    message_id = message_obj.get("id")
+    if not claim(message_id, sender):
+        return {"status": "duplicate"}
+    try:
+        return _run_flow(message_obj, sender, logged_sender(send))
+    except Exception:
+        # Give the ID back: a redelivery (or retry) must run the message, not be dropped as a duplicate
+        release(message_id)
+        raise
+
+
+def _run_flow(message_obj, sender, send):
+    # Detect message type (text / image / document)
+    msg_type = message_obj.get("type", "text")
+    text = ""
+    media_file_path = None
+    shared_location = None
+
+    if msg_type == "text":
+        text = message_obj["text"]["body"].strip()
+    elif msg_type == "image":
+        media_id = message_obj["image"]["id"]
+        media_file_path = download_media(media_id)
+        text = "[image uploaded]"
+    elif msg_type == "document":
+        media_id = message_obj["document"]["id"]
+        media_file_path = download_media(media_id)
+        text = "[document uploaded]"
+    elif msg_type == "location":
+        location = message_obj["location"]
+        shared_location = (location["latitude"], location["longitude"])
+        text = "[location shared]"
+    else:
+        log.warning("⚠️ Unsupported message type", type=msg_type)
+        return {"status": "unsupported"}
+
+    emotion = predict_emotion(text) if msg_type == "text" else None
+    message_log.log(sender, text, "in", emotion)
+
+    # Replies wait until the turn's chat state is saved; a turn that lost the race is replayed on fresh state
+    for attempt in range(1, SESSION_SAVE_ATTEMPTS + 1):
+        replies = []
+        try:
+            result, saved = _run_turn(sender, text, media_file_path, shared_location,
+                                      lambda to, body: replies.append((to, body)))
+        except Exception:
+            _flush(replies, send)
+            raise
+        if saved:
+            break
+        if attempt < SESSION_SAVE_ATTEMPTS:
+            log.warning("🔁 Chat changed in another worker, replaying the message", attempt=attempt)
         else:
-            msg = "⚠️ No record found for the given details."
-        send_whatsapp_message(sender, msg)
-        sessions.pop(sender, None)
-        return {"status": "status checked"}
-
-    # ---------------- Account Unfreeze ----------------
-    elif user["stage"] == "unfreeze":
-        send_whatsapp_message(sender, f"🧊 Your unfreeze request for *{text}* has been received. We’ll review it soon.")
-        sessions.pop(sender, None)
-        return {"status": "unfreeze submitted"}
-
-    # Acknowledge uploads
-    if media_file_path:
-        send_whatsapp_message(sender, "📎 File received successfully. You can send more or type *done* to finish.")
-
-    return {"status": "done"}
+            log.error("⚠️ Chat kept changing in other workers, keeping the last reply", attempts=attempt)
+    _flush(replies, send)
+    return result
+
+
+def _flush(replies, send):
+    for to, body in replies:
+        send(to, body)
+
+
+def _run_turn(sender, text, media_file_path, shared_location, send):
+    """One pass of the state machine; `saved` is False when another worker wrote the chat meanwhile."""
+    # ---- New user greeting ----
+    user, version = sessions.load(sender)
+    if user is None:
+        user = {}
+        with STAGE_SECONDS.time("greet"):
+            engine.greet(send, sender, user)
+        return {"status": "menu sent"}, sessions.save(sender, user, version)
+
+    started = time.perf_counter()
+    stage = user.get("stage", "menu")
+    try:
+        with session_scope() as db:
+            result = engine.handle(Turn(db, sender, user, text, media_file_path, shared_location, send))
+    finally:
+        STAGE_SECONDS.observe(time.perf_counter() - started, stage)
+        # A cleared record means the flow finished; otherwise persist progress
+        saved = sessions.save(sender, user, version) if user else sessions.delete(sender, version)
+    return result, saved
+
+
+async def handle_queued_message(message_obj):
+    """Dispatcher handler: run the flow on a thread, then send its replies in order."""
+    outbox = []
+    await asyncio.to_thread(process_message, message_obj, lambda to, text: outbox.append((to, text)))
+    if outbox:
+        await graph_client.send_batch(outbox)
+
+
+# Worker pool that drains queued webhook messages (started from the app lifespan)
+dispatcher = WebhookDispatcher(handle_queued_message)
+
+registry.gauge("cybersathi_webhook_queue_depth", "Messages waiting in the dispatcher shards", fn=dispatcher.depth)
+registry.gauge("cybersathi_webhook_in_flight", "Messages being processed", fn=lambda: dispatcher.stats()["in_flight"])
+registry.gauge("cybersathi_active_sessions", "Chats with saved progress", fn=lambda: sessions.stats()["active"])
@@ -0,0 +1,99 @@
+"""
+Field-encryption overhead on the registration and dashboard paths.
+
+    python -m benchmarks.bench_field_crypto [--rows 2000]
+
+Registration: cost of encrypting the PII fields of one complaint, next
+to the cost of the insert itself. Dashboard: one 50-row page decrypted per
+row through the ORM column type, versus decrypt_page() on raw tokens, each
+with a cold and a warm plaintext cache.
+"""
+import argparse
+import os
+import tempfile
+import time
+
+_tmp = tempfile.mkdtemp(prefix="crypto-bench-")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(_tmp, 'bench.db')}")
+os.environ.setdefault("CYBERSATHI_FERNET_KEY_FILE", os.path.join(_tmp, "fernet.key"))
+os.environ.setdefault("CYBERSATHI_BLIND_INDEX_KEY_FILE", os.path.join(_tmp, "blind.key"))
+
+from backend import crypto  # noqa: E402
+from backend.init_db import init_db, session_scope  # noqa: E402
+from backend.models import Complaint, ENCRYPTED_FIELDS  # noqa: E402
+from backend.routes.admin_dashboard import query_complaints  # noqa: E402
+from backend.utils.tickets import new_ticket  # noqa: E402
+
+PAGE = 50
+
+
+def complaint(i):
+    return dict(
+        ticket_number=new_ticket(), name=f"Citizen {i}", father_name=f"Parent {i}", dob="01-01-1990",
+        phone=f"+9198{i:08d}", email=f"user{i}@example.com", wa_id=f"9198{i:08d}", district="Khordha",
+        fraud_type="UPI/Banking", description="Lost money in a UPI transaction", status="Registered",
+    )
+
+
+def per_row_us(seconds, rows):
+    return seconds / rows * 1e6
+
+
+def bench_encrypt(rows):
+    values = [complaint(i) for i in range(rows)]
+    started = time.perf_counter()
+    for v in values:
+        for field in ENCRYPTED_FIELDS:
+            crypto.encrypt(v[field])
+    return per_row_us(time.perf_counter() - started, rows)
+
+
+def bench_insert(rows):
+    started = time.perf_counter()
+    with session_scope() as db:
+        for i in range(rows):
+            db.add(Complaint(**complaint(i)))
+            db.commit()  # the webhook commits each registration on its own
+    return per_row_us(time.perf_counter() - started, rows)
+
+
+def bench_orm_page():
+    with session_scope() as db:
+        started = time.perf_counter()
+        rows = db.query(Complaint).order_by(Complaint.date_created.desc(), Complaint.id.desc()).limit(PAGE).all()
+        [(r.name, r.phone) for r in rows]
+        return per_row_us(time.perf_counter() - started, PAGE)
+
+
+def bench_batched_page():
+    with session_scope() as db:
+        started = time.perf_counter()
+        query_complaints(db, limit=PAGE)
+        return per_row_us(time.perf_counter() - started, PAGE)
+
+
+def cold(fn):
+    crypto.reload_keys()  # clears the plaintext cache
+    crypto.key_ring.get()
+    return fn()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=2000)
+    args = parser.parse_args()
+
+    init_db()
+    crypto.key_ring.get()
+    crypto.blind_index_key.get()
+
+    encrypt_us = bench_encrypt(args.rows)
+    insert_us = bench_insert(args.rows)
+    print(f"registration: encrypt {len(ENCRYPTED_FIELDS)} fields {encrypt_us:8.1f} µs/row   insert+commit (incl. encrypt) {insert_us:8.1f} µs/row")
+
+    for label, fn in (("ORM per-row", bench_orm_page), ("decrypt_page", bench_batched_page)):
+        print(f"dashboard {label:<13}: cold {cold(fn):7.1f} µs/row   warm {fn():7.1f} µs/row")
+
+
+if __name__ == "__main__":
+    main()
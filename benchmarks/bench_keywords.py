@@ -0,0 +1,169 @@
+"""
+Microbenchmark: shared keyword engine vs. the per-function substring scans it replaced.
+
+    python -m benchmarks.bench_keywords [--messages 20000]
+
+Each message is classified for intent, fraud category, advice and grievance
+link — what the webhook would need per message. The legacy path runs the four
+original functions (four lowercases, dozens of `in` scans); the engine path
+scans once and answers all four from the same result.
+"""
+import argparse
+import random
+import time
+
+from backend.utils.keywords import get_engine
+
+# ---------------- Legacy implementations (verbatim logic) ----------------
+def legacy_detect_intent(text):
+    t = (text or "").lower()
+    if any(k in t for k in ["status", "ack", "acknowledgement", "reference", "track"]):
+        return "status_check"
+    if any(k in t for k in ["unfreeze", "frozen", "freeze", "unlock"]):
+        return "account_unfreeze"
+    if any(k in t for k in ["fraud", "scam", "hacked", "transaction", "upi", "loan", "card", "apk", "fake"]):
+        return "new_complaint"
+    return "other"
+
+
+def legacy_detect_fraud_category(text):
+    t = (text or "").lower()
+    if any(k in t for k in ["upi", "imps", "neft", "rtgs", "inb"]):
+        return "upi_fraud"
+    if any(k in t for k in ["loan app", "loanapp", "instant loan"]):
+        return "loan_app"
+    if any(k in t for k in ["apk", "downloaded app", "install from link"]):
+        return "apk_fraud"
+    if any(k in t for k in ["debit card", "credit card", "card"]):
+        return "card_fraud"
+    if any(k in t for k in ["amazon", "flipkart", "ecommerce", "e-commerce"]):
+        return "ecommerce_fraud"
+    if any(k in t for k in ["investment", "trading", "ipo", "crypto"]):
+        return "investment_fraud"
+    if any(k in t for k in ["phish", "fake website", "website"]):
+        return "phishing"
+    return "other"
+
+
+def legacy_get_advice(text):
+    text_lower = text.lower()
+    if "scam" in text_lower or "fraud" in text_lower:
+        return "fraud"
+    elif "sad" in text_lower or "depress" in text_lower:
+        return "sadness"
+    elif "angry" in text_lower or "frustrated" in text_lower:
+        return "anger"
+    return "default"
+
+
+def legacy_get_grievance_link(user_message):
+    text = user_message.lower()
+    if any(word in text for word in ["facebook", "instagram", "meta"]):
+        return "meta"
+    elif "twitter" in text or "x.com" in text:
+        return "twitter"
+    elif "telegram" in text:
+        return "telegram"
+    elif "gmail" in text or "google" in text or "youtube" in text:
+        return "google"
+    elif "whatsapp" in text:
+        return "whatsapp"
+    elif "call" in text or "sms" in text or "phone" in text:
+        return "telecom"
+    elif any(word in text for word in ["upi", "bank", "loan", "fraud"]):
+        return "financial"
+    return "default"
+
+
+# ---------------- Corpus ----------------
+TEMPLATES = [
+    "I lost {amt} rupees through a {channel} transaction yesterday, please help",
+    "Someone called me pretending to be from {bank} bank and asked for my OTP",
+    "my {card} card was used for {amt} without my permission",
+    "got scammed on an instant loan app, they are harassing my contacts",
+    "check status of my complaint {ticket}",
+    "my account is frozen after a {channel} transfer, how to unfreeze",
+    "I installed an apk from a link on {platform} and my money is gone",
+    "{platform} account hacked and they are asking my friends for money",
+    "invested in a crypto trading group on {platform}, now they block me",
+    "received an sms with a fake website link for KYC update",
+    "ordered on {shop} but the seller was fake",
+    "I feel so sad and depressed after losing my savings",
+    "I am angry and frustrated, nobody is helping",
+    "hi", "a", "b", "1", "done", "thank you",
+]
+FILL = {
+    "amt": ["5000", "12,000", "49999", "1.2 lakh"],
+    "channel": ["UPI", "IMPS", "NEFT", "net banking"],
+    "bank": ["SBI", "HDFC", "ICICI", "Odisha Gramya"],
+    "card": ["debit", "credit"],
+    "ticket": ["CYB-20250101-1234", "CYB-7F3A9C21"],
+    "platform": ["WhatsApp", "Telegram", "Instagram", "Facebook", "YouTube"],
+    "shop": ["Amazon", "Flipkart", "an e-commerce site"],
+}
+
+
+def build_corpus(n, seed=7):
+    rng = random.Random(seed)
+    out = []
+    for _ in range(n):
+        template = rng.choice(TEMPLATES)
+        out.append(template.format(**{k: rng.choice(v) for k, v in FILL.items()}))
+    return out
+
+
+def run_legacy(corpus):
+    for text in corpus:
+        legacy_detect_intent(text)
+        legacy_detect_fraud_category(text)
+        legacy_get_advice(text)
+        legacy_get_grievance_link(text)
+
+
+def run_engine(corpus):
+    engine = get_engine()
+    for text in corpus:
+        scanned = engine.scan(text)
+        engine.classify(text, "intent", scanned)
+        engine.classify(text, "fraud_category", scanned)
+        engine.respond(text, "advice", scanned)
+        engine.respond(text, "grievance", scanned)
+
+
+def best_of(fn, corpus, repeat):
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn(corpus)
+        times.append(time.perf_counter() - started)
+    return min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    corpus = build_corpus(args.messages)
+    get_engine()  # compile outside the timed region
+
+    legacy = best_of(run_legacy, corpus, args.repeat)
+    engine = best_of(run_engine, corpus, args.repeat)
+    per = lambda s: s / len(corpus) * 1e6
+
+    engine_obj = get_engine()
+    changed = sum(
+        legacy_detect_intent(t) != engine_obj.classify(t, "intent")
+        or legacy_detect_fraud_category(t) != engine_obj.classify(t, "fraud_category")
+        for t in corpus
+    )
+
+    print(f"messages: {len(corpus)}  (best of {args.repeat})")
+    print(f"legacy  : {per(legacy):7.2f} µs/message")
+    print(f"engine  : {per(engine):7.2f} µs/message  ({legacy / engine:.2f}x)")
+    print(f"intent/fraud labels that differ (word-boundary fixes): {changed}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,354 @@
+"""
+Load test: synthetic WhatsApp conversations POSTed to /webhook, with the
+Graph API replaced by backend.whatsapp.stub_graph.
+
+    python -m benchmarks.load_webhook [--chats 200] [--concurrency 50]
+    python -m benchmarks.load_webhook --target uvicorn --workers 4
+    python -m benchmarks.load_webhook --webhook-mode queue --compare benchmarks/results/<old>.json
+
+--target inprocess drives backend.app:app through httpx's ASGI transport (no
+sockets between client and app); --target uvicorn starts `uvicorn
+backend.app:app --workers N` and goes over HTTP. Either way the stub runs as
+its own uvicorn process, and database, sessions, media and keys live in a
+throwaway directory (sessions use the SQLite store so every worker sees
+every chat).
+
+Each chat sends its messages in order and waits for each response; up to
+--concurrency chats run at once. With --webhook-mode inline (default) the
+response comes after the flow ran and its replies were sent, so per-stage
+latency is the full processing cost; with queue it is the ack, and the run
+also waits for the stub's reply count to settle to report end-to-end
+throughput. Results (per-stage p50/p95/p99, throughput, server RSS) are
+written to benchmarks/results/<commit>-<target>-<mode>.json; --compare
+prints the change against an earlier file.
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import platform
+import resource
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+from benchmarks.payloads import conversations
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def isolated_env(tmp, stub_port, args):
+    """Environment for the app under test: everything on disk goes to `tmp`."""
+    return {
+        "DATABASE_URL": f"sqlite:///{os.path.join(tmp, 'load.db')}",
+        "SESSION_BACKEND": "sqlite",
+        "SESSION_DB_PATH": os.path.join(tmp, "sessions.db"),
+        "SESSION_SNAPSHOT": os.path.join(tmp, "sessions.snapshot.json"),
+        "MEDIA_ROOT": os.path.join(tmp, "media"),
+        "TRANSLATION_CACHE_PATH": os.path.join(tmp, "translations.db"),
+        "CYBERSATHI_FERNET_KEY_FILE": os.path.join(tmp, "fernet.key"),
+        "CYBERSATHI_BLIND_INDEX_KEY_FILE": os.path.join(tmp, "blind_index.key"),
+        "REMOTE_TRANSLATOR": "stub",
+        "GRAPH_API_BASE": f"http://127.0.0.1:{stub_port}/v20.0",
+        "WHATSAPP_TOKEN": "bench",
+        "WHATSAPP_PHONE_ID": "1",
+        "WEBHOOK_MODE": args.webhook_mode,
+        "WARMUP": "1",  # measure steady state, not the first request loading the model
+    }
+
+
+def wait_ready(url, proc, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"{url} exited with code {proc.returncode}")
+        try:
+            httpx.get(url, timeout=1)
+            return
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    raise RuntimeError(f"{url} did not come up within {timeout}s")
+
+
+def start_uvicorn(app, port, env, log_path, workers=1):
+    cmd = [sys.executable, "-m", "uvicorn", app, "--port", str(port), "--log-level", "warning"]
+    if workers > 1:
+        cmd += ["--workers", str(workers)]
+    log = open(log_path, "w")
+    return subprocess.Popen(cmd, env={**os.environ, **env}, stdout=log, stderr=subprocess.STDOUT)
+
+
+# -------------------------------------------------------
+# 📏 Server memory
+# -------------------------------------------------------
+def process_tree_rss_kb(pid):
+    """RSS of `pid` plus its children (uvicorn workers), from /proc; None where unavailable."""
+    try:
+        parents = {}
+        for entry in os.listdir("/proc"):
+            if entry.isdigit():
+                with open(f"/proc/{entry}/stat") as f:
+                    parents[int(entry)] = int(f.read().rsplit(")", 1)[1].split()[1])
+    except OSError:
+        return None
+    tree, frontier = {pid}, [pid]
+    while frontier:
+        parent = frontier.pop()
+        children = [p for p, pp in parents.items() if pp == parent and p not in tree]
+        tree.update(children)
+        frontier += children
+    total = 0
+    for p in tree:
+        try:
+            with open(f"/proc/{p}/status") as f:
+                total += next(int(line.split()[1]) for line in f if line.startswith("VmRSS:"))
+        except (OSError, StopIteration):
+            pass
+    return total
+
+
+def self_rss_kb():
+    with contextlib.suppress(OSError):
+        with open("/proc/self/status") as f:
+            return next(int(line.split()[1]) for line in f if line.startswith("VmRSS:"))
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss  # peak, KB on Linux
+
+
+class RssSampler:
+    def __init__(self, measure, interval=0.25):
+        self.measure = measure
+        self.interval = interval
+        self.samples = []
+
+    async def run(self):
+        while True:
+            value = await asyncio.to_thread(self.measure)
+            if value:
+                self.samples.append(value)
+            await asyncio.sleep(self.interval)
+
+    def summary(self):
+        if not self.samples:
+            return {}
+        return {"start_kb": self.samples[0], "peak_kb": max(self.samples), "end_kb": self.samples[-1]}
+
+
+# -------------------------------------------------------
+# 🚚 Traffic
+# -------------------------------------------------------
+async def run_chats(client, chats, concurrency):
+    """POST every chat's messages in order; returns [(stage, seconds, http status)]."""
+    gate = asyncio.Semaphore(concurrency)
+    timings = []
+
+    async def chat(messages):
+        async with gate:
+            for stage, payload in messages:
+                started = time.perf_counter()
+                try:
+                    status = (await client.post("/webhook", json=payload)).status_code
+                except httpx.HTTPError:
+                    status = 0
+                timings.append((stage, time.perf_counter() - started, status))
+
+    await asyncio.gather(*(chat(messages) for messages in chats))
+    return timings
+
+
+async def wait_drained(stub_url, settle=1.0, timeout=300):
+    """Queue mode: wait until the stub has seen no new replies for `settle` seconds."""
+    deadline = time.monotonic() + timeout
+    last, last_change = -1, time.monotonic()
+    async with httpx.AsyncClient(base_url=stub_url) as stub:
+        while time.monotonic() < deadline:
+            sent = (await stub.get("/stub/stats")).json()["sent"]
+            now = time.monotonic()
+            if sent != last:
+                last, last_change = sent, now
+            elif now - last_change >= settle:
+                return last_change
+            await asyncio.sleep(0.1)
+    return time.monotonic()
+
+
+async def drive(client, chats, args, stub_url, rss_measure):
+    sampler = RssSampler(rss_measure)
+    sampling = asyncio.create_task(sampler.run())
+    started = time.perf_counter()
+    try:
+        timings = await run_chats(client, chats, args.concurrency)
+        acked = time.perf_counter()
+        drained = acked
+        if args.webhook_mode == "queue":
+            drained = await wait_drained(stub_url) - time.monotonic() + time.perf_counter()
+    finally:
+        sampling.cancel()
+    return timings, acked - started, drained - started, sampler.summary()
+
+
+async def run_inprocess(chats, args, env, stub_url):
+    os.environ.update(env)
+    from backend.app import app  # imported only now so it sees the isolated environment
+
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        async with app.router.lifespan_context(app):
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://app", timeout=60) as client:
+                return await drive(client, chats, args, stub_url, self_rss_kb)
+
+
+async def run_uvicorn(chats, args, env, stub_url, tmp):
+    port = free_port()
+    server = start_uvicorn("backend.app:app", port, env, os.path.join(tmp, "app.log"), args.workers)
+    try:
+        wait_ready(f"http://127.0.0.1:{port}/", server)
+        limits = httpx.Limits(max_connections=args.concurrency)
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", timeout=60, limits=limits) as client:
+            return await drive(client, chats, args, stub_url, lambda: process_tree_rss_kb(server.pid))
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+
+# -------------------------------------------------------
+# 📋 Report
+# -------------------------------------------------------
+def percentile(sorted_samples, q):
+    return sorted_samples[min(len(sorted_samples) - 1, int(len(sorted_samples) * q))]
+
+
+def summarize(timings, seconds, drained_seconds, rss):
+    stages = {}
+    for stage, elapsed, status in timings:
+        stages.setdefault(stage, {"samples": [], "errors": 0})
+        stages[stage]["samples"].append(elapsed)
+        if status != 200:
+            stages[stage]["errors"] += 1
+    every = sorted(t for _, t, _ in timings)
+    out = {}
+    for stage, data in list(stages.items()) + [("ALL", {"samples": every, "errors": None})]:
+        samples = sorted(data["samples"])
+        out[stage] = {
+            "count": len(samples),
+            "errors": data["errors"] if data["errors"] is not None else sum(s["errors"] for s in stages.values()),
+            "p50_ms": round(percentile(samples, 0.50) * 1000, 2),
+            "p95_ms": round(percentile(samples, 0.95) * 1000, 2),
+            "p99_ms": round(percentile(samples, 0.99) * 1000, 2),
+        }
+    return {
+        "stages": out,
+        "messages": len(timings),
+        "seconds": round(seconds, 3),
+        "throughput_msg_s": round(len(timings) / seconds, 1) if seconds else None,
+        "end_to_end_seconds": round(drained_seconds, 3),
+        "end_to_end_msg_s": round(len(timings) / drained_seconds, 1) if drained_seconds else None,
+        "rss": rss,
+    }
+
+
+def print_report(result):
+    s = result["summary"]
+    print(f"{'stage':<26}{'msgs':>7}{'err':>5}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}")
+    rows = sorted(s["stages"].items(), key=lambda item: (item[0] == "ALL", -item[1]["p95_ms"]))
+    for stage, r in rows:
+        print(f"{stage:<26}{r['count']:>7}{r['errors']:>5}{r['p50_ms']:>9.1f}{r['p95_ms']:>9.1f}{r['p99_ms']:>9.1f}")
+    print(f"throughput: {s['throughput_msg_s']} msg/s acknowledged, {s['end_to_end_msg_s']} msg/s end to end")
+    if s["rss"]:
+        print(f"server RSS: start {s['rss']['start_kb'] / 1024:.1f} MB, peak {s['rss']['peak_kb'] / 1024:.1f} MB, "
+              f"end {s['rss']['end_kb'] / 1024:.1f} MB")
+
+
+def compare(result, baseline_path):
+    with open(baseline_path, encoding="utf-8") as f:
+        base = json.load(f)
+    print(f"\nvs {base['commit']} ({os.path.basename(baseline_path)}):")
+    old, new = base["summary"], result["summary"]
+    for stage, r in sorted(new["stages"].items()):
+        before = old["stages"].get(stage)
+        if before and before["p95_ms"]:
+            change = (r["p95_ms"] - before["p95_ms"]) / before["p95_ms"] * 100
+            print(f"  {stage:<26} p95 {before['p95_ms']:>8.1f} -> {r['p95_ms']:>8.1f} ms ({change:+.0f}%)")
+    if old["throughput_msg_s"] and new["throughput_msg_s"]:
+        change = (new["throughput_msg_s"] - old["throughput_msg_s"]) / old["throughput_msg_s"] * 100
+        print(f"  throughput {old['throughput_msg_s']} -> {new['throughput_msg_s']} msg/s ({change:+.0f}%)")
+
+
+def git_commit():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                check=True).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], capture_output=True,
+                               text=True).stdout.strip()
+        return commit + ("-dirty" if dirty else "")
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def save(result, out_dir):
+    os.makedirs(out_dir, exist_ok=True)
+    args = result["args"]
+    name = f"{result['commit']}-{args['target']}{args['workers'] if args['target'] == 'uvicorn' else ''}" \
+           f"-{args['webhook_mode']}.json"
+    path = os.path.join(out_dir, name)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(result, f, indent=2)
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--target", choices=["inprocess", "uvicorn"], default="inprocess")
+    parser.add_argument("--workers", type=int, default=2, help="uvicorn workers (--target uvicorn)")
+    parser.add_argument("--webhook-mode", choices=["inline", "queue"], default="inline")
+    parser.add_argument("--chats", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=11)
+    parser.add_argument("--stub-latency-ms", type=float, default=20)
+    parser.add_argument("--out", default=RESULTS_DIR)
+    parser.add_argument("--compare", help="earlier results JSON to diff against")
+    args = parser.parse_args()
+
+    chats = conversations(args.chats, seed=args.seed)
+    tmp = tempfile.mkdtemp(prefix="load-")
+    stub_port = free_port()
+    stub_url = f"http://127.0.0.1:{stub_port}"
+    stub = start_uvicorn("backend.whatsapp.stub_graph:app", stub_port,
+                         {"STUB_LATENCY_MS": str(args.stub_latency_ms)}, os.path.join(tmp, "stub.log"))
+    try:
+        wait_ready(f"{stub_url}/stub/stats", stub)
+        env = isolated_env(tmp, stub_port, args)
+        if args.target == "inprocess":
+            run = run_inprocess(chats, args, env, stub_url)
+        else:
+            run = run_uvicorn(chats, args, env, stub_url, tmp)
+        timings, seconds, drained, rss = asyncio.run(run)
+    finally:
+        stub.terminate()
+        stub.wait(timeout=30)
+
+    result = {
+        "commit": git_commit(),
+        "recorded_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "args": vars(args),
+        "summary": summarize(timings, seconds, drained, rss),
+    }
+    print_report(result)
+    print(f"\n📁 Saved {save(result, args.out)}  (logs in {tmp})")
+    if args.compare:
+        compare(result, args.compare)
+
+
+if __name__ == "__main__":
+    main()
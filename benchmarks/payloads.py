@@ -0,0 +1,70 @@
+"""
+Synthetic WhatsApp webhook traffic shared by the benchmarks.
+
+Each conversation is a list of (stage, payload) pairs: `payload` is what Meta
+would POST to /webhook and `stage` names the flow step that consumes it
+(e.g. "complaint.dob"), so timings can be reported per stage.
+"""
+import random
+
+MEDIA_TYPES = {"image": "image/jpeg", "document": "application/pdf"}
+
+
+def webhook(sender, message, rng=random):
+    """Wrap one message the way Meta delivers it."""
+    message = {"from": sender, "id": f"wamid.{rng.getrandbits(64):x}", **message}
+    return {"object": "whatsapp_business_account", "entry": [{"changes": [{"value": {"messages": [message]}}]}]}
+
+
+def text(body):
+    return {"type": "text", "text": {"body": body}}
+
+
+def media(kind, rng=random):
+    return {"type": kind, kind: {"id": f"media{rng.getrandbits(48):x}", "mime_type": MEDIA_TYPES[kind]}}
+
+
+def location(lat, lon):
+    return {"type": "location", "location": {"latitude": lat, "longitude": lon}}
+
+
+def complaint_messages(rng):
+    msgs = [("menu", text("a")), ("complaint.name", text("Ravi Kumar")), ("complaint.father", text("Suresh Kumar"))]
+    if rng.random() < 0.3:
+        msgs.append(("complaint.dob", text("1990/01/01")))  # invalid, retried
+    msgs += [("complaint.dob", text("01-01-1990")), ("complaint.phone", text("+919876543210")),
+             ("complaint.email", text("ravi@example.com")), ("complaint.village", text("Patia"))]
+    if rng.random() < 0.5:
+        # Evidence sent early: acknowledged, the step is asked again
+        msgs.append(("complaint.post_office", media(rng.choice(["image", "document"]), rng)))
+    msgs.append(("complaint.post_office", text("KIIT")))
+    if rng.random() < 0.4:
+        msgs.append(("complaint.police_station", location(20.35, 85.82)))
+    else:
+        msgs += [("complaint.police_station", text("Chandrasekharpur PS")), ("complaint.district", text("Khordha"))]
+    msgs += [("complaint.pincode", text("751024")), ("complaint.fraud", text("1")),
+             ("complaint.desc", text("I lost 5000 rupees through a UPI transaction"))]
+    return msgs
+
+
+def conversation(sender, rng, weights=(5, 3, 1, 1)):
+    """One chat: greeting, then a registration, status check, unfreeze request or evidence upload."""
+    kind = rng.choices(["complaint", "status", "unfreeze", "evidence"], weights=weights)[0]
+    msgs = [("greet", text("hi"))]
+    if kind == "complaint":
+        msgs += complaint_messages(rng)
+    elif kind == "status":
+        msgs += [("menu", text("b")), ("status", text("+919876543210"))]
+    elif kind == "unfreeze":
+        msgs += [("menu", text("c")), ("unfreeze", text("ravi@okaxis")), ("unfreeze_bank", text("SBI")),
+                 ("unfreeze_reference", text("skip"))]
+    else:
+        msgs += [("menu", text("e")), ("evidence_ticket", text("CYB-UNKNOWN")),  # not found: asked again
+                 ("evidence_ticket", media("document", rng))]
+    return [(stage, webhook(sender, m, rng)) for stage, m in msgs]
+
+
+def conversations(chats, seed=11, first_number=9000000000):
+    """`chats` conversations from distinct senders, reproducible for a given seed."""
+    rng = random.Random(seed)
+    return [conversation(f"91{first_number + i}", rng) for i in range(chats)]
@@ -0,0 +1,106 @@
+"""
+Replay harness: feed webhook payloads through the conversation flow engine
+and report the per-message processing cost by stage.
+
+    python -m benchmarks.replay_flows [--chats 500]
+    python -m benchmarks.replay_flows --file recorded.jsonl
+
+Payloads are recorded by running the app with WEBHOOK_RECORD_FILE=recorded.jsonl;
+without --file a synthetic set of conversations (registrations with retries
+and location shares, status checks, unfreeze requests, evidence uploads) is
+generated. Replies are collected instead of sent, media is not downloaded,
+and the database is a throwaway SQLite file, so the numbers are the cost of
+the flow itself plus its DB writes.
+"""
+import argparse
+import json
+import os
+import statistics
+import tempfile
+import time
+
+# Isolated database before the backend is imported
+_tmp = tempfile.mkdtemp(prefix="replay-")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(_tmp, 'replay.db')}")
+
+from backend.init_db import init_db, session_scope  # noqa: E402
+from backend.whatsapp.dedup import iter_messages  # noqa: E402
+from backend.whatsapp.flows import Turn, engine  # noqa: E402
+from benchmarks.payloads import conversations  # noqa: E402
+
+
+def synthetic_payloads(chats, seed=11):
+    return [payload for chat in conversations(chats, seed) for _, payload in chat]
+
+
+def parse(message_obj):
+    """(text, media path, location) the way process_message reads them, minus downloads."""
+    msg_type = message_obj.get("type", "text")
+    if msg_type == "text":
+        return message_obj["text"]["body"].strip(), None, None
+    if msg_type in ("image", "document"):
+        return f"[{msg_type} uploaded]", f"media/replay/{message_obj[msg_type]['id']}", None
+    if msg_type == "location":
+        loc = message_obj["location"]
+        return "[location shared]", None, (loc["latitude"], loc["longitude"])
+    return None, None, None
+
+
+def replay(payloads):
+    sessions = {}
+    timings = {}
+    for payload in payloads:
+        for message_obj in iter_messages(payload):
+            sender = message_obj["from"]
+            body, media, location = parse(message_obj)
+            if body is None:
+                continue
+            replies = []
+            send = lambda to, msg: replies.append(msg)
+            user = sessions.get(sender)
+            stage = user["stage"] if user else "new"
+            started = time.perf_counter()
+            if user is None:
+                user = {}
+                engine.greet(send, sender, user)
+            else:
+                with session_scope() as db:
+                    engine.handle(Turn(db, sender, user, body, media, location, send))
+            elapsed = time.perf_counter() - started
+            if user:
+                sessions[sender] = user
+            else:
+                sessions.pop(sender, None)
+            timings.setdefault(stage, []).append(elapsed)
+    return timings
+
+
+def report(timings):
+    rows = sorted(timings.items(), key=lambda item: -sum(item[1]))
+    every = [t for samples in timings.values() for t in samples]
+    print(f"{'stage':<20}{'messages':>9}{'mean µs':>10}{'p50 µs':>10}{'p95 µs':>10}")
+    for stage, samples in rows + [("ALL", every)]:
+        samples = sorted(samples)
+        p95 = samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+        print(f"{stage:<20}{len(samples):>9}{statistics.fmean(samples) * 1e6:>10.1f}"
+              f"{statistics.median(samples) * 1e6:>10.1f}{p95 * 1e6:>10.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--file", help="JSONL of recorded webhook payloads")
+    parser.add_argument("--chats", type=int, default=500)
+    args = parser.parse_args()
+
+    if args.file:
+        with open(args.file, encoding="utf-8") as f:
+            payloads = [json.loads(line) for line in f if line.strip()]
+    else:
+        payloads = synthetic_payloads(args.chats)
+
+    init_db()
+    report(replay(payloads))
+
+
+if __name__ == "__main__":
+    main()
@@ -15,8 +15,19 @@ def init_db():
             sender TEXT,
             message TEXT,
             emotion TEXT,
-            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
+            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+            direction VARCHAR(3) DEFAULT 'in',
+            label VARCHAR(32),
+            labeled_at DATETIME,
+            trained_at DATETIME
         )
     """)
+    cur.execute("CREATE INDEX IF NOT EXISTS ix_messages_sender_timestamp ON messages (sender, timestamp)")
+    cur.execute("CREATE INDEX IF NOT EXISTS ix_messages_timestamp ON messages (timestamp)")
+    existing = {row[1] for row in cur.execute("PRAGMA table_info(messages)")}
+    for column, ddl in (("label", "VARCHAR(32)"), ("labeled_at", "DATETIME"), ("trained_at", "DATETIME")):
+        if column not in existing:
+            cur.execute(f"ALTER TABLE messages ADD COLUMN {column} {ddl}")
+    cur.execute("CREATE INDEX IF NOT EXISTS ix_messages_label_trained ON messages (label, trained_at)")
     conn.commit()
     conn.close()
@@ -0,0 +1,27 @@
+import os
+import shutil
+import sys
+import tempfile
+
+from cryptography.fernet import Fernet
+
+# Point every file the app writes at a scratch directory before backend is imported
+SCRATCH = tempfile.mkdtemp(prefix="cybersathi-tests-")
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+shutil.copytree(os.path.join(ROOT, "models"), os.path.join(SCRATCH, "models"))
+os.environ.update({
+    "DATABASE_URL": f"sqlite:///{os.path.join(SCRATCH, 'test.db')}",
+    "CYBERSATHI_FERNET_KEYS": Fernet.generate_key().decode(),
+    "CYBERSATHI_BLIND_INDEX_KEY": "test-blind-index-key",
+    "MEDIA_ROOT": os.path.join(SCRATCH, "media"),
+    "SESSION_DB_PATH": os.path.join(SCRATCH, "sessions.db"),
+    "SESSION_SNAPSHOT": os.path.join(SCRATCH, "sessions.snapshot.json"),
+    "TRANSLATION_CACHE_PATH": os.path.join(SCRATCH, "translations.db"),
+    "NOTIFY_LOCK_FILE": os.path.join(SCRATCH, "notifications.lock"),
+    "EMOTION_MODEL_DIR": os.path.join(SCRATCH, "models"),
+    "REMOTE_TRANSLATOR": "stub",
+    "EMOTION_TRAINER": "0",
+    "NOTIFY_WORKER": "0",
+    "ADMIN_TOKEN": "test-admin-token",
+})
+sys.path.insert(0, ROOT)
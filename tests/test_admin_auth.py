@@ -0,0 +1,128 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from backend import admin_auth
+from backend.app import app
+from backend.init_db import SessionLocal, init_db
+from backend.models import Complaint
+
+
+@pytest.fixture(scope="module")
+def client():
+    """A browser signed in through the login form."""
+    init_db()
+    client = TestClient(app)
+    response = client.post("/admin", data={"username": admin_auth.ADMIN_USER, "password": admin_auth.ADMIN_PASS},
+                           follow_redirects=False)
+    assert response.status_code == 303
+    return client
+
+
+@pytest.fixture
+def anonymous():
+    return TestClient(app)
+
+
+def test_session_round_trip():
+    value = admin_auth.new_session(now=1000)
+    assert admin_auth.read_session(value, now=1001)
+    assert admin_auth.read_session(value, now=1000 + admin_auth.ADMIN_SESSION_HOURS * 3600 + 1) is None
+    expires, csrf, signature = value.split(".")
+    assert admin_auth.read_session(f"{int(expires) + 3600}.{csrf}.{signature}", now=1001) is None
+    assert admin_auth.read_session("garbage", now=1001) is None
+
+
+def test_wrong_password_sets_no_cookie(anonymous):
+    response = anonymous.post("/admin", data={"username": "admin", "password": "nope"})
+    assert response.status_code == 401
+    assert admin_auth.SESSION_COOKIE not in response.cookies
+
+
+def test_pages_redirect_and_apis_refuse_without_login(anonymous):
+    response = anonymous.get("/admin/complaints", follow_redirects=False)
+    assert response.status_code == 303 and response.headers["location"] == "/admin"
+    assert anonymous.get("/admin/api/complaints").status_code == 401
+    assert anonymous.get("/admin/api/stats/complaints").status_code == 401
+
+
+def test_admin_token_header(client, anonymous):
+    response = anonymous.get("/admin/api/complaints", headers={"X-Admin-Token": "test-admin-token"})
+    assert response.status_code == 200
+    assert anonymous.get("/admin/api/complaints", headers={"X-Admin-Token": "wrong"}).status_code == 401
+
+
+def test_login_opens_dashboard(client):
+    assert client.get("/admin/complaints").status_code == 200
+    assert client.get("/admin/api/stats/emotions").status_code == 200
+
+
+def test_message_log_needs_admin(client, anonymous):
+    assert anonymous.get("/messages").status_code == 401
+    assert anonymous.post("/log_message", json={"sender": "x", "message": "hi"}).status_code == 401
+    assert client.get("/messages").status_code == 200
+
+
+def test_exports_need_admin(client, anonymous):
+    for url in ("/admin/export/complaints.csv", "/export/messages.ndjson"):
+        assert anonymous.get(url).status_code == 401
+        assert client.get(url).status_code == 200
+
+
+def test_state_changes_need_the_csrf_token(client, anonymous):
+    csrf = admin_auth.read_session(client.cookies.get(admin_auth.SESSION_COOKIE))
+    form = {"ticket": "CYB-NOPE", "status": "Resolved"}
+    assert client.post("/admin/update_status", data=form).status_code == 403
+    assert client.post("/admin/update_status", data={**form, "csrf_token": csrf}).status_code == 200
+    response = anonymous.post("/admin/update_status", data=form, follow_redirects=False)
+    assert response.status_code == 303
+
+    body = {"tickets": ["CYB-NOPE"], "status": "Resolved"}
+    assert anonymous.post("/admin/api/bulk_status", json=body).status_code == 401
+    assert client.post("/admin/api/bulk_status", json=body).status_code == 403
+    response = client.post("/admin/api/bulk_status", json=body, headers={"X-CSRF-Token": csrf})
+    assert response.status_code == 200 and response.json()["not_found"] == ["CYB-NOPE"]
+    response = anonymous.post("/admin/api/bulk_status", json=body, headers={"X-Admin-Token": "test-admin-token"})
+    assert response.status_code == 200
+
+
+def test_update_status_rejects_unknown_statuses(client):
+    csrf = admin_auth.read_session(client.cookies.get(admin_auth.SESSION_COOKIE))
+    with SessionLocal() as db:
+        db.add(Complaint(ticket_number="CYB-STATUS", name="Ravi Kumar", status="Registered"))
+        db.commit()
+    try:
+        response = client.post("/admin/update_status",
+                               data={"ticket": "CYB-STATUS", "status": "<script>", "csrf_token": csrf})
+        assert response.status_code == 400
+        with SessionLocal() as db:
+            assert db.query(Complaint).filter_by(ticket_number="CYB-STATUS").one().status == "Registered"
+    finally:
+        with SessionLocal() as db:
+            db.query(Complaint).filter_by(ticket_number="CYB-STATUS").delete()
+            db.commit()
+
+
+def test_notification_progress_needs_admin(client, anonymous):
+    assert anonymous.get("/admin/api/notifications").status_code == 401
+    assert client.get("/admin/api/notifications").status_code == 200
+
+
+def test_emotion_training_needs_admin(client, anonymous):
+    csrf = admin_auth.read_session(client.cookies.get(admin_auth.SESSION_COOKIE))
+    assert anonymous.post("/label_messages", json={"items": []}).status_code == 401
+    assert anonymous.post("/train_emotion").status_code == 401
+    assert client.post("/label_messages", json={"items": []}).status_code == 403
+    assert client.post("/label_messages", json={"items": []}, headers={"X-CSRF-Token": csrf}).status_code == 200
+
+
+def test_search_needs_admin(client, anonymous):
+    for url in ("/admin/api/search?q=upi", "/admin/api/entities/upi?value=a@ybl", "/admin/api/entities/upi/top"):
+        assert anonymous.get(url).status_code == 401
+        assert client.get(url).status_code == 200
+
+
+def test_linking_needs_admin(client, anonymous):
+    for url in ("/admin/api/clusters", "/admin/api/indicators/top", "/admin/api/unfreeze_requests"):
+        assert anonymous.get(url).status_code == 401
+        assert client.get(url).status_code == 200
+    assert anonymous.get("/admin/api/clusters/CYB-NOPE").status_code == 401
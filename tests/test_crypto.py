@@ -0,0 +1,48 @@
+import pytest
+from cryptography.fernet import Fernet
+from sqlalchemy import delete, select, text
+
+from backend import crypto, init_db as database
+from backend.init_db import engine, init_db
+from backend.models import Complaint, SchemaMigration, phone_blind_index
+
+
+def test_values_that_look_like_tokens_are_still_encrypted():
+    column = crypto.EncryptedString()
+    stored = column.process_bind_param("gAAAAA not really a token", None)
+    assert stored != "gAAAAA not really a token"
+    assert column.process_result_value(stored, None) == "gAAAAA not really a token"
+
+
+def test_undecryptable_values_raise():
+    foreign = Fernet(Fernet.generate_key()).encrypt(b"9876543210").decode()
+    with pytest.raises(crypto.DecryptionError):
+        crypto.decrypt(foreign)
+    with pytest.raises(crypto.DecryptionError):
+        crypto.decrypt_many([foreign], remember=False)
+    with pytest.raises(crypto.DecryptionError):
+        crypto.decrypt("9876543210")
+    with crypto.legacy_plaintext():
+        assert crypto.decrypt("9876543210") == "9876543210"
+    assert crypto.decrypt(None) is None
+
+
+def test_plaintext_rows_are_encrypted_once_at_startup(monkeypatch):
+    init_db()
+    with engine.begin() as conn:
+        conn.execute(delete(SchemaMigration.__table__))
+        conn.execute(text("INSERT INTO complaints (ticket_number, name, phone, phone_key) "
+                          "VALUES ('CYB-LEGACY', 'Ravi Kumar', '9876543210', '123')"))
+    init_db()
+    table = Complaint.__table__
+    with engine.connect() as conn:
+        row = conn.execute(text("SELECT name, phone, phone_key FROM complaints WHERE ticket_number = 'CYB-LEGACY'")).one()
+        assert conn.execute(select(SchemaMigration.name)).scalars().all() == ["encrypt_complaint_pii"]
+        assert conn.execute(select(table.c.name).where(table.c.ticket_number == "CYB-LEGACY")).scalar() == "Ravi Kumar"
+    assert row.name.startswith("gAAAAA") and row.phone.startswith("gAAAAA")
+    assert row.phone_key == phone_blind_index("9876543210")
+
+    monkeypatch.setattr(database, "has_plaintext_pii", lambda: pytest.fail("scanned complaints again"))
+    init_db()
+    with engine.begin() as conn:
+        conn.execute(delete(table).where(table.c.ticket_number == "CYB-LEGACY"))
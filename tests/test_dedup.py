@@ -0,0 +1,72 @@
+import uuid
+
+import pytest
+
+from backend.init_db import init_db
+from backend.whatsapp import whatsapp_router
+from backend.whatsapp.dedup import BloomFilter, MessageDeduplicator, claim, iter_messages, release
+
+
+def new_id():
+    return f"wamid.{uuid.uuid4().hex}"
+
+
+@pytest.mark.parametrize("bloom", [False, True])
+def test_window_remembers_ids(bloom):
+    dedup = MessageDeduplicator(window=60, max_ids=100, bloom=bloom)
+    assert dedup.first_sighting("a")
+    assert not dedup.first_sighting("a")
+    assert dedup.first_sighting("b")
+    dedup.forget("a")
+    assert dedup.first_sighting("a")
+    assert dedup.first_sighting(None) and dedup.first_sighting(None)
+    assert dedup.stats()["duplicates"] == 1
+
+
+def test_window_drops_oldest_past_max_ids():
+    dedup = MessageDeduplicator(window=60, max_ids=2)
+    for message_id in ("a", "b", "c"):
+        assert dedup.first_sighting(message_id)
+    assert dedup.first_sighting("a")  # evicted by "c"
+    assert not dedup.first_sighting("c")
+
+
+def test_bloom_filter_has_no_false_negatives():
+    bloom = BloomFilter(1000)
+    ids = [new_id() for _ in range(1000)]
+    for message_id in ids:
+        bloom.add(message_id)
+    assert all(message_id in bloom for message_id in ids)
+    assert sum(new_id() in bloom for _ in range(1000)) < 20
+
+
+def test_iter_messages_reads_batched_deliveries():
+    payload = {"entry": [
+        {"changes": [{"value": {"messages": [{"id": "1", "from": "91"}, {"id": "2"}]}}]},
+        {"changes": [{"value": {"statuses": []}}, {"value": {"messages": [{"id": "3", "from": "92"}]}}]},
+    ]}
+    assert [m["id"] for m in iter_messages(payload)] == ["1", "3"]
+
+
+def test_claim_is_durable_until_released():
+    init_db()
+    message_id = new_id()
+    assert claim(message_id, "919876543210")
+    assert not claim(message_id, "919876543210")
+    release(message_id)
+    assert claim(message_id, "919876543210")
+
+
+def test_failed_processing_releases_the_claim(monkeypatch):
+    init_db()
+    message_id = new_id()
+    whatsapp_router.dedup.first_sighting(message_id)
+
+    def broken_flow(*args):
+        raise RuntimeError("graph down")
+    monkeypatch.setattr(whatsapp_router, "_run_flow", broken_flow)
+    message = {"id": message_id, "from": "919876543210", "type": "text", "text": {"body": "hi"}}
+    with pytest.raises(RuntimeError):
+        whatsapp_router.process_message(message, send=lambda to, text: None)
+    assert whatsapp_router.dedup.first_sighting(message_id)
+    assert claim(message_id)
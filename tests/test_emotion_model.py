@@ -0,0 +1,57 @@
+import json
+import os
+import time
+
+import pytest
+
+from backend import emotion_model
+from backend.emotion_model import MODEL_DIR, ONLINE_META_FILE, EmotionModel, ModelReloader, read_meta
+from backend.startup import LazyResource
+
+
+def load_meta_only():
+    # Versions are all the reloader looks at; skip unpickling the artifacts
+    return EmotionModel(read_meta())
+
+
+@pytest.fixture
+def online_meta(monkeypatch):
+    monkeypatch.setattr(emotion_model, "_load_artifacts", load_meta_only)
+    path = os.path.join(MODEL_DIR, ONLINE_META_FILE)
+    yield path
+    if os.path.exists(path):
+        os.remove(path)
+
+
+def wait_for_reload(reloader):
+    deadline = time.monotonic() + 30
+    while reloader._loading and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+
+def test_meta_written_after_the_first_poll_is_loaded(online_meta):
+    resource = LazyResource("emotion_model_test", load_meta_only)
+    reloader = ModelReloader(resource=resource, interval=0)
+    assert resource.get().version == 0
+
+    reloader.poll()  # no online meta yet: baseline only
+    wait_for_reload(reloader)
+    assert reloader.swaps == 0
+
+    with open(online_meta, "w", encoding="utf-8") as f:
+        json.dump({"version": 1}, f)  # another worker's first version
+    reloader.poll()
+    wait_for_reload(reloader)
+    assert reloader.swaps == 1
+    assert resource.get().version == 1
+
+
+def test_first_poll_reloads_a_model_older_than_the_meta(online_meta):
+    resource = LazyResource("emotion_model_test", load_meta_only)
+    reloader = ModelReloader(resource=resource, interval=0)
+    resource.get()
+    with open(online_meta, "w", encoding="utf-8") as f:
+        json.dump({"version": 2}, f)
+    reloader.poll()
+    wait_for_reload(reloader)
+    assert resource.get().version == 2
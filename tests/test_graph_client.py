@@ -0,0 +1,61 @@
+import asyncio
+
+import httpx
+import pytest
+
+from backend.whatsapp import graph_client as graph
+from backend.whatsapp import meta_handler
+from backend.whatsapp.graph_client import GraphClient
+
+
+def send_once(outcomes, monkeypatch):
+    """Send one message against a transport answering `outcomes` in turn; returns (response, attempts)."""
+    monkeypatch.setattr(graph, "backoff_delay", lambda attempt: 0)
+    attempts = []
+
+    def handler(request):
+        outcome = outcomes[min(len(attempts), len(outcomes) - 1)]
+        attempts.append(request)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return httpx.Response(outcome, headers={"Retry-After": "0"}, json={})
+
+    client = GraphClient(base_url="https://graph.test", token="t", phone_id="1", max_retries=3,
+                         transport=httpx.MockTransport(handler))
+
+    async def run():
+        try:
+            return await client.send_text("919876543210", "hello")
+        finally:
+            await client.aclose()
+    return asyncio.run(run()), len(attempts)
+
+
+@pytest.mark.parametrize("status", [429, 503])
+def test_throttled_sends_are_retried(status, monkeypatch):
+    response, attempts = send_once([status, 200], monkeypatch)
+    assert response.status_code == 200 and attempts == 2
+
+
+@pytest.mark.parametrize("status", [500, 502, 504])
+def test_server_errors_are_not_retried(status, monkeypatch):
+    response, attempts = send_once([status, 200], monkeypatch)
+    assert response.status_code == status and attempts == 1
+
+
+def test_connection_failures_are_retried(monkeypatch):
+    response, attempts = send_once([httpx.ConnectError("refused"), 200], monkeypatch)
+    assert response.status_code == 200 and attempts == 2
+
+
+def test_read_timeouts_are_not_retried(monkeypatch):
+    response, attempts = send_once([httpx.ReadTimeout("slow"), 200], monkeypatch)
+    assert response is None and attempts == 1
+
+
+def test_blocking_sends_retry_only_throttling():
+    retry = meta_handler.send_http.get_adapter("https://graph.facebook.com").max_retries
+    assert set(retry.status_forcelist) == {429, 503}
+    assert retry.read == 0 and retry.is_retry("POST", 503) and not retry.is_retry("POST", 500)
+    downloads = meta_handler.http.get_adapter("https://graph.facebook.com").max_retries
+    assert downloads.is_retry("GET", 502) and not downloads.is_retry("POST", 502)
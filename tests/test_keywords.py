@@ -0,0 +1,119 @@
+import json
+import random
+
+import pytest
+
+from backend.utils.keywords import KEYWORD_RULES_FILE, Hit, KeywordEngine, _is_word_char
+
+with open(KEYWORD_RULES_FILE, encoding="utf-8") as f:
+    RULES = json.load(f)
+
+INDIC_RULES = {
+    "money": {"default": None, "rules": [
+        {"category": "lost", "keywords": ["पैसा", "ଟଙ୍କା"]},
+        {"category": "stem", "keywords": ["ठग*"]},
+        {"category": "short", "keywords": ["पैस"]},
+    ]},
+}
+
+
+def linear_scan(tables, text):
+    """Reference: every keyword on its own, word-bounded, one str.find loop each."""
+    text = (text or "").lower()
+    found = {}
+    for table, spec in tables.items():
+        if table.startswith("_"):
+            continue
+        for priority, rule in enumerate(spec["rules"]):
+            for keyword in rule["keywords"]:
+                keyword = keyword.lower()
+                stem = keyword.endswith("*")
+                keyword = keyword.rstrip("*")
+                i = text.find(keyword)
+                while i != -1:
+                    end = i + len(keyword)
+                    if (i == 0 or not _is_word_char(text[i - 1])) and (
+                            stem or end == len(text) or not _is_word_char(text[end])):
+                        found.setdefault(table, set()).add(Hit(table, priority, rule["category"]))
+                        break
+                    i = text.find(keyword, i + 1)
+    return {table: sorted(hits) for table, hits in found.items()}
+
+
+@pytest.fixture(scope="module")
+def engine():
+    return KeywordEngine(RULES)
+
+
+def categories(scanned, table):
+    return [hit.category for hit in scanned.get(table, [])]
+
+
+def test_keywords_match_whole_words_only(engine):
+    assert categories(engine.scan("my account was hacked"), "intent") == ["new_complaint"]  # not "ack"
+    assert "card_fraud" not in categories(engine.scan("please discard this"), "fraud_category")
+    assert categories(engine.scan("ack: ticket received"), "intent") == ["status_check"]
+
+
+def test_stems_match_continuations(engine):
+    assert categories(engine.scan("I got SCAMMED"), "advice") == ["fraud"]
+    assert categories(engine.scan("so frustrating"), "advice") == ["anger"]
+    assert engine.classify("unfreezing my account", "intent") == "account_unfreeze"
+
+
+def test_overlapping_keywords_all_hit(engine):
+    assert categories(engine.scan("debit card blocked"), "fraud_category") == ["card_fraud"]
+    scanned = engine.scan("an instant loan app took my money over upi")
+    assert categories(scanned, "fraud_category") == ["upi_fraud", "loan_app"]
+    assert categories(scanned, "grievance") == ["financial"]
+    assert engine.classify("loan apps harassing me", "fraud_category") == "loan_app"
+
+
+def test_case_folding(engine):
+    assert engine.scan("UPI FRAUD via WhatsApp") == engine.scan("upi fraud via whatsapp")
+    assert engine.classify("Google Pay", "grievance") == "google"
+
+
+def test_defaults_and_responses(engine):
+    assert engine.classify("hello there", "intent") == "other"
+    assert engine.respond("hello there", "advice") == RULES["advice"]["default"]
+    assert engine.respond("", "grievance") == RULES["grievance"]["default"]
+    assert "sancharsaathi" in engine.respond("fake SMS from a bank", "grievance")  # telecom outranks financial
+
+
+def test_indic_words_are_bounded_by_their_marks():
+    engine = KeywordEngine(INDIC_RULES)
+    # पैसा ends in a vowel sign, which \w does not cover: "पैस" must not match inside it
+    assert categories(engine.scan("मेरा पैसा कट गया"), "money") == ["lost"]
+    assert categories(engine.scan("ମୋ ଟଙ୍କା ଗଲା"), "money") == ["lost"]
+    assert categories(engine.scan("मुझे ठगा गया"), "money") == ["stem"]
+    assert engine.scan("मेरे पैसों का क्या") == {}
+
+
+CASES = [
+    "", "ack", "hacked", "track my complaint status", "status?", "loanapp", "loan-app", "loan_app",
+    "install from link", "x.com account", "xx.com", "e-commerce refund", "ecommerce", "website1",
+    "phishing link on website", "credit cards stolen", "IPO crypto trading", "my UPI id was frozen",
+    "फ्रॉड upi", "ମୋ upi ଟଙ୍କା", "scam-call from +91", "calls, sms; phone!", "youtube/gmail",
+]
+
+
+@pytest.mark.parametrize("text", CASES)
+def test_matches_the_linear_scan(engine, text):
+    assert engine.scan(text) == linear_scan(RULES, text)
+
+
+def test_matches_the_linear_scan_on_random_text(engine):
+    pieces = [k.rstrip("*") for spec in RULES.values() if isinstance(spec, dict) and "rules" in spec
+              for rule in spec["rules"] for k in rule["keywords"]]
+    pieces += ["s", "ed", "ing", "dis", "un", "_", "-", ".", " ", " ", " ", "ा", "पैस", "9", "!"]
+    rng = random.Random(11)
+    for _ in range(2000):
+        text = "".join(rng.choice(pieces) for _ in range(rng.randint(1, 8)))
+        assert engine.scan(text) == linear_scan(RULES, text), text
+
+    indic = KeywordEngine(INDIC_RULES)
+    pieces = ["पैस", "पैसा", "ा", "ो", "ठग", "ଟଙ୍କା", "ଟଙ୍କ", " ", "-", "a"]
+    for _ in range(1000):
+        text = "".join(rng.choice(pieces) for _ in range(rng.randint(1, 6)))
+        assert indic.scan(text) == linear_scan(INDIC_RULES, text), text
@@ -0,0 +1,48 @@
+import numpy as np
+import pytest
+from sqlalchemy import create_engine, insert, select
+
+from backend import linking
+from backend.models import ComplaintCluster
+
+
+@pytest.fixture
+def conn():
+    engine = create_engine("sqlite://")
+    ComplaintCluster.__table__.create(engine)
+    with engine.begin() as conn:
+        conn.execute(insert(ComplaintCluster.__table__),
+                     [{"complaint_id": i, "parent_id": i, "size": 1} for i in range(1, 8)])
+        yield conn
+
+
+def sizes(conn):
+    return dict(conn.execute(select(ComplaintCluster.complaint_id, ComplaintCluster.size)).all())
+
+
+def test_union_merges_smaller_under_larger(conn):
+    assert linking.union(conn, 1, 2) == 1
+    assert linking.union(conn, 3, 1) == 1  # 3 is alone, so it joins 1's cluster
+    assert linking.union(conn, 2, 3) == 1  # already together
+    assert {n: linking.find(conn, n) for n in (1, 2, 3, 4)} == {1: 1, 2: 1, 3: 1, 4: 4}
+    assert sizes(conn)[1] == 3 and sizes(conn)[2] == sizes(conn)[3] == 0
+
+
+def test_find_compresses_the_path(conn):
+    linking.union(conn, 4, 5)
+    linking.union(conn, 6, 7)
+    root = linking.union(conn, 4, 6)
+    leaf = next(n for n in (5, 7) if linking._parent(conn, n) != root)
+    assert linking.find(conn, leaf) == root
+    assert linking._parent(conn, leaf) == root
+    assert sizes(conn)[root] == 4
+
+
+@pytest.mark.parametrize("n, left, right, expected", [
+    (5, [], [], [0, 1, 2, 3, 4]),
+    (6, [0, 4, 2], [3, 5, 4], [0, 1, 2, 0, 2, 2]),
+    (4, [3, 2, 1], [2, 1, 0], [0, 0, 0, 0]),
+])
+def test_components_label_by_smallest_member(n, left, right, expected):
+    labels = linking.components(n, np.array(left, dtype=np.int64), np.array(right, dtype=np.int64))
+    assert list(labels) == expected
@@ -0,0 +1,50 @@
+import pytest
+
+from backend.utils.location import FALLBACK_STATION, normalize_name, skeleton, station_directory
+
+
+@pytest.fixture(scope="module")
+def directory():
+    return station_directory.get()
+
+
+def district_of(station):
+    return station.district if station is not FALLBACK_STATION else None
+
+
+def test_normalize_and_skeleton():
+    assert normalize_name("Bhubaneswar P.S.") == "bhubaneswar"
+    assert skeleton("bhubaneswar") == skeleton("bhubneshwar")
+
+
+@pytest.mark.parametrize("typed, district, pincode, expected", [
+    # Locality names share letters with other stations; the PIN and district decide
+    ("Saheed Nagar", "Khordha", "751007", "Bhubaneswar Police Station"),
+    ("Jeypore", "Koraput", "764001", "Koraput Police Station"),
+    ("Jeypore", "Koraput", None, "Koraput Police Station"),
+    ("Saheed Nagar", "Khordha", None, "Khordha Police Station"),
+    ("Saheed Nagar, Bhubaneswar", None, None, "Bhubaneswar Police Station"),
+    # An exact station name beats the PIN
+    ("Cuttack PS", None, "751001", "Cuttack Police Station"),
+    ("BBSR", "Cuttack", None, "Bhubaneswar Police Station"),
+    # Misspellings are matched only after exact names, PIN and district
+    ("Bhubneshwar", None, None, "Bhubaneswar Police Station"),
+    ("Rourkella", "Sundargarh", None, "Rourkela Police Station"),
+    ("near Bhubneshwar", "Cuttack", None, "Cuttack Police Station"),
+    ("Berhampore", None, "760010", "Berhampur Police Station"),
+    ("my area", "Khurda", None, "Khordha Police Station"),
+])
+def test_resolve(directory, typed, district, pincode, expected):
+    assert directory.resolve(typed, district, pincode).name == expected
+
+
+@pytest.mark.parametrize("typed", ["Pur", "Para", "Nagar", "Saheed Nagar"])
+def test_common_words_alone_match_nothing(directory, typed):
+    assert directory.by_name_text(typed) is None
+    assert directory.resolve(typed) is FALLBACK_STATION
+
+
+def test_pin_prefix_and_district_fallbacks(directory):
+    assert directory.resolve("somewhere", None, "768002").name == "Sambalpur Police Station"
+    assert directory.resolve("somewhere", "Puri", None).name == "Puri Police Station"
+    assert directory.resolve(None, None, None) is FALLBACK_STATION
@@ -0,0 +1,50 @@
+import logging
+
+import pytest
+
+from backend.logs import redact
+from backend.startup import StartupReport
+
+
+@pytest.mark.parametrize("raw, masked", [
+    ("sending to 919876543210", "sending to ***10"),
+    ("call +91 98765 43210 now", "call ***10 now"),
+    ("mail ravi.kumar@gmail.com", "mail r***@gmail.com"),
+    ("paid fraud.king@ybl", "paid f***@ybl"),
+    ("Authorization: Bearer abc.def.ghi", "Authorization: Bearer ***"),
+    ("ticket CYB-0A8QYG-TG6C0005 registered", "ticket CYB-0A8QYG-TG6C0005 registered"),
+])
+def test_redact_masks_pii(raw, masked):
+    assert redact(raw) == masked
+
+
+def test_redact_leaves_non_strings_alone():
+    assert redact(42) == 42 and redact(None) is None
+
+
+class Records(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+def test_startup_summary_is_structured(capsys):
+    report = StartupReport()
+    report.record("import", "fastapi", 0.012)
+    report.record("init", "emotion_model", 0.5, error="missing file")
+    handler = Records()
+    logger = logging.getLogger("cybersathi.startup")
+    logger.addHandler(handler)
+    try:
+        report.log_summary()
+    finally:
+        logger.removeHandler(handler)
+    fields = [(r.levelname, r.fields) for r in handler.records]
+    assert fields[0] == ("INFO", {"phase": "import", "subsystem": "fastapi", "ms": 12.0})
+    assert fields[1] == ("WARNING", {"phase": "init", "subsystem": "emotion_model", "ms": 500.0,
+                                     "error": "missing file"})
+    assert fields[2][1]["import_ms"] == 12.0 and fields[2][1]["init_ms"] == 500.0
+    assert capsys.readouterr().out == ""
@@ -0,0 +1,41 @@
+import os
+
+import pytest
+from fastapi.testclient import TestClient
+
+from backend.utils.media_store import sniff_mime, store_base64
+
+OOXML = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+
+
+@pytest.mark.parametrize("head, declared, expected", [
+    (b"\x89PNG\r\n\x1a\n\0\0", "text/html", ("image/png", ".png")),
+    (b"\xff\xd8\xff\xe0", None, ("image/jpeg", ".jpg")),
+    (b"%PDF-1.7", "application/octet-stream", ("application/pdf", ".pdf")),
+    (b"RIFF\0\0\0\0WEBPVP8 ", None, ("image/webp", ".webp")),
+    (b"\0\0\0\x18ftypmp42", None, ("video/mp4", ".mp4")),
+    (b"PK\x03\x04", OOXML, (OOXML, ".docx")),
+    (b"PK\x03\x04", "application/zip", ("application/zip", ".zip")),
+    (b"ID3\x04", "audio/mpeg", ("audio/mpeg", ".mp3")),
+    (b"hello", "text/plain; charset=utf-8", ("text/plain", ".txt")),
+])
+def test_sniff_mime_known_types(head, declared, expected):
+    assert sniff_mime(head, declared) == expected
+
+
+@pytest.mark.parametrize("declared", ["text/html", "image/svg+xml", "application/xhtml+xml",
+                                      "application/javascript", "TEXT/HTML; charset=utf-8", OOXML, None])
+def test_sniff_mime_active_content_is_bin(declared):
+    assert sniff_mime(b"<svg onload=alert(1)>", declared) == ("application/octet-stream", ".bin")
+
+
+def test_media_is_served_as_a_download():
+    from backend.app import app
+    from backend.utils.media_store import MEDIA_ROOT
+    stored = store_base64("PGh0bWw+PHNjcmlwdD5hbGVydCgxKTwvc2NyaXB0Pg==", "text/html")
+    assert stored.path.endswith(".bin")
+    response = TestClient(app).get("/media/" + os.path.relpath(stored.path, MEDIA_ROOT))
+    assert response.status_code == 200
+    assert response.headers["content-disposition"] == "attachment"
+    assert response.headers["x-content-type-options"] == "nosniff"
+    assert response.headers["content-type"] != "text/html"
@@ -0,0 +1,19 @@
+import pytest
+from fastapi import HTTPException
+
+from backend.routes import observability
+
+
+def test_debug_token_is_required(monkeypatch):
+    monkeypatch.setattr(observability, "DEBUG_TOKEN", "s3cret-ü")
+    observability.require_debug_token("s3cret-ü")
+    for token in (None, "", "s3cret", "s3cret-u", "wrong"):
+        with pytest.raises(HTTPException) as e:
+            observability.require_debug_token(token)
+        assert e.value.status_code == 403
+
+
+def test_debug_endpoints_are_off_without_a_token(monkeypatch):
+    monkeypatch.setattr(observability, "DEBUG_TOKEN", None)
+    with pytest.raises(HTTPException):
+        observability.require_debug_token("anything")
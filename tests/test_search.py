@@ -0,0 +1,68 @@
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+
+from backend import search
+from backend.app import app
+from backend.init_db import engine, init_db
+
+
+def test_fts_query_quotes_every_word():
+    assert search.fts_query("upi fraud") == '"upi" "fraud"'
+    assert search.fts_query("paytm*") == '"paytm"*'
+
+
+def test_fts_query_makes_operators_literal():
+    assert search.fts_query('a OR b NEAR(c) "quoted"') == '"a" "OR" "b" "NEAR(c)" """quoted"""'
+    assert search.fts_query("* ** ") == ""
+
+
+def test_find_entities_normalizes_each_kind():
+    found = search.extract_entities(
+        "Paid 5000 to fraud.king@ybl, he called from +91 98765-43210, "
+        "sent https://WWW.Bit.ly/xyz, mail me at Ravi.K@Gmail.com, a/c 123456789012"
+    )
+    assert found == {
+        ("upi", "fraud.king@ybl"),
+        ("phone", "9876543210"),
+        ("url", "bit.ly/xyz"),
+        ("email", "ravi.k@gmail.com"),
+        ("account", "123456789012"),
+    }
+
+
+def test_a_span_counts_as_one_kind_only():
+    assert search.extract_entities("reach me at ravi@gmail.com") == {("email", "ravi@gmail.com")}
+    assert search.extract_entities("call 9876543210") == {("phone", "9876543210")}
+
+
+def test_as_entity_needs_the_whole_query():
+    assert search.as_entity(" fraud.king@ybl ") == ("upi", "fraud.king@ybl")
+    assert search.as_entity("09876543210") == ("phone", "9876543210")
+    assert search.as_entity("money sent to fraud.king@ybl") is None
+    assert search.as_entity("lottery") is None
+
+
+def test_message_index_is_off_by_default():
+    init_db()
+    assert not search.SEARCH_MESSAGES
+    with engine.connect() as conn:
+        names = set(conn.execute(text("SELECT name FROM sqlite_master")).scalars())
+    assert "messages_fts" not in names and "messages_fts_ai" not in names
+
+
+@pytest.mark.parametrize("query", ["loan app", "9876543210"])
+@pytest.mark.parametrize("cursor", ["abc", "x", "1.5"])
+def test_malformed_cursor_is_a_client_error(query, cursor):
+    init_db()
+    client = TestClient(app, raise_server_exceptions=False)
+    response = client.get("/admin/api/search", params={"q": query, "cursor": cursor},
+                          headers={"X-Admin-Token": "test-admin-token"})
+    assert response.status_code == 422
+
+
+def test_numeric_cursor_still_pages():
+    init_db()
+    response = TestClient(app).get("/admin/api/search", params={"q": "loan app", "cursor": "50"},
+                                   headers={"X-Admin-Token": "test-admin-token"})
+    assert response.status_code == 200
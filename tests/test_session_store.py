@@ -0,0 +1,91 @@
+import json
+import sqlite3
+
+from backend.init_db import init_db
+from backend.whatsapp import whatsapp_router
+from backend.whatsapp.session_store import MemorySessionStore, SQLiteSessionStore
+
+CHAT = {"stage": "ask_dob", "name": "Ravi Kumar", "phone": "9876543210"}
+
+
+def test_sqlite_records_are_encrypted(tmp_path):
+    path = str(tmp_path / "sessions.db")
+    store = SQLiteSessionStore(path=path)
+    store.save("919876543210", CHAT)
+    raw = sqlite3.connect(path).execute("SELECT data FROM sessions").fetchone()[0]
+    assert b"Ravi" not in raw and raw.startswith(b"gAAAAA")
+    assert store.get("919876543210") == CHAT
+    store.close()
+
+
+def test_snapshot_is_encrypted_and_resumed(tmp_path):
+    path = str(tmp_path / "sessions.snapshot.json")
+    store = MemorySessionStore(snapshot_path=path)
+    store.save("919876543210", CHAT)
+    store.close()
+    assert b"Ravi" not in open(path, "rb").read()
+    assert MemorySessionStore(snapshot_path=path).get("919876543210") == CHAT
+
+
+def test_plaintext_snapshot_from_before_encryption_still_loads(tmp_path):
+    path = tmp_path / "sessions.snapshot.json"
+    path.write_text(json.dumps({"919876543210": [4102444800, json.dumps(CHAT)]}))
+    assert MemorySessionStore(snapshot_path=str(path)).get("919876543210") == CHAT
+
+
+def test_sqlite_save_is_compare_and_set(tmp_path):
+    path = str(tmp_path / "sessions.db")
+    first, second = SQLiteSessionStore(path=path), SQLiteSessionStore(path=path)  # two worker processes
+    assert first.load("919876543210") == (None, 0)
+    assert first.save("919876543210", {"stage": "menu"}, 0)
+    assert not second.save("919876543210", {"stage": "ask_name"}, 0)  # both saw "no chat"
+
+    chat, version = first.load("919876543210")
+    assert second.load("919876543210") == (chat, version)
+    assert first.save("919876543210", {**chat, "stage": "ask_name"}, version)
+    assert not second.save("919876543210", {**chat, "stage": "status"}, version)
+    assert not second.delete("919876543210", version)
+    assert second.get("919876543210") == {"stage": "ask_name"}
+
+
+def test_sessions_table_from_before_versions_is_upgraded(tmp_path):
+    path = str(tmp_path / "sessions.db")
+    with sqlite3.connect(path) as conn:
+        conn.execute("CREATE TABLE sessions (sender TEXT PRIMARY KEY, data BLOB NOT NULL, expires_at REAL NOT NULL)")
+        conn.execute("INSERT INTO sessions VALUES ('919876543210', ?, 4102444800)", (json.dumps(CHAT).encode(),))
+    store = SQLiteSessionStore(path=path)
+    assert store.load("919876543210") == (CHAT, 0)
+    assert store.save("919876543210", CHAT, 0) is False  # a live chat is not "absent"
+    assert store.save("919876543210", CHAT, None)
+
+
+class RacingEngine:
+    """The first turn loses the race: another worker saves the chat while it runs."""
+
+    def __init__(self, other):
+        self.other = other
+        self.turns = []
+
+    def handle(self, turn):
+        self.turns.append(dict(turn.user))
+        if len(self.turns) == 1:
+            self.other.save(turn.sender, {"stage": "ask_name"})
+        turn.send(turn.sender, f"reply to {turn.user['stage']}")
+        turn.user["stage"] = "next"
+        return {"status": "ok"}
+
+
+def test_a_turn_that_lost_the_race_is_replayed(tmp_path, monkeypatch):
+    init_db()
+    path = str(tmp_path / "sessions.db")
+    store, other = SQLiteSessionStore(path=path), SQLiteSessionStore(path=path)
+    store.save("919876543210", {"stage": "menu"})
+    racing = RacingEngine(other)
+    monkeypatch.setattr(whatsapp_router, "sessions", store)
+    monkeypatch.setattr(whatsapp_router, "engine", racing)
+    sent = []
+    message = {"from": "919876543210", "type": "text", "text": {"body": "1"}}
+    assert whatsapp_router.process_message(message, send=lambda to, text: sent.append(text)) == {"status": "ok"}
+    assert racing.turns == [{"stage": "menu"}, {"stage": "ask_name"}]
+    assert sent == ["reply to ask_name"]  # the stale turn's reply is never sent
+    assert store.get("919876543210") == {"stage": "next"}
@@ -0,0 +1,96 @@
+from datetime import datetime, timezone
+
+import pytest
+from sqlalchemy import delete, update
+
+from backend.init_db import engine, init_db
+from backend.models import TicketWorker
+from backend.utils.tickets import (ALPHABET, TICKET_EPOCH_MS, TicketGenerator, WorkerLease, is_valid_ticket,
+                                   luhn_check_char, normalize_ticket, parse_ticket)
+
+ISSUED = datetime(2025, 3, 1, 12, 30, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def ticket():
+    return TicketGenerator(worker_id=7, clock=ISSUED.timestamp).new_ticket()
+
+
+def test_ticket_round_trips(ticket):
+    assert ticket.startswith("CYB-") and len(ticket) == 19
+    assert normalize_ticket(ticket) == ticket
+    assert parse_ticket(ticket) == (ISSUED, 7, 0)
+
+
+def test_every_single_character_typo_is_caught(ticket):
+    body = ticket[4:10] + ticket[11:]
+    for i, original in enumerate(body):
+        for ch in ALPHABET:
+            if ch != original:
+                typo = body[:i] + ch + body[i + 1:]
+                assert luhn_check_char(typo[:-1]) != typo[-1]
+
+
+def test_normalize_accepts_what_people_type(ticket):
+    assert normalize_ticket(f"  {ticket.lower()} ") == ticket
+    confusable = ticket.replace("0", "O").replace("1", "I")
+    assert normalize_ticket(confusable) == ticket
+
+
+@pytest.mark.parametrize("text", ["", None, "CYB-123", "hello", "CYB-0A8QYG-TG6C000"])
+def test_malformed_tickets_are_rejected(text):
+    assert normalize_ticket(text) is None
+    assert not is_valid_ticket(text)
+
+
+def test_legacy_tickets_pass_unchecked():
+    assert normalize_ticket("cyb-1a2b3c4d") == "CYB-1A2B3C4D"
+    assert normalize_ticket("CYB-20240105-0042") == "CYB-20240105-0042"
+    assert parse_ticket("CYB-20240105-0042") is None
+
+
+def test_ids_are_monotonic_within_a_millisecond_and_after_clock_steps():
+    times = iter([100.0, 100.0, 100.0, 99.0, 101.0])
+    generator = TicketGenerator(worker_id=1, clock=lambda: next(times) + TICKET_EPOCH_MS / 1000)
+    tickets = [generator.new_ticket() for _ in range(5)]
+    assert tickets == sorted(tickets) and len(set(tickets)) == 5
+    assert [parse_ticket(t)[2] for t in tickets] == [0, 1, 2, 3, 0]
+
+
+@pytest.fixture
+def leases():
+    init_db()
+    yield TicketWorker.__table__
+    with engine.begin() as conn:
+        conn.execute(delete(TicketWorker.__table__))
+
+
+def test_two_workers_with_the_same_pid_lease_different_ids(leases):
+    # Containers on different hosts often both run as pid 1; the lease table tells them apart
+    clock = ISSUED.timestamp
+    first, second = TicketGenerator(clock=clock), TicketGenerator(clock=clock)
+    a, b = first.new_ticket(), second.new_ticket()
+    assert a != b
+    assert parse_ticket(a)[1] != parse_ticket(b)[1]
+    assert parse_ticket(a)[1] == first.lease.worker_id and parse_ticket(b)[1] == second.lease.worker_id
+
+
+def test_a_lost_lease_is_replaced_before_issuing(leases):
+    now = [ISSUED.timestamp()]
+    lease = WorkerLease(seconds=60, clock=lambda: now[0])
+    taken = lease.current()
+    assert lease.current() == taken  # renewal not due yet
+
+    now[0] += 61
+    with engine.begin() as conn:  # the lease expired and another process claimed the ID
+        conn.execute(update(leases).where(leases.c.worker_id == taken)
+                     .values(holder="elsewhere:1:x", expires_at=datetime.utcfromtimestamp(now[0] + 600)))
+    assert lease.current() != taken
+
+
+def test_release_frees_the_id(leases):
+    lease = WorkerLease()
+    lease.current()
+    lease.release()
+    with engine.connect() as conn:
+        assert conn.execute(leases.select()).all() == []
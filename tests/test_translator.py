@@ -0,0 +1,101 @@
+import sqlite3
+import threading
+
+import pytest
+
+from backend.utils.translator import (CircuitBreaker, StubTranslator, TranslationCache, TranslationService,
+                                      detect_language)
+
+
+@pytest.mark.parametrize("text, lang", [
+    ("ମୋ ଟଙ୍କା କଟିଗଲା", "or"),
+    ("मेरा पैसा कट गया", "hi"),
+    ("mera paisa kat gaya hai, kripya madad kijiye", "hi"),
+    ("my money was deducted from my account, please help", "en"),
+    ("ok", "en"),
+    ("", "en"),
+    ("12345 !!!", "en"),
+])
+def test_detect_language(text, lang):
+    assert detect_language(text) == lang
+
+
+def test_script_majority_wins():
+    assert detect_language("OTP ମୋ ଟଙ୍କା କଟିଗଲା") == "or"
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_breaker_opens_after_threshold_and_closes_on_success():
+    clock = Clock()
+    breaker = CircuitBreaker(threshold=3, reset_after=60, clock=clock)
+    for _ in range(2):
+        breaker.failure()
+    assert breaker.allow() and breaker.state == "closed"
+    breaker.failure()
+    assert breaker.state == "open" and not breaker.allow()
+    clock.now = 60
+    assert breaker.allow()
+    breaker.success()
+    assert breaker.state == "closed" and breaker.allow()
+
+
+def test_half_open_lets_exactly_one_trial_through():
+    clock = Clock()
+    breaker = CircuitBreaker(threshold=1, reset_after=10, clock=clock)
+    breaker.failure()
+    clock.now = 10
+    allowed = []
+    threads = [threading.Thread(target=lambda: allowed.append(breaker.allow())) for _ in range(20)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert allowed.count(True) == 1
+    assert breaker.state == "half-open"
+
+    breaker.failure()  # the trial failed: open again for another reset_after
+    assert breaker.state == "open" and not breaker.allow()
+    clock.now = 20
+    assert breaker.allow() and not breaker.allow()
+
+
+def test_service_skips_the_remote_while_open():
+    remote = StubTranslator(fail=True)
+    service = TranslationService(remote=remote, breaker=CircuitBreaker(threshold=2, reset_after=60))
+    for _ in range(4):
+        assert service.translate("mera paisa kat gaya hai", "en") == "mera paisa kat gaya hai"
+    assert len(remote.calls) == 2
+
+
+def test_only_prompts_and_common_replies_are_persisted(tmp_path):
+    path = str(tmp_path / "translations.db")
+    remote = StubTranslator()
+    service = TranslationService(remote=remote, cache=TranslationCache(path=path))
+    service.prewarm(["Please enter your full name"], langs=("or",))
+    assert service.translate("Haan", "en", source_lang="hi") == "[en] Haan"
+    citizen = "mera account 1234567890 se 5000 rupaye kat gaye"
+    service.translate(citizen, "en")
+    service.translate(citizen, "en")
+    assert [call[0] for call in remote.calls].count(citizen) == 2  # never served from a cache
+
+    with sqlite3.connect(path) as conn:
+        results = {row[0] for row in conn.execute("SELECT result FROM prompt_translations")}
+    assert results == {"[or] Please enter your full name", "[en] Haan"}
+
+
+def test_legacy_cache_table_is_dropped(tmp_path):
+    path = str(tmp_path / "translations.db")
+    with sqlite3.connect(path) as conn:
+        conn.execute("CREATE TABLE translations (key TEXT PRIMARY KEY, result TEXT, used_at REAL)")
+        conn.execute("INSERT INTO translations VALUES ('k', 'my otp is 123456', 0)")
+    TranslationCache(path=path)
+    with sqlite3.connect(path) as conn:
+        names = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    assert names == {"prompt_translations"}